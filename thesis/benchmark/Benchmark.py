@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'model'))
+from Generators import GENERATORS
+from WorkerPool import WorkerPool, model_from_dict
+from MembraneSystem import MembraneSystem
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CASES = {
+    "deep_chain": {"depth": 30, "multiplicity": 200},
+    "wide_tree": {"width": 50, "multiplicity": 1000},
+    "many_rules": {"num_of_rules": 100, "multiplicity": 1000},
+    "huge_multiplicity": {"multiplicity": 2000},
+    "dissolution_heavy": {"depth": 30, "multiplicity": 10},
+    "symport_contention": {"width": 20, "multiplicity": 500}
+}
+"""The default parameters of the generators used by the benchmark"""
+
+METRICS = ("steps_per_second", "copies_per_second", "loads_per_second")
+"""The throughput metrics compared between two result files"""
+
+
+def repeat(func, min_time=0.2):
+    """
+    A function used to call a function repeatedly until the given time has
+    elapsed
+
+    Parameters
+    ----------
+    func : callable
+        the function to be measured
+    min_time : float, optional
+        the minimal measured time in seconds (default is 0.2)
+
+    Returns
+    -------
+    float
+        the number of calls per second
+    """
+
+    count = 0
+    starting_time = time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - starting_time
+        if elapsed >= min_time:
+            return count / elapsed
+
+
+def bench_steps(model, max_steps=1000, seed=0):
+    """
+    A function used to measure the simulation of a copy of the model until it
+    halts or reaches the step budget
+
+    Since the copy is seeded, the time and the memory are measured on the
+    same computation
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model to be simulated (left unchanged)
+    max_steps : int, optional
+        the step budget (default is 1000)
+    seed : int, optional
+        the seed of the copy (default is 0)
+
+    Returns
+    -------
+    dict
+        the number of steps, the elapsed time, the steps per second and the
+        peak of the traced memory allocations in bytes
+    """
+
+    def simulate():
+        model_copy = model.__class__.copy_system(model)
+        model_copy.seed(seed)
+        steps = 0
+        while steps < max_steps and model_copy.any_rule_applicable():
+            model_copy.simulate_step()
+            steps += 1
+        return steps
+
+    starting_time = time.perf_counter()
+    steps = simulate()
+    elapsed = time.perf_counter() - starting_time
+
+    # tracing slows down the allocations, so the memory is measured in a
+    # separate run
+    tracemalloc.start()
+    simulate()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"steps": steps, "time": elapsed,
+            "steps_per_second": steps / elapsed if elapsed else 0.0,
+            "peak_memory": peak}
+
+
+def bench_replicas(json_dict, num_of_sim, workers_list, max_steps=1000,
+                   seed=0):
+    """
+    A function used to measure the throughput of the worker pool for
+    different numbers of workers
+
+    The pools are started and warmed up with the model before measuring
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    num_of_sim : int
+        the number of replicas
+    workers_list : list
+        the numbers of workers to be measured
+    max_steps : int, optional
+        the step budget of a replica (default is 1000)
+    seed : int, optional
+        the seed of the ensemble (default is 0)
+
+    Returns
+    -------
+    dict
+        the replicas per second keyed by the number of workers
+    """
+
+    seeds = [MembraneSystem.spawn_seed(seed, i) for i in range(num_of_sim)]
+    result = {}
+    for workers in workers_list:
+        with WorkerPool(workers) as pool:
+            pool.warm_up()
+            pool.run(json_dict, seeds[:workers], max_steps=0)
+            starting_time = time.perf_counter()
+            pool.run(json_dict, seeds, max_steps=max_steps)
+            elapsed = time.perf_counter() - starting_time
+        result[str(workers)] = num_of_sim / elapsed
+    return result
+
+
+def run_case(name, params, num_of_sim=20, workers_list=(1,), max_steps=1000,
+             seed=0, min_time=0.2):
+    """
+    A function used to run every measurement on a generated model
+
+    Parameters
+    ----------
+    name : str
+        the name of the generator in `GENERATORS`
+    params : dict
+        the parameters of the generator
+
+    Returns
+    -------
+    dict
+        the results of the measurements
+    """
+
+    model = GENERATORS[name](**params)
+    json_dict = model.create_json_dict()
+    result = {"params": params, "regions": len(model.regions)}
+    result.update(bench_steps(model, max_steps, seed))
+    result["copies_per_second"] = repeat(
+        lambda: model.__class__.copy_system(model), min_time)
+    result["loads_per_second"] = repeat(lambda: model_from_dict(json_dict),
+                                        min_time)
+    if num_of_sim and workers_list:
+        result["replicas_per_second"] = bench_replicas(
+            json_dict, num_of_sim, workers_list, max_steps, seed)
+    return result
+
+
+def get_commit():
+    """
+    A function used to return the current git commit of the repository
+
+    Returns
+    -------
+    str
+        the hash of the commit (None if it cannot be determined)
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_max_rss():
+    """
+    A function used to return the peak resident memory of the process
+
+    Returns
+    -------
+    int
+        the peak resident set size in bytes (None if it is not available)
+    """
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def compare(old, new):
+    """
+    A function used to create the comparison of two benchmark results
+
+    Parameters
+    ----------
+    old : dict
+        the earlier results
+    new : dict
+        the later results
+
+    Returns
+    -------
+    list
+        the lines of the comparison table
+    """
+
+    lines = [f'{"case":<22}{"metric":<22}{"old":>12}{"new":>12}{"ratio":>8}']
+    for name, case in new["cases"].items():
+        old_case = old["cases"].get(name)
+        if old_case is None:
+            continue
+        for metric in METRICS:
+            if metric in case and old_case.get(metric):
+                lines.append(f'{name:<22}{metric:<22}{old_case[metric]:>12.1f}'
+                             f'{case[metric]:>12.1f}'
+                             f'{case[metric] / old_case[metric]:>8.2f}')
+    return lines
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the benchmark runner
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measures the simulation on synthetic membrane systems")
+    parser.add_argument("-c", "--cases", nargs='+', choices=list(CASES),
+                        default=list(CASES), help="the cases to be measured")
+    parser.add_argument("-n", "--num-of-sim", type=int, default=20,
+                        help="the number of replicas per worker measurement "
+                             "(0 skips the worker measurements)")
+    parser.add_argument("-w", "--workers", type=int, nargs='+', default=[1],
+                        help="the numbers of workers to be measured")
+    parser.add_argument("-m", "--max-steps", type=int, default=1000,
+                        help="the step budget of a computation")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="the seed of the computations")
+    parser.add_argument("-t", "--min-time", type=float, default=0.2,
+                        help="the minimal time of a throughput measurement")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the JSON file of the results")
+    parser.add_argument("--compare", default=None,
+                        help="an earlier JSON file to compare the results to")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the benchmark runner
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    args = create_parser().parse_args(argv)
+    results = {"commit": get_commit(), "python": platform.python_version(),
+               "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+               "cases": {}}
+    for name in args.cases:
+        case = run_case(name, CASES[name], args.num_of_sim, args.workers,
+                        args.max_steps, args.seed, args.min_time)
+        results["cases"][name] = case
+        print(f'{name:<22}{case["steps"]:>6} steps '
+              f'{case["steps_per_second"]:>10.1f} steps/s '
+              f'{case["peak_memory"] / 1024:>10.1f} KiB peak', flush=True)
+    results["max_rss"] = get_max_rss()
+
+    if args.output is not None:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+    if args.compare is not None:
+        with open(args.compare, 'r') as old_file:
+            print('\n'.join(compare(json.load(old_file), results)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'model'))
+from BaseModel import BaseModel
+from SymportAntiport import SymportAntiport
+from MultiSet import MultiSet
+
+LETTERS = 'bcdefghijklmnopqrstuvwxyz'
+
+
+def _add_rules(model, region_id, rules):
+    """
+    A function used to parse and add a list of rules to a region
+    """
+
+    for rule in rules:
+        model.regions[region_id].add_rule(model.parse_rule(rule))
+
+
+def deep_chain(depth=30, multiplicity=200):
+    """
+    A function used to generate a base model with a chain of nested regions
+
+    The objects of the skin travel to the innermost region one level per step
+
+    Parameters
+    ----------
+    depth : int, optional
+        the number of regions (default is 30)
+    multiplicity : int, optional
+        the multiplicity of the objects in the skin (default is 200)
+
+    Returns
+    -------
+    BaseModel
+        the generated model
+    """
+
+    model = BaseModel.create_model_from_str('[' * depth + ']' * depth)
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': multiplicity})
+    for r_id in range(root_id, root_id + depth - 1):
+        _add_rules(model, r_id, ["a -> IN: a OUT: HERE: "])
+    _add_rules(model, root_id + depth - 1, ["a -> IN: OUT: HERE: b"])
+    return model
+
+
+def wide_tree(width=50, multiplicity=1000):
+    """
+    A function used to generate a base model with a skin having many children
+
+    The skin sends its objects to randomly chosen children, which send them
+    back transformed
+
+    Parameters
+    ----------
+    width : int, optional
+        the number of children of the skin (default is 50)
+    multiplicity : int, optional
+        the multiplicity of the objects in the skin (default is 1000)
+
+    Returns
+    -------
+    BaseModel
+        the generated model
+    """
+
+    model = BaseModel.create_model_from_str('[' + '[]' * width + ']')
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': multiplicity})
+    _add_rules(model, root_id, ["a -> IN: a OUT: HERE: "])
+    for r_id in range(root_id + 1, root_id + width + 1):
+        _add_rules(model, r_id, ["a -> IN: OUT: b HERE: "])
+    return model
+
+
+def many_rules(num_of_rules=100, multiplicity=1000):
+    """
+    A function used to generate a base model with a single region having
+    many competing rules
+
+    Rule `i` consumes `i % 10 + 1` copies of the same object, so many rules
+    fail the applicability check near the end of the step
+
+    Parameters
+    ----------
+    num_of_rules : int, optional
+        the number of rules (default is 100)
+    multiplicity : int, optional
+        the multiplicity of the objects in the region (default is 1000)
+
+    Returns
+    -------
+    BaseModel
+        the generated model
+    """
+
+    model = BaseModel.create_model_from_str('[]')
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': multiplicity})
+    _add_rules(model, root_id,
+               ['a' * (i % 10 + 1) + ' -> IN: OUT: HERE: ' +
+                LETTERS[i % len(LETTERS)] for i in range(num_of_rules)])
+    return model
+
+
+def huge_multiplicity(multiplicity=2000):
+    """
+    A function used to generate a base model whose region contains an object
+    with a large multiplicity
+
+    Parameters
+    ----------
+    multiplicity : int, optional
+        the multiplicity of the object (default is 2000)
+
+    Returns
+    -------
+    BaseModel
+        the generated model
+    """
+
+    model = BaseModel.create_model_from_str('[[]]')
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': multiplicity})
+    _add_rules(model, root_id, ["aa -> IN: b OUT: HERE: c"])
+    _add_rules(model, root_id + 1, ["b -> IN: OUT: d HERE: "])
+    return model
+
+
+def dissolution_heavy(depth=30, multiplicity=10):
+    """
+    A function used to generate a base model in which every region except the
+    skin dissolves
+
+    Parameters
+    ----------
+    depth : int, optional
+        the number of regions (default is 30)
+    multiplicity : int, optional
+        the multiplicity of the objects in every region (default is 10)
+
+    Returns
+    -------
+    BaseModel
+        the generated model
+    """
+
+    model = BaseModel.create_model_from_str('[' * depth + ']' * depth)
+    root_id = model.get_root_id()
+    for r_id in range(root_id, root_id + depth):
+        model.regions[r_id].objects = MultiSet({'a': multiplicity})
+    _add_rules(model, root_id, ["a -> IN: OUT: b HERE: "])
+    for r_id in range(root_id + 1, root_id + depth):
+        _add_rules(model, r_id, ["a -># IN: OUT: HERE: c"])
+    return model
+
+
+def symport_contention(width=20, multiplicity=500):
+    """
+    A function used to generate a symport/antiport system whose regions
+    compete for the objects of the skin
+
+    Parameters
+    ----------
+    width : int, optional
+        the number of children of the skin (default is 20)
+    multiplicity : int, optional
+        the multiplicity of the objects in the skin (default is 500)
+
+    Returns
+    -------
+    SymportAntiport
+        the generated model
+    """
+
+    model = SymportAntiport.create_model_from_str(
+        '[[#]' + '[]' * (width - 1) + ']')
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': multiplicity,
+                                               'b': multiplicity})
+    _add_rules(model, root_id, ["OUT: b"])
+    for r_id in range(root_id + 1, root_id + width + 1):
+        _add_rules(model, r_id, ["IN: a", "IN: ab"])
+    return model
+
+
+GENERATORS = {
+    "deep_chain": deep_chain,
+    "wide_tree": wide_tree,
+    "many_rules": many_rules,
+    "huge_multiplicity": huge_multiplicity,
+    "dissolution_heavy": dissolution_heavy,
+    "symport_contention": symport_contention
+}
+"""The generators of the synthetic membrane systems keyed by their names"""
@@ -0,0 +1,158 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'model'))
+from Benchmark import get_max_rss
+from BaseModel import BaseModel
+
+SIZES = [1000, 10000, 100000]
+"""The default numbers of regions of the measured models"""
+
+
+def build_model(num_of_regions):
+    """
+    A function used to build a base model with a skin and `num_of_regions - 1`
+    children, each having an object and the same rule (as the loaded models
+    share their equal rules)
+
+    Parameters
+    ----------
+    num_of_regions : int
+        the number of regions
+
+    Returns
+    -------
+    BaseModel
+        the built model
+    """
+
+    model = BaseModel.create_model_from_str(
+        '[' + '[a]' * (num_of_regions - 1) + ']')
+    rule = BaseModel.parse_rule("a -> IN: OUT: b HERE: ")
+    for r_id, region in model.regions.items():
+        if r_id != model.get_root_id():
+            region.add_rule(rule)
+    return model
+
+
+def measure(num_of_regions, traced):
+    """
+    A function used to measure the memory used by a model, it is run in a
+    fresh process, so the peak resident memory only contains the model
+
+    Parameters
+    ----------
+    num_of_regions : int
+        the number of regions
+    traced : bool
+        if True, the allocations are traced, otherwise the peak resident
+        memory is measured
+
+    Returns
+    -------
+    dict
+        the measured bytes and the time of building the model
+    """
+
+    if traced:
+        tracemalloc.start()
+        model = build_model(num_of_regions)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"traced": current, "regions": len(model.regions)}
+    before = get_max_rss()
+    starting_time = time.perf_counter()
+    model = build_model(num_of_regions)
+    elapsed = time.perf_counter() - starting_time
+    after = get_max_rss()
+    return {"rss": None if before is None else after - before,
+            "build_time": elapsed, "regions": len(model.regions)}
+
+
+def run_case(num_of_regions):
+    """
+    A function used to measure a model size in separate processes
+
+    Parameters
+    ----------
+    num_of_regions : int
+        the number of regions
+
+    Returns
+    -------
+    dict
+        the traced and the resident bytes per region and the build time
+    """
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        traced = pool.apply(measure, (num_of_regions, True))
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        resident = pool.apply(measure, (num_of_regions, False))
+    rss = resident["rss"]
+    return {"regions": num_of_regions,
+            "traced_per_region": traced["traced"] / num_of_regions,
+            "rss_per_region": None if rss is None else rss / num_of_regions,
+            "build_time": resident["build_time"]}
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the benchmark runner
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measures the memory used per region by large membrane "
+                    "systems")
+    parser.add_argument("-r", "--regions", type=int, nargs='+',
+                        default=SIZES, help="the numbers of regions")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the JSON file of the results")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the memory benchmark
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    args = create_parser().parse_args(argv)
+    results = []
+    for num_of_regions in args.regions:
+        case = run_case(num_of_regions)
+        results.append(case)
+        rss = case["rss_per_region"]
+        print(f'{num_of_regions:>10} regions '
+              f'{case["traced_per_region"]:>10.0f} B/region traced '
+              f'{"n/a" if rss is None else f"{rss:.0f}":>10} B/region '
+              f'resident {case["build_time"]:>8.2f} s', flush=True)
+
+    if args.output is not None:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
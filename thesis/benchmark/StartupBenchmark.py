@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+VIEW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                        'view')
+"""The folder of the application, the started processes run in it"""
+
+DEFERRED = ("json", "multiprocessing", "concurrent.futures", "sqlite3",
+            "BaseModel", "SymportAntiport", "WorkerPool", "StepTrace",
+            "StateSpace", "RuleAnalysis", "StructureDialog", "HelpMenu",
+            "ResultDialog", "PlaybackWidget", "ProfilerPanel", "resources")
+"""The modules that are expected to be loaded only after the first window"""
+
+FIRST_WINDOW = """
+import sys
+import time
+from PySide6.QtWidgets import QApplication
+import MainWindow
+imported = time.time()
+app = QApplication([])
+window = MainWindow.MainWindow()
+window.show()
+app.processEvents()
+shown = time.time()
+modules = sorted(sys.modules)
+import json
+print(json.dumps({"imported": imported, "shown": shown, "modules": modules}))
+"""
+"""The script measuring the time of the first window of the application"""
+
+
+def parse_importtime(output):
+    """
+    A function used to parse the report printed by `python -X importtime`
+
+    Parameters
+    ----------
+    output : str
+        the standard error of the process
+
+    Returns
+    -------
+    list
+        the (module, self time, cumulative time, depth) tuples of the
+        imports, the times are in seconds and the depth of the top level
+        imports is 0
+    """
+
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split('|')
+        if not self_time.strip().isdigit():
+            continue
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped, int(self_time) / 1e6,
+                        int(cumulative) / 1e6, depth))
+    return imports
+
+
+def measure_startup(platform="offscreen"):
+    """
+    A function used to start the application in a fresh process and to
+    measure the time until its first window is shown
+
+    Parameters
+    ----------
+    platform : str, optional
+        the Qt platform plugin (default is "offscreen", None keeps the
+        environment's setting)
+
+    Returns
+    -------
+    dict
+        the time of the first window and of the imports measured from the
+        start of the process, the parsed import times and the deferred
+        modules that were loaded before the first window
+    """
+
+    env = dict(os.environ)
+    if platform is not None:
+        env["QT_QPA_PLATFORM"] = platform
+    starting_time = time.time()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_WINDOW],
+        cwd=VIEW_DIR, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(process.stdout.splitlines()[-1])
+    modules = set(report["modules"])
+    return {"first_window": report["shown"] - starting_time,
+            "imports": report["imported"] - starting_time,
+            "import_times": parse_importtime(process.stderr),
+            "loaded_deferred": [name for name in DEFERRED
+                                if name in modules]}
+
+
+def run(num_of_runs, platform="offscreen", top=10):
+    """
+    A function used to measure the start of the application several times
+
+    Parameters
+    ----------
+    num_of_runs : int
+        the number of started processes
+    platform : str, optional
+        the Qt platform plugin (default is "offscreen")
+    top : int, optional
+        the number of the slowest modules reported (default is 10)
+
+    Returns
+    -------
+    dict
+        the median times of the first window and of the imports, the
+        slowest modules of the last run by their own import time and the
+        deferred modules loaded before the first window
+    """
+
+    runs = [measure_startup(platform) for _ in range(num_of_runs)]
+    slowest = sorted(runs[-1]["import_times"], key=lambda imp: imp[1],
+                     reverse=True)[:top]
+    return {"first_window": statistics.median(
+                run["first_window"] for run in runs),
+            "imports": statistics.median(run["imports"] for run in runs),
+            "slowest": [{"module": name, "self": self_time,
+                         "cumulative": cumulative}
+                        for name, self_time, cumulative, _ in slowest],
+            "loaded_deferred": sorted(set().union(
+                *(run["loaded_deferred"] for run in runs)))}
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the benchmark runner
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measures the time until the first window of the "
+                    "application is shown")
+    parser.add_argument("-n", "--num-of-runs", type=int, default=5,
+                        help="the number of started processes")
+    parser.add_argument("-p", "--platform", default="offscreen",
+                        help="the Qt platform plugin")
+    parser.add_argument("-t", "--top", type=int, default=10,
+                        help="the number of the slowest modules reported")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the JSON file of the results")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the startup benchmark
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program (1 if a deferred module was loaded
+        before the first window)
+    """
+
+    args = create_parser().parse_args(argv)
+    results = run(args.num_of_runs, args.platform, args.top)
+    print(f'first window {results["first_window"] * 1000:>8.1f} ms')
+    print(f'imports      {results["imports"] * 1000:>8.1f} ms')
+    for module in results["slowest"]:
+        print(f'{module["module"]:<48}{module["self"] * 1000:>8.1f} ms '
+              f'{module["cumulative"] * 1000:>8.1f} ms cumulative')
+    if results["loaded_deferred"]:
+        print('loaded before the first window: ' +
+              ', '.join(results["loaded_deferred"]))
+
+    if args.output is not None:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+    return 1 if results["loaded_deferred"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'model'))
+from Generators import GENERATORS
+from MembraneSystem import MembraneSystem
+
+CASES = {
+    "many_rules": {"num_of_rules": 20, "multiplicity": 10000},
+    "huge_multiplicity": {"multiplicity": 10000},
+    "symport_contention": {"width": 5, "multiplicity": 2000}
+}
+"""The default parameters of the generators compared by the benchmark"""
+
+
+def run_replicas(model, num_of_sim, num_of_steps, seed=0, epsilon=None):
+    """
+    A function used to simulate copies of a model for a number of steps
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model to be simulated (left unchanged)
+    num_of_sim : int
+        the number of copies
+    num_of_steps : int
+        the number of steps of a copy
+    seed : int, optional
+        the seed of the ensemble (default is 0)
+    epsilon : float, optional
+        the error tolerance of tau-leaping, None uses the exact stepping
+        (default is None)
+
+    Returns
+    -------
+    tuple
+        the list of the {(region_id, object): multiplicity} states of the
+        copies and the elapsed time in seconds
+    """
+
+    states = []
+    starting_time = time.perf_counter()
+    for i in range(num_of_sim):
+        model_copy = model.__class__.copy_system(model)
+        model_copy.seed(MembraneSystem.spawn_seed(seed, i))
+        if epsilon is not None:
+            model_copy.enable_tau_leaping(epsilon)
+        for _ in range(num_of_steps):
+            if not model_copy.any_rule_applicable():
+                break
+            model_copy.simulate_step()
+        states.append({(r_id, obj): mul for r_id, objects in
+                       model_copy.get_state().items() for obj, mul in
+                       objects.items()})
+    return states, time.perf_counter() - starting_time
+
+
+def ks_statistic(first, second):
+    """
+    A function used to calculate the two-sample Kolmogorov-Smirnov statistic
+
+    Parameters
+    ----------
+    first : list
+        the first sample
+    second : list
+        the second sample
+
+    Returns
+    -------
+    float
+        the largest difference of the empirical distribution functions
+    """
+
+    first, second = sorted(first), sorted(second)
+    i = j = 0
+    result = 0.0
+    while i < len(first) and j < len(second):
+        value = min(first[i], second[j])
+        while i < len(first) and first[i] == value:
+            i += 1
+        while j < len(second) and second[j] == value:
+            j += 1
+        result = max(result, abs(i / len(first) - j / len(second)))
+    return result
+
+
+def compare_states(exact, approximate):
+    """
+    A function used to compare the distributions of the multiplicities of the
+    objects in two ensembles
+
+    Parameters
+    ----------
+    exact : list
+        the states of the exact ensemble
+    approximate : list
+        the states of the approximate ensemble
+
+    Returns
+    -------
+    dict
+        the means, the standard deviations and the Kolmogorov-Smirnov
+        statistic of the multiplicities keyed by "region_id:object"
+    """
+
+    keys = sorted(set().union(*exact, *approximate))
+    result = {}
+    for key in keys:
+        first = [state.get(key, 0) for state in exact]
+        second = [state.get(key, 0) for state in approximate]
+        result[f'{key[0]}:{key[1]}'] = {
+            "exact_mean": statistics.fmean(first),
+            "tau_mean": statistics.fmean(second),
+            "exact_stdev": statistics.pstdev(first),
+            "tau_stdev": statistics.pstdev(second),
+            "ks": ks_statistic(first, second)
+        }
+    return result
+
+
+def run_case(name, params, num_of_sim=20, num_of_steps=1, seed=0,
+             epsilon=0.03):
+    """
+    A function used to compare the exact and the approximate stepping on a
+    generated model
+
+    Parameters
+    ----------
+    name : str
+        the name of the generator in `GENERATORS`
+    params : dict
+        the parameters of the generator
+
+    Returns
+    -------
+    dict
+        the times, the speedup and the comparison of the outcomes
+    """
+
+    model = GENERATORS[name](**params)
+    exact, exact_time = run_replicas(model, num_of_sim, num_of_steps, seed)
+    approximate, tau_time = run_replicas(model, num_of_sim, num_of_steps,
+                                         seed + 1, epsilon)
+    objects = compare_states(exact, approximate)
+    return {"params": params, "epsilon": epsilon, "exact_time": exact_time,
+            "tau_time": tau_time,
+            "speedup": exact_time / tau_time if tau_time else 0.0,
+            "max_ks": max((o["ks"] for o in objects.values()), default=0.0),
+            "objects": objects}
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the benchmark runner
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Compares tau-leaping to the exact stepping on synthetic "
+                    "membrane systems")
+    parser.add_argument("-c", "--cases", nargs='+', choices=list(CASES),
+                        default=list(CASES), help="the cases to be measured")
+    parser.add_argument("-n", "--num-of-sim", type=int, default=20,
+                        help="the number of replicas of both engines")
+    parser.add_argument("-k", "--steps", type=int, default=1,
+                        help="the number of steps of a replica")
+    parser.add_argument("-e", "--epsilon", type=float, default=0.03,
+                        help="the error tolerance of tau-leaping")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="the seed of the replicas")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the JSON file of the results")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the tau-leaping benchmark
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    args = create_parser().parse_args(argv)
+    results = {}
+    for name in args.cases:
+        case = run_case(name, CASES[name], args.num_of_sim, args.steps,
+                        args.seed, args.epsilon)
+        results[name] = case
+        print(f'{name:<22}{case["exact_time"]:>10.2f} s exact '
+              f'{case["tau_time"]:>10.2f} s tau '
+              f'{case["speedup"]:>8.1f}x  max KS {case["max_ks"]:.3f}',
+              flush=True)
+
+    if args.output is not None:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
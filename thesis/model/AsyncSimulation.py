@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from MembraneSystem import MembraneSystem
+from WorkerPool import simulate_replica, run_replica
+
+MAX_PENDING = 64
+"""The default number of replicas submitted to the executor at once"""
+
+
+async def simulate_async(model, seed=None, max_steps=None, time_limit=None,
+                         halt_when=None, executor=None):
+    """
+    A coroutine used to run a computation of a membrane system in an
+    executor, without blocking the event loop
+
+    The model is simulated in place, like by `simulate_computation()`, so the
+    executor has to run its tasks in threads of this process (the default
+    executor of the loop is used if `executor` is None). If the awaiting task
+    is cancelled, the computation is stopped before its next step, and the
+    cancellation is raised once it has stopped.
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model to be simulated
+    seed : int, optional
+        the seed of the random number generator (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps (default is None)
+    time_limit : float, optional
+        the upper limit on the time of the computation in seconds
+        (default is None)
+    halt_when : HaltingCondition, optional
+        the condition that ends the computation early (default is None)
+    executor : concurrent.futures.Executor, optional
+        the executor running the computation (default is None)
+
+    Returns
+    -------
+    tuple
+        the tuple of `simulate_replica()`
+    """
+
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+    future = loop.run_in_executor(executor, simulate_replica, model, seed,
+                                  max_steps, time_limit, False, halt_when,
+                                  cancelled)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancelled.set()
+        await asyncio.wait([future])
+        raise
+
+
+def _simulate_copy(model, seed, max_steps, time_limit, halt_when, cancelled):
+    """
+    The task of the thread executors, runs a computation of a copy of the
+    model
+
+    Returns
+    -------
+    tuple
+        the tuple of `simulate_replica()`
+    """
+
+    return simulate_replica(model.__class__.copy_system(model), seed,
+                            max_steps, time_limit, False, halt_when,
+                            cancelled)
+
+
+async def iter_ensemble(model, num_of_sim=100, seed=None, max_steps=None,
+                        time_limit=None, halt_when=None, executor=None,
+                        max_pending=MAX_PENDING):
+    """
+    An asynchronous generator used to run computations of copies of a
+    membrane system in an executor, yielding their results as they finish
+
+    A thread executor (or the default executor of the loop) simulates copies
+    of the model, a `ProcessPoolExecutor` receives the saved model and
+    `halt_when` has to be picklable. At most `max_pending` replicas are
+    submitted at once. When the generator is closed or the consuming task is
+    cancelled, the replicas not started yet are cancelled, and the running
+    ones stop before their next step (the ones running in other processes
+    only stop at their limits).
+
+    Replica `i` is seeded with `MembraneSystem.spawn_seed(seed, i)` if `seed`
+    is given, so the results do not depend on the scheduling.
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model whose copies are simulated, it is not modified
+    num_of_sim : int, optional
+        the number of computations (default is 100)
+    seed : int, optional
+        the seed of the ensemble (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps (default is None)
+    time_limit : float, optional
+        the upper limit on the time of a computation in seconds
+        (default is None)
+    halt_when : HaltingCondition, optional
+        the condition that ends the computations early (default is None)
+    executor : concurrent.futures.Executor, optional
+        the executor running the computations (default is None)
+    max_pending : int, optional
+        the number of replicas submitted at once (default is `MAX_PENDING`)
+
+    Yields
+    ------
+    tuple
+        the index of the replica and the tuple of `simulate_replica()`
+    """
+
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+    json_dict = model.create_json_dict() if isinstance(
+        executor, ProcessPoolExecutor) else None
+
+    def submit(index):
+        replica_seed = None if seed is None else \
+            MembraneSystem.spawn_seed(seed, index)
+        if json_dict is not None:
+            return loop.run_in_executor(executor, run_replica, json_dict,
+                                        replica_seed, max_steps, time_limit,
+                                        False, halt_when)
+        return loop.run_in_executor(executor, _simulate_copy, model,
+                                    replica_seed, max_steps, time_limit,
+                                    halt_when, cancelled)
+
+    pending = {}
+    next_index = 0
+    try:
+        while next_index < num_of_sim or pending:
+            while next_index < num_of_sim and len(pending) < max_pending:
+                pending[submit(next_index)] = next_index
+                next_index += 1
+            done, _ = await asyncio.wait(pending,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for index, future in sorted((pending.pop(future), future)
+                                        for future in done):
+                yield index, future.result()
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
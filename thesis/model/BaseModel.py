@@ -1,5 +1,4 @@
 import copy
-import random
 import re
 from MembraneSystem import MembraneSystem
 from Rule import (
@@ -13,6 +12,8 @@ from MultiSet import MultiSet
 from MembraneSystem import InvalidArgumentException
 from MembraneStructure import Node, MembraneStructure
 from Region import Region
+from TauLeaping import multinomial
+from RuleSampler import RuleSampler
 
 
 class BaseModel(MembraneSystem):
@@ -57,10 +58,9 @@ class BaseModel(MembraneSystem):
         """
 
         if isinstance(rule, PriorityRule):
-            if self.is_applicable(rule.strong_rule, region):
-                rule = rule.strong_rule
-            else:
-                rule = rule.weak_rule
+            rule = self.resolve_priority(rule, region) or rule.levels[-1][0]
+        if self.touched is not None or self.dirty_regions is not None:
+            self.touch(region)
 
         region.objects -= rule.left_side
 
@@ -78,6 +78,153 @@ class BaseModel(MembraneSystem):
         if isinstance(rule, DissolvingRule):
             region.is_dissolving = True
 
+    def apply_many(self, rule, region, count):
+        """
+        A function that overrides the base class's `apply_many`
+
+        The objects sent inwards are distributed uniformly among the children,
+        like by `count` calls of `apply`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule that is to be applied
+        region : Region
+            the region on which the rule is to be applied
+        count : int
+            the number of applications
+        """
+
+        if isinstance(rule, PriorityRule):
+            rule = self.resolve_priority(rule, region) or rule.levels[-1][0]
+        if self.touched is not None or self.dirty_regions is not None:
+            self.touch(region)
+
+        # updated in place, the change is signalled when the new objects are
+        # merged at the end of the step
+        objects = region.objects
+        objects -= rule.left_side * count
+        self.changed_regions.add(region.id)
+
+        for (obj, direction), mul in rule.right_side:
+            if direction == Direction.HERE:
+                region.new_objects.add_object(obj, mul * count)
+            elif direction == Direction.OUT:
+                if self.tree.get_root_id() == region.id:
+                    self.environment.add_object(obj, mul * count)
+                else:
+                    self.get_parent_region(region).new_objects.add_object(
+                        obj, mul * count)
+            elif direction == Direction.IN:
+                children = self.get_all_children(region)
+                for child, child_count in zip(children, multinomial(
+                        self.rng, count, len(children))):
+                    if child_count:
+                        child.new_objects.add_object(obj, mul * child_count)
+        if isinstance(rule, DissolvingRule):
+            region.is_dissolving = True
+
+    def get_consumption(self, rule, region):
+        """
+        A function that overrides the base class's `get_consumption`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule that is to be applied
+        region : Region
+            the region on which the rule is to be applied
+
+        Returns
+        -------
+        list
+            the (multiset, consumed multiset) pairs of the rule
+        """
+
+        if isinstance(rule, PriorityRule):
+            rule = self.resolve_priority(rule, region) or rule.levels[-1][0]
+        return [(region.objects, rule.left_side)]
+
+    def get_production(self, rule, region):
+        """
+        A function that overrides the base class's `get_production`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule that is to be applied
+        region : Region
+            the region on which the rule is to be applied
+
+        Returns
+        -------
+        list
+            the (multiset, produced multiset) pairs of the rule, or None if
+            the rule sends objects inwards to one of multiple children
+        """
+
+        if isinstance(rule, PriorityRule):
+            rule = self.resolve_priority(rule, region) or rule.levels[-1][0]
+
+        targets = {}
+        for (obj, direction), mul in rule.right_side:
+            if direction == Direction.HERE:
+                target = region.objects
+            elif direction == Direction.OUT:
+                if self.tree.get_root_id() == region.id:
+                    target = self.environment
+                else:
+                    target = self.get_parent_region(region).objects
+            else:
+                children = self.get_all_children(region)
+                if len(children) != 1:
+                    return None
+                target = children[0].objects
+            targets.setdefault(id(target), (target, MultiSet()))[1].add_object(
+                obj, mul)
+        return list(targets.values())
+
+    def resolve_priority(self, rule, region):
+        """
+        A function used to find the strongest applicable level of a priority
+        rule
+
+        The levels are tested in a single pass over the compiled left sides,
+        and the children of the region are only counted once, if a level
+        sends objects inwards
+
+        Parameters
+        ----------
+        rule : PriorityRule
+            the priority rule
+        region : Region
+            the region that the rule acts on
+
+        Returns
+        -------
+        Union[BaseModelRule,DissolvingRule]
+            the rule of the strongest applicable level, or None if none of
+            the levels can be applied
+        """
+
+        objects = region.objects.objects
+        is_skin = self.tree.get_root_id() == region.id
+        has_children = None
+        for level, needs, sends_in, dissolving in rule.levels:
+            if dissolving and is_skin:
+                continue
+            if sends_in:
+                if has_children is None:
+                    has_children = self.get_num_of_children(region) > 0
+                if not has_children:
+                    continue
+            for obj, mul in needs:
+                if objects.get(obj, 0) < mul:
+                    break
+            else:
+                return level
+        return None
+
     def is_applicable(self, rule, region):
         """
         A function to check whether a rule can applied to a region
@@ -96,9 +243,7 @@ class BaseModel(MembraneSystem):
         """
 
         if isinstance(rule, PriorityRule):
-            return self.is_applicable(rule.strong_rule,
-                                      region) or self.is_applicable(
-                rule.weak_rule, region)
+            return self.resolve_priority(rule, region) is not None
         elif isinstance(rule, BaseModelRule) or isinstance(rule,
                                                            DissolvingRule):
             if self.tree.get_root_id() == region.id and isinstance(rule,
@@ -111,7 +256,7 @@ class BaseModel(MembraneSystem):
                 else:
                     return region.objects.has_subset(rule.left_side)
 
-    def simulate_step(self):
+    def simulate_step(self, return_delta=False):
         """
         A function to simulate a single evolution step in the membrane system
 
@@ -121,25 +266,101 @@ class BaseModel(MembraneSystem):
         Increases the `step_counter` variable by 1
 
         Emits `region_dissolved(int)` and `sim_step_over`
+
+        Parameters
+        ----------
+        return_delta : bool, optional
+            if True, the changes caused by the step are returned even if the
+            history is disabled (default is False)
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step (None if neither `return_delta` nor
+            the history is enabled)
         """
 
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_step()
         if not self.any_rule_applicable():
             self.signal.sim_over.emit([self.get_result()])
             return
+        if profiler is not None:
+            profiler.lap("applicability")
+        before = self.begin_delta() if self.is_capturing_delta(
+            return_delta) else None
+        if profiler is not None:
+            profiler.lap("history")
         for region in self.regions.values():
             self.select_and_apply_rules(region)
-        dissolving_regions = []
-        for region in self.regions.values():
-            region.objects += region.new_objects
-            region.new_objects = MultiSet()
-            if region.is_dissolving:
-                dissolving_regions.append(region)
+        if profiler is not None:
+            profiler.lap("rules")
+        dissolving_regions = self.merge_new_objects()
+        if profiler is not None:
+            profiler.lap("merge")
+        dissolution_records = []
         for region in dissolving_regions:
             self.signal.region_dissolved.emit(region.id)
+            if before is not None:
+                dissolution_records.append(
+                    self.get_dissolution_record(region))
             self.dissolve_region(region)
+        if profiler is not None:
+            profiler.lap("dissolution")
 
         self.step_counter += 1
+        delta = None if before is None else self.finish_delta(
+            before, dissolution_records)
+        if profiler is not None:
+            profiler.lap("history")
         self.signal.sim_step_over.emit(self.step_counter)
+        if profiler is not None:
+            profiler.lap("signals")
+            profiler.end_step(self)
+        return delta
+
+    def merge_new_objects(self):
+        """
+        A function used to add the objects produced in the step to the objects
+        of the regions
+
+        Returns
+        -------
+        list
+            the regions marked for dissolution, in the order of the regions
+        """
+
+        dissolving_regions = []
+        changed = self.changed_regions
+        tracking = self.touched is not None or \
+            self.dirty_regions is not None
+        for region in self.regions.values():
+            if tracking and region.new_objects.objects:
+                self.touch(region)
+            if region.merge_new_objects() or region.id in changed:
+                region.emit_objects()
+            if region.is_dissolving:
+                dissolving_regions.append(region)
+        changed.clear()
+        return dissolving_regions
+
+    def get_selection_groups(self):
+        """
+        A function used to return the groups of the rules that are selected
+        together in a step
+
+        In the base model the rules are selected region by region, in the
+        order of the regions
+
+        Returns
+        -------
+        list
+            the lists of (rule, region) pairs
+        """
+
+        return [[(rule, region) for rule in region.rules] for region in
+                self.regions.values()]
 
     def get_result(self):
         """
@@ -181,10 +402,13 @@ class BaseModel(MembraneSystem):
         env = copy.deepcopy(ms.environment)
         structure_str = copy.deepcopy(ms.structure_str)
 
+        # the memo is shared, so the rules shared by regions stay shared
+        rule_memo = {}
         regions_dict = {k: [None, None] for k in ms.regions.keys()}
         for r_id, rule in ms.regions.items():
             regions_dict[r_id][0] = copy.deepcopy(ms.regions[r_id].objects.objects)
-            regions_dict[r_id][1] = copy.deepcopy(ms.regions[r_id].rules)
+            regions_dict[r_id][1] = copy.deepcopy(ms.regions[r_id].rules,
+                                                  rule_memo)
 
         regions = {r_id: Region(r_id, l[0], l[1]) for r_id, l in
                    regions_dict.items()}
@@ -207,7 +431,10 @@ class BaseModel(MembraneSystem):
             the region currently dissolving
         """
 
-        self.get_parent_region(region).objects += region.objects
+        parent = self.get_parent_region(region)
+        if self.dirty_regions is not None:
+            self.dirty_regions.update((region.id, parent.id))
+        parent.objects += region.objects
         self.tree.preorder(self.tree.skin, self.tree.remove_node,
                            lambda x: x.id == region.id)
         del self.regions[region.id]
@@ -225,13 +452,18 @@ class BaseModel(MembraneSystem):
             the region in which rules can be chosen and applied
         """
 
-        indices = list(range(len(region.rules)))
-        while indices:
-            idx = random.choice(indices)
-            if self.is_applicable(region.rules[idx], region):
-                self.apply(region.rules[idx], region)
+        if self.tau_leaper is not None:
+            self.tau_leaper.select(self, [(rule, region) for rule in
+                                          region.rules])
+            return
+        rules = region.rules
+        sampler = RuleSampler(len(rules))
+        while sampler:
+            idx = sampler.draw(self.rng)
+            if self.is_applicable(rules[idx], region):
+                self.apply(rules[idx], region)
             else:
-                indices.remove(idx)
+                sampler.remove(idx)
 
     @staticmethod
     def create_model_from_str(m_str):
@@ -268,7 +500,7 @@ class BaseModel(MembraneSystem):
                     regions[root_node.id] = Region(root_node.id)
                     current_node = root_node
                 else:
-                    new_node = Node()
+                    new_node = Node(current_node)
                     regions[new_node.id] = Region(new_node.id)
                     current_node.add_child(new_node)
                     current_node = new_node
@@ -302,7 +534,7 @@ class BaseModel(MembraneSystem):
 
         rule_str = rule_str.replace(" ", "")
         return re.match(
-            r'[a-z]+->(|#)(IN|in):[a-z]*(OUT|out):[a-z]*(HERE|here):[a-z]*(|>[a-z]+(|#)->(IN|in):[a-z]*(OUT|out):[a-z]*(HERE|here):)',
+            r'[a-z]+->(|#)(IN|in):[a-z]*(OUT|out):[a-z]*(HERE|here):[a-z]*(>[a-z]+(|#)->(IN|in):[a-z]*(OUT|out):[a-z]*(HERE|here):[a-z]*)*',
             rule_str)
 
     @classmethod
@@ -322,11 +554,13 @@ class BaseModel(MembraneSystem):
         """
 
         rule_str = rule_str.replace(" ", "")
-        if rule_str.count('>') == 3:
-            first = rule_str.index('>')
-            second = rule_str[first + 1:].index('>') + first + 1
-            return PriorityRule(BaseModel.parse_rule(rule_str[:second]),
-                                BaseModel.parse_rule(rule_str[second + 1:]))
+        # the priority signs are the '>' characters not following a '-'
+        levels = re.split(r'(?<!-)>', rule_str)
+        if len(levels) > 1:
+            rule = BaseModel.parse_rule(levels[-1])
+            for level in reversed(levels[:-1]):
+                rule = PriorityRule(BaseModel.parse_rule(level), rule)
+            return rule
         elif '#' in rule_str:
             left_side_end = rule_str.index('-')
             left_side = MultiSet.string_to_multiset(rule_str[:left_side_end])
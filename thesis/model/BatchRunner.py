@@ -0,0 +1,483 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from MembraneSystem import MembraneSystem, InvalidArgumentException
+from StateSpace import IncompleteExplorationException
+from HaltingCondition import HaltingCondition
+from Outcomes import OutcomeHistogram, decode_result
+from ResultCache import ResultCache
+from WorkerPool import WorkerPool, MODEL_TYPES, run_replica, model_from_dict
+from SharedEnsemble import run_shared
+
+BACKENDS = ("serial", "thread", "process", "shared")
+"""The available execution backends of the batch runner"""
+
+DEFAULT_TIME_LIMIT = 10
+"""The default time budget of a computation in seconds on the command line,
+the same as the one of `MembraneSystem.simulate_timed_computation()`"""
+
+
+def load_model_dict(path):
+    """
+    A function used to read a membrane system saved by `MembraneSystem.save`
+
+    Parameters
+    ----------
+    path : str
+        the path of the saved model
+
+    Returns
+    -------
+    dict
+        the JSON dictionary of the model
+
+    Raises
+    ------
+    InvalidArgumentException
+        if the file does not contain a supported membrane system
+    """
+
+    with open(path, 'r') as model_file:
+        json_dict = json.load(model_file)
+    if not isinstance(json_dict, dict) or \
+            json_dict.get("type") not in MODEL_TYPES:
+        raise InvalidArgumentException
+    return json_dict
+
+
+def prune_model_dict(json_dict):
+    """
+    A function used to remove the rules of a saved membrane system that can
+    never be applied (see `RuleAnalyzer`)
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+
+    Returns
+    -------
+    dict
+        the dictionary of the pruned model
+    """
+
+    model = model_from_dict(json_dict)
+    model.prune_dead_rules()
+    return model.create_json_dict()
+
+
+def outcome_key(result):
+    """
+    A function used to create the canonical string of a computation's result
+
+    Parameters
+    ----------
+    result : dict
+        the {object: multiplicity} pairs of the result
+
+    Returns
+    -------
+    str
+        the sorted `object:multiplicity` pairs separated by spaces
+    """
+
+    return ' '.join(f'{obj}:{mul}' for obj, mul in sorted(result.items()))
+
+
+def run_batch(json_dict, num_of_sim=100, backend="serial", workers=None,
+              seed=None, max_steps=None, time_limit=None, pool=None,
+              fast_forward=False, halt_when=None, cache=None):
+    """
+    A function used to run multiple computations of a saved membrane system
+    and to summarize their outcomes
+
+    Every replica has its own random number generator, replica `i` is seeded
+    with `MembraneSystem.spawn_seed(seed, i)`, so the outcomes are the same
+    for the same seed regardless of the backend and the number of workers.
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    num_of_sim : int, optional
+        the number of computations (default is 100)
+    backend : str, optional
+        one of `BACKENDS` (default is "serial")
+    workers : int, optional
+        the number of threads or processes (default is the number of CPUs)
+    seed : int, optional
+        the base seed of the replicas (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps of a replica (default is None)
+    time_limit : float, optional
+        the upper limit on the time of a replica in seconds (default is None)
+    pool : WorkerPool, optional
+        the pool used by the process backend, a temporary pool is created if
+        it is not given (default is None)
+    fast_forward : bool, optional
+        if True, the deterministic steps are jumped over (default is False)
+    halt_when : HaltingCondition, optional
+        the condition that ends the replicas early (default is None)
+    cache : ResultCache, optional
+        the cache of the outcome histograms, only used if `seed` is given
+        (see `ResultCache.extend()`): a cached histogram of the same ensemble
+        is returned without computing, and a smaller one is extended with the
+        missing replicas (default is None)
+
+    Returns
+    -------
+    dict
+        the outcome histogram and the timing statistics of the batch, the
+        statistics of the replicas include the cached ones
+    """
+
+    if backend not in BACKENDS:
+        raise InvalidArgumentException
+    wall_time = 0.0
+    new_steps = 0
+
+    def compute(first):
+        nonlocal workers, wall_time, new_steps
+        seeds = [None if seed is None else MembraneSystem.spawn_seed(seed, i)
+                 for i in range(first, num_of_sim)]
+        num_of_new = len(seeds)
+        args = ([json_dict] * num_of_new, seeds, [max_steps] * num_of_new,
+                [time_limit] * num_of_new, [fast_forward] * num_of_new,
+                [halt_when] * num_of_new)
+
+        starting_time = time.perf_counter()
+        if not num_of_new:
+            outcomes = OutcomeHistogram()
+        elif backend == "serial":
+            outcomes = OutcomeHistogram.from_replicas(map(run_replica, *args))
+        elif backend == "thread":
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) \
+                    as executor:
+                outcomes = OutcomeHistogram.from_replicas(
+                    executor.map(run_replica, *args))
+        elif backend == "shared":
+            outcomes = run_shared(json_dict, seeds, max_steps, time_limit,
+                                  fast_forward, halt_when, workers,
+                                  aggregate=True)
+        elif pool is not None:
+            outcomes = pool.run(json_dict, seeds, max_steps, time_limit,
+                                fast_forward, halt_when, aggregate=True)
+            workers = pool.workers
+        else:
+            with WorkerPool(workers) as new_pool:
+                outcomes = new_pool.run(json_dict, seeds, max_steps,
+                                        time_limit, fast_forward, halt_when,
+                                        aggregate=True)
+        wall_time = time.perf_counter() - starting_time
+        new_steps = outcomes.steps
+        return outcomes
+
+    key = None if cache is None else cache.make_key(
+        json_dict, seed, max_steps, fast_forward, halt_when)
+    if key is None:
+        outcomes, first = compute(0), 0
+    else:
+        outcomes, first = cache.extend(key, num_of_sim, compute,
+                                       bounded=time_limit is None)
+
+    histogram = {outcome_key(decode_result(key)): count for key, count in
+                 outcomes.counts.items()}
+    return {
+        "type": json_dict["type"],
+        "num_of_sim": num_of_sim,
+        "backend": backend,
+        "workers": 1 if backend == "serial" else workers or os.cpu_count(),
+        "seed": seed,
+        "max_steps": max_steps,
+        "halt_when": None if halt_when is None else str(halt_when),
+        "cached": first,
+        "halted": outcomes.halted,
+        "histogram": dict(sorted(histogram.items(),
+                                 key=lambda item: (-item[1], item[0]))),
+        "timing": {
+            "wall_time": wall_time,
+            "replica_min": outcomes.time_min if num_of_sim else 0.0,
+            "replica_mean": outcomes.time_sum / num_of_sim if num_of_sim
+            else 0.0,
+            "replica_median": outcomes.median_time(),
+            "replica_max": outcomes.time_max,
+            "steps_mean": outcomes.steps / num_of_sim if num_of_sim else 0.0,
+            "steps_per_second": new_steps / wall_time if wall_time
+            else 0.0
+        }
+    }
+
+
+def exact_outcomes(json_dict, max_states=None):
+    """
+    A function used to calculate the exact outcome distribution of a saved
+    membrane system by exploring its state space
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    max_states : int, optional
+        the upper limit on the number of explored configurations
+        (default is None)
+
+    Returns
+    -------
+    dict
+        the summary in the format of `run_batch()`, where the histogram
+        contains the probabilities of the outcomes, `probabilities` contains
+        them as exact fractions and `non_halting` is the probability of never
+        halting
+
+    Raises
+    ------
+    IncompleteExplorationException
+        if the state space has more than `max_states` configurations
+    """
+
+    starting_time = time.perf_counter()
+    model = model_from_dict(json_dict)
+    with model.explore_state_space(max_states=max_states) as result:
+        probabilities, loop_probabilities = result.outcome_probabilities()
+        num_of_states = result.num_of_states
+    wall_time = time.perf_counter() - starting_time
+
+    histogram = {outcome_key(dict(outcome)): probability for
+                 outcome, probability in probabilities.items()}
+    histogram = dict(sorted(histogram.items(),
+                            key=lambda item: (-item[1], item[0])))
+    return {
+        "type": json_dict["type"],
+        "num_of_sim": None,
+        "backend": "exact",
+        "workers": 1,
+        "seed": None,
+        "max_steps": None,
+        "halt_when": None,
+        "cached": None,
+        "halted": None,
+        "num_of_states": num_of_states,
+        "histogram": {key: float(p) for key, p in histogram.items()},
+        "probabilities": {key: str(p) for key, p in histogram.items()},
+        "non_halting": str(sum(loop_probabilities, 0)),
+        "timing": {"wall_time": wall_time}
+    }
+
+
+def write_json(summaries, path):
+    """
+    A function used to write the summaries of the batches into a JSON file
+
+    Parameters
+    ----------
+    summaries : dict
+        the summaries keyed by the paths of the models
+    path : str
+        the path of the output file
+    """
+
+    with open(path, 'w') as out_file:
+        json.dump(summaries, out_file, indent=2)
+
+
+def write_csv(summaries, path):
+    """
+    A function used to write the summaries of the batches into CSV files
+
+    The histograms are written to `path`, the timing statistics are written
+    next to it, with the `.timing.csv` suffix
+
+    Parameters
+    ----------
+    summaries : dict
+        the summaries keyed by the paths of the models
+    path : str
+        the path of the histogram file
+    """
+
+    with open(path, 'w', newline='') as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(["model", "outcome", "count", "frequency"])
+        for model_path, summary in summaries.items():
+            num_of_sim = summary["num_of_sim"]
+            for key, count in summary["histogram"].items():
+                writer.writerow([model_path, key, count,
+                                 count / num_of_sim if num_of_sim else count])
+
+    timing_path = os.path.splitext(path)[0] + '.timing.csv'
+    with open(timing_path, 'w', newline='') as out_file:
+        writer = csv.writer(out_file)
+        fields = ["num_of_sim", "backend", "workers", "seed", "max_steps",
+                  "halted"]
+        timing_fields = list(next(iter(summaries.values()))["timing"]) \
+            if summaries else []
+        writer.writerow(["model"] + fields + timing_fields)
+        for model_path, summary in summaries.items():
+            writer.writerow([model_path] + [summary[f] for f in fields] +
+                            [summary["timing"][f] for f in timing_fields])
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the batch runner
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Runs saved membrane systems without the graphical "
+                    "interface and summarizes their outcomes")
+    parser.add_argument("models", nargs='+',
+                        help="the model files saved by the application")
+    parser.add_argument("-n", "--num-of-sim", type=int, default=100,
+                        help="the number of computations per model")
+    parser.add_argument("-b", "--backend", choices=BACKENDS,
+                        default="process", help="the execution backend")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="the number of workers (default: CPU count)")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+                        help="the base seed of the replicas")
+    parser.add_argument("-m", "--max-steps", type=int, default=None,
+                        help="the step budget of a computation")
+    parser.add_argument("-t", "--time-limit", type=float,
+                        default=DEFAULT_TIME_LIMIT,
+                        help="the time budget of a computation in seconds "
+                             f"(default: {DEFAULT_TIME_LIMIT}, 0 for no "
+                             "limit)")
+    parser.add_argument("-f", "--fast-forward", action='store_true',
+                        help="jump over the deterministic steps")
+    parser.add_argument("--halt-when", nargs='+', default=None,
+                        metavar="PREDICATE",
+                        help="stop a computation when any of the predicates "
+                             "holds, e.g. 'a' (a appears in the output), "
+                             "'a>=5', 'a>=5@2' (in region 2), 'a@env'")
+    parser.add_argument("--halt-all", action='store_true',
+                        help="stop only when every predicate holds")
+    parser.add_argument("-c", "--cache", nargs='?', const='', default=None,
+                        metavar="DIR",
+                        help="reuse and extend the cached histograms of "
+                             "seeded runs (default folder: "
+                             "$MEMBRANE_CACHE_DIR or ~/.cache/"
+                             "membrane-results)")
+    parser.add_argument("--cache-size", type=float, default=64,
+                        help="the size limit of the cache in megabytes")
+    parser.add_argument("-p", "--prune", action='store_true',
+                        help="remove the rules that can never be applied "
+                             "before the simulation")
+    parser.add_argument("-e", "--exact", action='store_true',
+                        help="calculate the exact outcome probabilities by "
+                             "exploring the state space instead of sampling")
+    parser.add_argument("--max-states", type=int, default=None,
+                        help="the limit on the explored configurations of "
+                             "the exact mode")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the output file, .csv or .json (default: JSON "
+                             "on the standard output)")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the command line batch runner
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.num_of_sim < 1:
+        parser.error("the number of computations must be positive")
+    halt_when = None
+    if args.halt_when:
+        try:
+            halt_when = HaltingCondition.parse(args.halt_when, args.halt_all)
+        except ValueError as error:
+            parser.error(str(error))
+
+    model_dicts = {}
+    for path in args.models:
+        try:
+            model_dicts[path] = load_model_dict(path)
+        except (OSError, ValueError, InvalidArgumentException):
+            print(f"{path}: not a valid model file", file=sys.stderr)
+            return 1
+    if args.prune:
+        model_dicts = {path: prune_model_dict(json_dict) for path, json_dict
+                       in model_dicts.items()}
+
+    if args.exact:
+        try:
+            summaries = {path: exact_outcomes(json_dict, args.max_states)
+                         for path, json_dict in model_dicts.items()}
+        except IncompleteExplorationException:
+            print("the state space exceeds the limit of the configurations",
+                  file=sys.stderr)
+            return 1
+        return write_summaries(summaries, args.output)
+
+    cache = None if args.cache is None else ResultCache(
+        args.cache or None, int(args.cache_size * 1024 * 1024))
+    pool = WorkerPool(args.workers) if args.backend == "process" else None
+    try:
+        summaries = {path: run_batch(json_dict, num_of_sim=args.num_of_sim,
+                                     backend=args.backend,
+                                     workers=args.workers, seed=args.seed,
+                                     max_steps=args.max_steps,
+                                     time_limit=args.time_limit or None,
+                                     pool=pool,
+                                     fast_forward=args.fast_forward,
+                                     halt_when=halt_when, cache=cache)
+                     for path, json_dict in model_dicts.items()}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return write_summaries(summaries, args.output)
+
+
+def write_summaries(summaries, output):
+    """
+    A function used to write the summaries in the format given by the path
+
+    Parameters
+    ----------
+    summaries : dict
+        the summaries keyed by the paths of the models
+    output : str
+        the path of the output file, .csv or .json (None writes JSON on the
+        standard output)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    if output is None:
+        json.dump(summaries, sys.stdout, indent=2)
+        print()
+    elif output.endswith('.csv'):
+        write_csv(summaries, output)
+    else:
+        write_json(summaries, output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
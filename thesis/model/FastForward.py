@@ -0,0 +1,248 @@
+from Rule import PriorityRule, DissolvingRule
+
+
+class DeterministicPhase:
+    """
+    A class for jumping over the steps of a membrane system in which the
+    evolution is deterministic
+
+    A step is deterministic if, in every group of rules selected together
+    (see `MembraneSystem.get_selection_groups()`), the applicable rules
+    consume disjoint objects, none of them dissolves a region and none of
+    them sends objects to a randomly chosen region. In such a step every
+    applicable rule is applied as many times as its objects allow, no matter
+    in which order the rules are chosen.
+
+    The multiplicities of the objects touched by the rules are compiled into
+    a vector, and the steps are calculated on the vector with integer
+    arithmetic, without building the intermediate configurations. The phase
+    ends right before the step in which the set of the applicable rules
+    would change, i.e. an applicable rule runs out of objects or an
+    inapplicable one (including the dissolving rules) gets its objects. If
+    the vector reaches a fixed point, the remaining steps are skipped at once.
+
+    Attributes
+    ----------
+    model : MembraneSystem
+        the membrane system
+    applicable : list
+        the (counter indices, needed multiplicities, production) tuples of
+        the applicable rules, where production is the list of (counter index,
+        produced multiplicity) pairs
+    watched : list
+        the (counter indices, needed multiplicities) pairs of the
+        inapplicable rules that become applicable once they have their objects
+    counters : list
+        the (multiset, object) pairs of the vector
+    values : list
+        the multiplicities of the counters
+    deterministic : bool
+        False if the current step involves a random choice
+    """
+
+    def __init__(self, model):
+        """
+        A function used to compile the current step of a model
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+        """
+
+        self.model = model
+        self.applicable = []
+        self.watched = []
+        self.counters = []
+        self.values = []
+        self._index = {}
+        self.deterministic = self._compile()
+
+    def _counter(self, multiset, obj):
+        """
+        A function used to return the index of a counter, creating it on the
+        first call (None for the objects of infinite multiplicity)
+        """
+
+        if obj in (getattr(multiset, 'infinite_obj', None) or ()):
+            return None
+        key = (id(multiset), obj)
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.counters)
+            self._index[key] = index
+            self.counters.append((multiset, obj))
+            self.values.append(multiset.objects.get(obj, 0))
+        return index
+
+    def _needs(self, consumption):
+        """
+        A function used to convert the consumption of a rule to counter
+        indices and needed multiplicities
+        """
+
+        indices, needs = [], []
+        for multiset, consumed in consumption:
+            for obj, mul in consumed.items():
+                index = self._counter(multiset, obj)
+                if index is not None:
+                    indices.append(index)
+                    needs.append(mul)
+        return indices, needs
+
+    def _compile(self):
+        """
+        A function used to build the vector and the rules of the phase
+
+        Returns
+        -------
+        bool
+            True if the current step is deterministic
+        """
+
+        model = self.model
+        for group in model.get_selection_groups():
+            consumed = set()
+            for rule, region in group:
+                if isinstance(rule, PriorityRule):
+                    return False
+                applicable = model.is_applicable(rule, region)
+                indices, needs = self._needs(model.get_consumption(rule,
+                                                                   region))
+                if not applicable:
+                    if not all(self.values[i] >= need for i, need in
+                               zip(indices, needs)):
+                        self.watched.append((indices, needs))
+                    continue
+                if isinstance(rule, DissolvingRule) or not indices or \
+                        consumed.intersection(indices):
+                    return False
+                consumed.update(indices)
+                production = model.get_production(rule, region)
+                if production is None:
+                    return False
+                produced = []
+                for multiset, objects in production:
+                    for obj, mul in objects.items():
+                        index = self._counter(multiset, obj)
+                        if index is not None:
+                            produced.append((index, mul))
+                self.applicable.append((indices, needs, produced))
+        return bool(self.applicable)
+
+    def _span(self, values, delta, counts, limit):
+        """
+        A function used to calculate the number of steps in which the rules
+        keep firing the same number of times, i.e. the vector keeps changing
+        by `delta`
+
+        A count stays the same if it is bounded by a counter that does not
+        change, until a decreasing counter of the rule drops below it. If a
+        count is only bounded by growing counters (e.g. geometric growth),
+        the counts are recalculated after every step.
+
+        Returns
+        -------
+        int
+            the number of steps, at least 1 and at most `limit`
+        """
+
+        span = limit
+        for (indices, needs, _), count in zip(self.applicable, counts):
+            stable = False
+            for i, need in zip(indices, needs):
+                if delta[i] < 0:
+                    span = min(span, (values[i] - count * need) //
+                               -delta[i] + 1)
+                elif delta[i] == 0 and values[i] // need == count:
+                    stable = True
+            if not stable:
+                return 1
+        return max(span, 1)
+
+    @staticmethod
+    def _first_enabled(values, delta, indices, needs, limit):
+        """
+        A function used to find the first step after which a watched rule
+        has its objects, the vector changing by `delta` in every step
+
+        Returns
+        -------
+        int
+            the number of steps (between 1 and `limit`), or None if the rule
+            does not get its objects in `limit` steps
+        """
+
+        lowest, highest = 1, limit
+        for i, need in zip(indices, needs):
+            surplus, change = values[i] - need, delta[i]
+            if change > 0:
+                lowest = max(lowest, -(surplus // change))
+            elif surplus < 0:
+                return None
+            elif change < 0:
+                highest = min(highest, surplus // -change)
+        return lowest if lowest <= highest else None
+
+    def run(self, max_steps):
+        """
+        A function used to calculate the steps of the phase and to write the
+        resulting multiplicities back to the model
+
+        While the rules fire the same number of times in every step, the
+        vector changes linearly, thus the step in which a rule runs out of
+        objects or a watched rule gets its objects is calculated by integer
+        division, and the steps before it are made at once. The counts are
+        only recalculated step by step if they keep changing.
+
+        Parameters
+        ----------
+        max_steps : int
+            the upper limit on the number of steps
+
+        Returns
+        -------
+        int
+            the number of steps made
+        """
+
+        if not self.deterministic:
+            return 0
+        values = self.values
+        steps = 0
+        while steps < max_steps:
+            counts = [min(values[i] // need for i, need in zip(indices, needs))
+                      for indices, needs, _ in self.applicable]
+            if not all(counts):
+                break
+            delta = [0] * len(values)
+            for (indices, needs, produced), count in zip(self.applicable,
+                                                         counts):
+                for i, need in zip(indices, needs):
+                    delta[i] -= need * count
+                for i, mul in produced:
+                    delta[i] += mul * count
+            if not any(delta):
+                steps = max_steps
+                break
+            span = self._span(values, delta, counts, max_steps - steps)
+            enabled = [self._first_enabled(values, delta, indices, needs, span)
+                       for indices, needs in self.watched]
+            enabled = [steps_to for steps_to in enabled if steps_to is not None]
+            if enabled:
+                # the steps are made, but the phase ends after them
+                span = min(enabled)
+            values = [value + span * change for value, change in
+                      zip(values, delta)]
+            steps += span
+            if enabled:
+                break
+
+        self.values = values
+        for (multiset, obj), value in zip(self.counters, values):
+            if value:
+                multiset.objects[obj] = value
+            else:
+                multiset.objects.pop(obj, None)
+        self.model.step_counter += steps
+        return steps
@@ -0,0 +1,297 @@
+import re
+
+from StepDelta import ENVIRONMENT_ID
+
+
+class HaltingPredicate:
+    """
+    A class to represent a condition on the objects of a single region that
+    ends the computation early once it holds
+
+    A predicate watches a region and, optionally, a list of objects. Its test
+    is only evaluated again when the multiplicity of a watched object changed,
+    otherwise its previous value is reused.
+
+    Attributes
+    ----------
+    region : int
+        the identifier of the watched region, `ENVIRONMENT_ID` for the
+        environment, None for the output of the model
+        (see `MembraneSystem.get_result()`)
+    objects : tuple
+        the watched objects, None if the test depends on every object
+    """
+
+    def __init__(self, region=None, objects=None):
+        """
+        A function used to initialize the predicate
+
+        Parameters
+        ----------
+        region : int, optional
+            the identifier of the watched region (default is None, the
+            output of the model)
+        objects : list, optional
+            the watched objects (default is None, every object)
+        """
+
+        self.region = region
+        self.objects = None if objects is None else tuple(objects)
+
+    def test(self, objects):
+        """
+        Abstract function used to evaluate the predicate
+
+        Parameters
+        ----------
+        objects : dict
+            the {object: multiplicity} pairs of the watched region
+
+        Returns
+        -------
+        bool
+            True if the computation can stop
+        """
+
+        pass
+
+
+class ObjectThreshold(HaltingPredicate):
+    """
+    A predicate that holds when the multiplicity of an object reaches a
+    threshold
+    """
+
+    def __init__(self, obj, count=1, region=None):
+        super().__init__(region, [obj])
+        self.obj = obj
+        self.count = count
+
+    def test(self, objects):
+        return objects.get(self.obj, 0) >= self.count
+
+    def __str__(self):
+        return f'{self.obj}>={self.count}'
+
+
+class ObjectAppears(ObjectThreshold):
+    """
+    A predicate that holds when an object appears in the region
+    """
+
+    def __init__(self, obj, region=None):
+        super().__init__(obj, 1, region)
+
+    def __str__(self):
+        return self.obj
+
+
+class CustomPredicate(HaltingPredicate):
+    """
+    A predicate evaluating a function given by the user
+
+    The function has to be defined on module level for the process backend,
+    since the predicates are sent to the worker processes
+    """
+
+    def __init__(self, function, region=None, objects=None):
+        super().__init__(region, objects)
+        self.function = function
+
+    def test(self, objects):
+        return bool(self.function(objects))
+
+
+class HaltingCondition:
+    """
+    A class to represent the predicates ending the computations early
+
+    The condition does not change during the computations, thus it can be
+    shared between the replicas, every replica evaluates it with its own
+    `HaltingMonitor`
+
+    Attributes
+    ----------
+    predicates : list
+        the `HaltingPredicate` objects
+    require_all : bool
+        if True, the computation stops when every predicate holds, otherwise
+        when any of them holds
+    """
+
+    PATTERN = re.compile(r'^([a-z])(?:>=(\d+))?(?:@(env|\d+))?$')
+    """The format of the predicates given as strings, e.g. `a`, `a>=5@2`"""
+
+    def __init__(self, predicates, require_all=False):
+        """
+        A function used to initialize the condition
+
+        Parameters
+        ----------
+        predicates : list
+            the `HaltingPredicate` objects
+        require_all : bool, optional
+            if True, every predicate has to hold (default is False)
+        """
+
+        self.predicates = list(predicates)
+        self.require_all = require_all
+
+    @classmethod
+    def parse(cls, expressions, require_all=False):
+        """
+        A function used to create a condition from strings
+
+        An expression is an object (`a`, it appears) or an object with a
+        threshold (`a>=5`), optionally followed by the watched region
+        (`@2` for the region 2, `@env` for the
+        environment), the output of the model is watched by default
+
+        Parameters
+        ----------
+        expressions : list
+            the expressions of the predicates
+        require_all : bool, optional
+            if True, every predicate has to hold (default is False)
+
+        Returns
+        -------
+        HaltingCondition
+            the condition
+
+        Raises
+        ------
+        ValueError
+            if an expression is not valid
+        """
+
+        predicates = []
+        for expression in expressions:
+            match = cls.PATTERN.match(expression.replace(' ', ''))
+            if match is None:
+                raise ValueError(f'invalid halting predicate: {expression}')
+            obj, count, region = match.groups()
+            if region == 'env':
+                region = ENVIRONMENT_ID
+            elif region is not None:
+                region = int(region)
+            predicates.append(ObjectAppears(obj, region) if count is None
+                              else ObjectThreshold(obj, int(count), region))
+        return cls(predicates, require_all)
+
+    def monitor(self, model):
+        """
+        A function used to create the monitor evaluating the condition on a
+        model
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+
+        Returns
+        -------
+        HaltingMonitor
+            the monitor of the model
+        """
+
+        return HaltingMonitor(model, self)
+
+    def __str__(self):
+        return (' and ' if self.require_all else ' or ').join(
+            str(predicate) for predicate in self.predicates)
+
+
+class HaltingMonitor:
+    """
+    A class for evaluating a `HaltingCondition` on a model after its steps
+
+    While the monitor is open, the model collects the regions modified by its
+    steps in `dirty_regions`. A check only reads the predicates whose region
+    is among them (the predicates of the output, whenever any region
+    changed), the others keep their previous value. The multiplicities of the
+    watched objects are also compared to the ones seen at the previous check,
+    so a predicate is only evaluated again if one of its objects changed.
+    The objects changed outside of the steps (e.g. by editing a region) are
+    not noticed until the monitor is created again.
+
+    Attributes
+    ----------
+    model : MembraneSystem
+        the membrane system
+    condition : HaltingCondition
+        the evaluated condition
+    """
+
+    def __init__(self, model, condition):
+        """
+        A function used to initialize the monitor
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+        condition : HaltingCondition
+            the evaluated condition
+        """
+
+        self.model = model
+        self.condition = condition
+        self._seen = [None] * len(condition.predicates)
+        self._values = [False] * len(condition.predicates)
+        self._checked = False
+        model.dirty_regions = set()
+
+    def close(self):
+        """
+        A function used to stop collecting the modified regions of the model
+        """
+
+        self.model.dirty_regions = None
+
+    def _objects(self, region):
+        """
+        A function used to return the objects of a watched region (empty if
+        the region dissolved)
+        """
+
+        model = self.model
+        if region is None:
+            return model.get_result()
+        if region == ENVIRONMENT_ID:
+            return model.environment.objects
+        watched = model.regions.get(region)
+        return {} if watched is None else watched.objects.objects
+
+    def check(self):
+        """
+        A function used to evaluate the condition on the current
+        configuration of the model
+
+        Returns
+        -------
+        bool
+            True if the computation can stop
+        """
+
+        # every predicate is read at the first check and after closing
+        dirty = self.model.dirty_regions if self._checked else None
+        for i, predicate in enumerate(self.condition.predicates):
+            region = predicate.region
+            if dirty is not None:
+                changed = bool(dirty) if region is None else region in dirty
+                if not changed:
+                    continue
+            objects = self._objects(region)
+            if predicate.objects is not None:
+                seen = tuple(objects.get(obj, 0) for obj in predicate.objects)
+                if seen == self._seen[i]:
+                    continue
+                self._seen[i] = seen
+            self._values[i] = predicate.test(objects)
+        self._checked = True
+        if self.model.dirty_regions is not None:
+            self.model.dirty_regions.clear()
+        if self.condition.require_all:
+            return all(self._values)
+        return any(self._values)
@@ -1,3 +1,56 @@
+import threading
+
+
+class IdAllocator:
+    """
+    A class for allocating the identifiers of the nodes of a tree structure
+
+    Every tree has its own allocator, shared by all of its nodes, so the
+    identifiers of a tree are dense (0..n-1 in the order of creation), stable
+    across copies and saves, and trees built at the same time (e.g. in
+    parallel workers) do not share any state. The allocation is locked, so
+    nodes of the same tree can be created from several threads.
+
+    Attributes
+    ----------
+    next_id : int
+        the identifier of the next node, i.e. the number of allocated
+        identifiers
+    """
+
+    __slots__ = ('next_id', '_lock')
+
+    def __init__(self):
+        """
+        A function used to initialize an empty allocator
+        """
+
+        self.next_id = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return self.next_id
+
+    def __setstate__(self, state):
+        self.next_id = state
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        """
+        A function used to return a new identifier
+
+        Returns
+        -------
+        int
+            the new identifier
+        """
+
+        with self._lock:
+            node_id = self.next_id
+            self.next_id += 1
+        return node_id
+
+
 class Node:
     """
     A class for representing a node in the tree structure of a membrane
@@ -6,27 +59,33 @@ class Node:
     Attributes
     ----------
     id : int
-        the unique identifier of the node
+        the identifier of the node, unique in its tree
     parent : Node
         the parent node
     children : list[Node]
         the list of nodes whose parent is `self`
+    allocator : IdAllocator
+        the allocator of the identifiers of the tree
     """
 
-    uid = 0
+    __slots__ = ('id', 'parent', 'children', 'allocator')
 
     def __init__(self, parent=None):
         """
         A function used to initialize the `Node` instance
 
+        A node without a parent starts a new tree with identifier 0, a node
+        with a parent gets the next identifier of the parent's tree (it still
+        has to be added to the children of the parent)
+
         Parameters
         ----------
         parent : Node, optional
             the parent of the node (default is None)
         """
 
-        self.id = Node.uid
-        Node.uid += 1
+        self.allocator = IdAllocator() if parent is None else parent.allocator
+        self.id = self.allocator.allocate()
         self.parent = parent
         self.children = []
 
@@ -80,6 +139,10 @@ class Node:
 
         if `node` is not given then we create a new node to add as child
 
+        If `node` belongs to another tree (e.g. it was created without a
+        parent), it and its descendants get new identifiers from the tree of
+        `self`
+
         Parameters
         ----------
         node : Node, optional
@@ -87,9 +150,15 @@ class Node:
         """
 
         if node is None:
-            self.children.append(Node())
-        else:
-            self.children.append(node)
+            node = Node(self)
+        elif node.allocator is not self.allocator:
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                current.allocator = self.allocator
+                current.id = self.allocator.allocate()
+                stack.extend(reversed(current.children))
+        self.children.append(node)
         node.parent = self
 
     def is_leaf(self):
@@ -168,6 +237,57 @@ class MembraneStructure:
 
         return self.skin.id
 
+    def get_id_bound(self):
+        """
+        A function to return the upper bound of the identifiers of the nodes,
+        so that per-node data can be stored in lists indexed by identifier
+
+        Returns
+        -------
+        int
+            the number of identifiers allocated in the tree (including the
+            removed nodes)
+        """
+
+        return self.skin.allocator.next_id
+
+    def get_node(self, node_id):
+        """
+        A function to return the node with the given identifier
+
+        Parameters
+        ----------
+        node_id : int
+            the identifier of the node
+
+        Returns
+        -------
+        Node
+            the node with the identifier (None if it is not in the tree)
+        """
+
+        self.result = None
+        self.preorder(self.skin, lambda x: x, lambda x: x.id == node_id)
+        return self.result
+
+    def get_parent_map(self):
+        """
+        A function to return the parent of every node in the tree
+
+        Returns
+        -------
+        dict
+            the {node_id: parent_id} pairs (the parent of the root is None)
+        """
+
+        result = {}
+        stack = [self.skin]
+        while stack:
+            node = stack.pop()
+            result[node.id] = None if node.parent is None else node.parent.id
+            stack.extend(node.children)
+        return result
+
     def preorder(self, root, fn, cond):
         """
         A function used to traverse the tree in a preorder way
@@ -190,9 +310,9 @@ class MembraneStructure:
         if cond(root):
             self.result = fn(root)
         else:
-            iter_count = root.num_of_children()
-            for i in range(iter_count):
-                self.preorder(root.children[i], fn, cond)
+            # `fn` may modify the list of children (e.g. `remove_node`)
+            for child in list(root.children):
+                self.preorder(child, fn, cond)
 
     @staticmethod
     def get_num_of_children(node):
@@ -283,6 +403,30 @@ class MembraneStructure:
         parent.children.remove(node)
         return parent
 
+    @staticmethod
+    def restore_node(node, position):
+        """
+        A static function used to put a node removed by `remove_node` back into
+        the membrane structure
+
+        The removed node still refers to its former parent and children, the
+        children are moved back from the parent to the restored node
+
+        Parameters
+        ----------
+        node : Node
+            the node we want to restore
+        position : int
+            the index of the node among its parent's children before the
+            removal
+        """
+
+        parent = node.parent
+        for child in node.children:
+            parent.children.remove(child)
+            child.parent = node
+        parent.children.insert(position, node)
+
     @staticmethod
     def add_node(node):
         """
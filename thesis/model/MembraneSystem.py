@@ -1,13 +1,12 @@
-import concurrent
-import multiprocessing
+import os
 import random
-import json
 import time
+from collections import deque
 from typing import Dict
-from concurrent.futures import ThreadPoolExecutor
 
 from MultiSet import MultiSet
 from MultiSet import InvalidOperationException
+from StepDelta import StepDelta, ENVIRONMENT_ID
 from PySide6.QtCore import QObject, Signal
 
 
@@ -28,12 +27,16 @@ class Environment(MultiSet):
 
     Attributes
     ----------
-    infini  te_obj : list
+    infinite_obj : set
         the list containing the objects with infinite multiplicity
     objects : dict
         a dict containing the objects as keys and their multiplicity as values
+    new_objects : MultiSet
+        contains the objects sent out in a simulation step
     """
 
+    __slots__ = ('infinite_obj', 'new_objects')
+
     def __init__(self, objects=None, infinite_obj=None):
         """
         A function used for initializing the environment
@@ -222,6 +225,9 @@ class MembraneSignal(QObject):
         the signal that communicates that a simulation step is over
     region_dissolved : Signal
          the signal that communicates that a region has dissolved
+    region_restored : Signal
+         the signal that communicates that a dissolved region has been put back
+         by stepping back
     obj_changed : Signal
          the signal that communicates that a region's objects have changed
     rules_changed : Signal
@@ -231,6 +237,7 @@ class MembraneSignal(QObject):
     sim_over = Signal(list)
     sim_step_over = Signal(int)
     region_dissolved = Signal(int)
+    region_restored = Signal(int)
     obj_changed = Signal(int, str)
     rules_changed = Signal(int, str)
 
@@ -251,6 +258,27 @@ class MembraneSystem(QObject):
         the dictionary containing the region objects keyed by their identifier
     signal : MembraneSignal
         the objects for containing all the available signals
+    history : deque
+        the bounded buffer of the `StepDelta` objects of the latest steps used
+        by `step_back()` (None if stepping back is disabled)
+    rng : Random
+        the random number generator of the instance, used for every
+        non-deterministic choice
+    profiler : StepProfiler
+        the collector of the timing and rule statistics (None if profiling
+        is disabled)
+    changed_regions : set
+        the identifiers of the regions whose objects were modified in place
+        during the current step without being signalled, emptied when the
+        step's new objects are merged
+    touched : dict
+        the {region_id: objects} pairs of the regions before the step that is
+        creating a `StepDelta` first modified them (None if the step does not
+        create a delta)
+    dirty_regions : set
+        the identifiers of the regions (and `ENVIRONMENT_ID`) whose objects
+        changed since a `HaltingMonitor` last read them, None if no monitor
+        watches the model
     """
 
     def __init__(self,
@@ -277,14 +305,20 @@ class MembraneSystem(QObject):
         self.environment = Environment(infinite_obj=infinite_obj)
         self.step_counter = 0
         self.structure_str = structure_str
+        self.history = None
+        self.rng = random.Random()
+        self.profiler = None
+        self.tau_leaper = None
+        self.changed_regions = set()
+        self.touched = None
+        self.dirty_regions = None
 
         # { region_id : region_obj }
         self.regions: Dict = regions
 
         self.signal = MembraneSignal()
         for r in self.regions.values():
-            r.signal.obj_changed.connect(self.signal.obj_changed.emit)
-            r.signal.rules_changed.connect(self.signal.rules_changed.emit)
+            r.signal = self.signal
 
     # @abc.abstractmethod
     def apply(self, rule, region):
@@ -301,6 +335,75 @@ class MembraneSystem(QObject):
 
         pass
 
+    # @abc.abstractmethod
+    def apply_many(self, rule, region, count):
+        """
+        Abstract function to apply an evolution rule to a region multiple
+        times at once
+
+        Used by the approximate stepping of `TauLeaper`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule to be applied
+        region : Region
+            the region that the rule is connected to
+        count : int
+            the number of applications
+        """
+
+        pass
+
+    # @abc.abstractmethod
+    def get_consumption(self, rule, region):
+        """
+        Abstract function to return the objects consumed by a single
+        application of a rule
+
+        Used by the approximate stepping of `TauLeaper`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule to be applied
+        region : Region
+            the region that the rule is connected to
+
+        Returns
+        -------
+        list
+            the (multiset, consumed multiset) pairs, where `multiset` is the
+            multiset the objects are removed from
+        """
+
+        pass
+
+    # @abc.abstractmethod
+    def get_production(self, rule, region):
+        """
+        Abstract function to return the objects produced by a single
+        application of a rule
+
+        Used by `fast_forward()`
+
+        Parameters
+        ----------
+        rule : Rule
+            the rule to be applied
+        region : Region
+            the region that the rule is connected to
+
+        Returns
+        -------
+        list
+            the (multiset, produced multiset) pairs, where `multiset` is the
+            multiset the objects are added to at the end of the step, or None
+            if the receiving regions are chosen randomly
+        """
+
+        pass
+
     # @abc.abstractmethod
     def is_applicable(self, rule, region):
         """
@@ -322,10 +425,402 @@ class MembraneSystem(QObject):
         pass
 
     # @abc.abstractmethod
-    def simulate_step(self):
+    def simulate_step(self, return_delta=False):
         """
         Abstract function used to simulate a single evolution step in the
         membrane system
+
+        Parameters
+        ----------
+        return_delta : bool, optional
+            if True, the changes caused by the step are returned even if the
+            history is disabled (default is False)
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step (None if neither `return_delta` nor
+            the history is enabled)
+        """
+
+        pass
+
+    def seed(self, seed=None):
+        """
+        A function used to seed the random number generator of the membrane
+        system
+
+        Parameters
+        ----------
+        seed : int, optional
+            the seed, None seeds from the operating system (default is None)
+        """
+
+        self.rng.seed(seed)
+
+    @staticmethod
+    def spawn_seed(seed, index):
+        """
+        A static method used to derive the seed of a replica in an ensemble
+
+        The derived seeds are the hashes of the ensemble seed and the replica
+        index, thus replicas get independent streams and the seed of a
+        replica does not depend on how the ensemble is split among workers
+
+        Parameters
+        ----------
+        seed : int
+            the seed of the ensemble
+        index : int
+            the index of the replica
+
+        Returns
+        -------
+        int
+            the 64 bit seed of the replica
+        """
+
+        import hashlib
+        digest = hashlib.sha256(f'{seed}:{index}'.encode()).digest()
+        return int.from_bytes(digest[:8], 'little')
+
+    def enable_profiling(self, max_steps=10000):
+        """
+        A function used to start collecting statistics about the simulation
+
+        Parameters
+        ----------
+        max_steps : int, optional
+            the number of the latest steps whose statistics are kept
+            (default is 10000)
+
+        Returns
+        -------
+        StepProfiler
+            the profiler collecting the statistics
+        """
+
+        from Profiler import StepProfiler
+        if self.profiler is None:
+            self.profiler = StepProfiler(max_steps)
+            self.profiler.attach(self)
+        return self.profiler
+
+    def disable_profiling(self):
+        """
+        A function used to stop collecting statistics and to restore the
+        original methods of the model
+
+        Returns
+        -------
+        StepProfiler
+            the profiler that collected the statistics (None if profiling was
+            not enabled)
+        """
+
+        profiler = self.profiler
+        if profiler is not None:
+            from Profiler import StepProfiler
+            StepProfiler.detach(self)
+            self.profiler = None
+        return profiler
+
+    def enable_tau_leaping(self, epsilon=0.03, threshold=10):
+        """
+        A function used to switch to the approximate stepping, which applies
+        the rules in bulk (see `TauLeaper`)
+
+        Parameters
+        ----------
+        epsilon : float, optional
+            the error tolerance, the upper limit on the expected relative
+            change of an object's multiplicity during a leap (default is 0.03)
+        threshold : int, optional
+            the shortest leap, below which the rules are applied one at a
+            time (default is 10)
+
+        Returns
+        -------
+        TauLeaper
+            the leaper used by the steps
+        """
+
+        from TauLeaping import TauLeaper
+        self.tau_leaper = TauLeaper(epsilon, threshold)
+        return self.tau_leaper
+
+    def disable_tau_leaping(self):
+        """
+        A function used to switch back to the exact stepping
+        """
+
+        self.tau_leaper = None
+
+    def fast_forward(self, max_steps):
+        """
+        A function used to jump over the upcoming deterministic steps (see
+        `DeterministicPhase`)
+
+        The steps made this way do not use the random number generator and
+        emit `sim_step_over` only once. Nothing is done while the history is
+        kept, since the skipped steps cannot be stepped back.
+
+        Parameters
+        ----------
+        max_steps : int
+            the upper limit on the number of steps
+
+        Returns
+        -------
+        int
+            the number of steps made (0 if the next step is not deterministic)
+        """
+
+        if self.history is not None or max_steps <= 0:
+            return 0
+        from FastForward import DeterministicPhase
+        steps = DeterministicPhase(self).run(max_steps)
+        if steps:
+            if self.dirty_regions is not None:
+                self.dirty_regions.update(self.regions)
+                self.dirty_regions.add(ENVIRONMENT_ID)
+            self.signal.sim_step_over.emit(self.step_counter)
+        return steps
+
+    def set_history_limit(self, limit):
+        """
+        A function used to enable stepping back by keeping the changes of the
+        latest steps
+
+        Parameters
+        ----------
+        limit : int
+            the maximal number of steps that can be stepped back (0 or None
+            disables the history)
+        """
+
+        self.history = deque(self.history or (), maxlen=limit) if limit \
+            else None
+
+    def clear_history(self):
+        """
+        A function used to forget the kept steps, this is necessary when the
+        objects of the system are modified outside of the simulation
+        """
+
+        if self.history is not None:
+            self.history.clear()
+
+    def is_capturing_delta(self, return_delta):
+        """
+        A function used to decide whether the step being simulated has to
+        create a `StepDelta`
+
+        Parameters
+        ----------
+        return_delta : bool
+            the parameter given to `simulate_step()`
+
+        Returns
+        -------
+        bool
+            True if the delta is needed, False otherwise
+        """
+
+        return return_delta or self.history is not None
+
+    def begin_delta(self):
+        """
+        A function used to start collecting the changes of the step being
+        simulated
+
+        Only the environment is copied, the regions are kept by `touch()`
+        when the step first modifies them, so creating a delta costs in
+        proportion to the regions changed by the step
+
+        Returns
+        -------
+        dict
+            the objects of the environment before the step
+        """
+
+        self.touched = {}
+        return dict(self.environment.objects)
+
+    def touch(self, region):
+        """
+        A function used to note that the current step is about to modify the
+        objects of a region
+
+        The objects are kept for the `StepDelta` being created if `touched`
+        is not None, and the region is added to `dirty_regions` if it is not
+        None. Touching the skin marks the environment as well, since only the
+        rules of the skin exchange objects with it.
+
+        Parameters
+        ----------
+        region : Region
+            the region about to be modified
+        """
+
+        dirty = self.dirty_regions
+        if dirty is not None:
+            dirty.add(region.id)
+            if region.id == self.get_root_id():
+                dirty.add(ENVIRONMENT_ID)
+        touched = self.touched
+        if touched is not None and region.id not in touched:
+            touched[region.id] = dict(region.objects.objects)
+
+    def get_dissolution_record(self, region):
+        """
+        A function used to collect everything needed to undo the dissolution of
+        a region
+
+        It has to be called before the region is removed from the structure
+
+        Parameters
+        ----------
+        region : Region
+            the region that is dissolving
+
+        Returns
+        -------
+        tuple
+            the (region_id, parent_id, child_ids) tuple and the (node, region,
+            position) tuple of the dissolving region
+        """
+
+        node = self.tree.get_node(region.id)
+        self.touch(region)
+        self.touch(self.regions[node.parent.id])
+        position = node.parent.children.index(node)
+        child_ids = [child.id for child in node.children]
+        return ((region.id, node.parent.id, child_ids),
+                (node, region, position))
+
+    def finish_delta(self, environment, dissolution_records):
+        """
+        A function used to create the `StepDelta` of the step that has just
+        been simulated and to add it to the history
+
+        Only the regions kept by `touch()` and the environment are compared
+
+        Parameters
+        ----------
+        environment : dict
+            the objects of the environment before the step, returned by
+            `begin_delta()`
+        dissolution_records : list
+            the records created by `get_dissolution_record()` during the step
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step
+        """
+
+        dissolved = [record for record, _ in dissolution_records]
+        removed = {removal[1].id: removal for _, removal in
+                   dissolution_records}
+        changes = {}
+        for r_id, before in self.touched.items():
+            region = self.regions.get(r_id)
+            difference = StepDelta.diff(
+                before, {} if region is None else region.objects.objects)
+            if difference:
+                changes[r_id] = difference
+        self.touched = None
+        difference = StepDelta.diff(environment, self.environment.objects)
+        if difference:
+            changes[ENVIRONMENT_ID] = difference
+        delta = StepDelta(self.step_counter, changes, dissolved, removed)
+        if self.history is not None:
+            self.history.append(delta)
+        return delta
+
+    def step_back(self):
+        """
+        A function used to undo the latest simulated step that is kept in the
+        history
+
+        Only the changed objects and the regions dissolved in the step are
+        touched, dissolved regions are put back into the structure and at the
+        end of `regions`, so the regions are no longer in the order of their
+        identifiers after a dissolution is undone
+
+        Emits `region_restored(int)`, `obj_changed(int, str)` and
+        `sim_step_over(int)`
+
+        Returns
+        -------
+        StepDelta
+            the changes that were undone (None if there is nothing to undo)
+        """
+
+        if not self.history:
+            return None
+        delta = self.history.pop()
+        if self.dirty_regions is not None:
+            self.dirty_regions.update(delta.changed_regions())
+            self.dirty_regions.update(r_id for r_id, _, _ in delta.dissolved)
+
+        for r_id, _, _ in reversed(delta.dissolved):
+            node, region, position = delta.removed[r_id]
+            self.tree.restore_node(node, position)
+            region.is_dissolving = False
+            region.objects.objects.clear()
+            self.regions[r_id] = region
+        for r_id, _, _ in reversed(delta.dissolved):
+            self.signal.region_restored.emit(r_id)
+
+        for r_id, difference in delta.changes.items():
+            if r_id == ENVIRONMENT_ID:
+                objects = self.environment.objects
+            else:
+                objects = self.regions[r_id].objects.objects
+            for obj, change in difference.items():
+                new_mul = objects.get(obj, 0) - change
+                if new_mul:
+                    objects[obj] = new_mul
+                else:
+                    del objects[obj]
+            if r_id != ENVIRONMENT_ID:
+                region = self.regions[r_id]
+                region.objects = region.objects
+
+        self.step_counter -= 1
+        self.signal.sim_step_over.emit(self.step_counter)
+        return delta
+
+    # @abc.abstractmethod
+    def merge_new_objects(self):
+        """
+        Abstract function used to add the objects produced in the step to the
+        objects of the regions
+
+        Returns
+        -------
+        list
+            the regions marked for dissolution
+        """
+
+        pass
+
+    # @abc.abstractmethod
+    def get_selection_groups(self):
+        """
+        Abstract function used to return the groups of the rules that are
+        selected together in a step
+
+        In a group, a rule is chosen uniformly from the remaining rules, it is
+        applied if it is applicable, otherwise it is removed from the group,
+        until the group is empty. The groups are processed in order.
+
+        Returns
+        -------
+        list
+            the lists of (rule, region) pairs
         """
 
         pass
@@ -370,7 +865,8 @@ class MembraneSystem(QObject):
 
         pass
 
-    def simulate_parallel(self, num_of_sim=100):
+    def simulate_parallel(self, num_of_sim=100, seed=None, halt_when=None,
+                          cache=None):
         """
         A function that is used to showcase the nondeterministic behaviour of
         the membrane system by making a given number of copies of the current
@@ -385,33 +881,143 @@ class MembraneSystem(QObject):
         The maximum number of threads used by the calculation is the number of
         CPU cores the user's computer has
 
+        Every copy has its own random number generator, if `seed` is given,
+        copy `i` is seeded with `spawn_seed(seed, i)`, so the results do not
+        depend on the scheduling of the threads
+
+        If `cache` is given and `seed` is set, a cached histogram of the same
+        ensemble is used without computing, and a smaller one is extended
+        with the missing copies (see `ResultCache.extend()`). The histogram
+        is only stored if every copy halted within the time limit. The
+        results of a cached ensemble come back grouped by outcome (equal
+        results are next to each other), not in the order of the copies.
+
         Parameters
         ----------
         num_of_sim : int
             number of times to calculation is to be simulated (default is 100)
+        seed : int, optional
+            the seed of the ensemble (default is None)
+        halt_when : HaltingCondition, optional
+            the condition that ends the copies early (default is None)
+        cache : ResultCache, optional
+            the cache of the outcome histograms (default is None)
 
         Returns
         -------
         list
-            the list containing the result of all the simulations combined
+            the list containing the result of all the simulations combined,
+            copied into {object: multiplicity} dictionaries, so they do not
+            keep the copies alive (grouped by outcome if `cache` is used)
         """
 
-        def compute(model):
-            model_copy = model.__class__.copy_system(model)
-            return model_copy.simulate_timed_computation()
-
-        cpu_count = multiprocessing.cpu_count()
-        futures = []
-        results = []
-        with ThreadPoolExecutor(max_workers=cpu_count) as executor:
-            for i in range(num_of_sim):
-                futures.append(executor.submit(compute, self))
+        from concurrent.futures import ThreadPoolExecutor
+        from Outcomes import OutcomeHistogram, decode_result
+        from WorkerPool import simulate_replica
+        # the time limit of `simulate_timed_computation()`
+        time_limit = 10
+        key = None if cache is None else cache.make_key(
+            self.create_json_dict(), seed, halt_when=halt_when)
 
-            for i in range(num_of_sim):
-                results.append(futures[i].result())
+        def compute(model, index):
+            model_copy = model.__class__.copy_system(model)
+            return simulate_replica(
+                model_copy, None if seed is None else
+                MembraneSystem.spawn_seed(seed, index),
+                time_limit=time_limit, halt_when=halt_when)
+
+        def compute_all(first):
+            cpu_count = os.cpu_count() or 1
+            futures = []
+            replicas = []
+            with ThreadPoolExecutor(max_workers=cpu_count) as executor:
+                for i in range(first, num_of_sim):
+                    futures.append(executor.submit(compute, self, i))
+
+                for future in futures:
+                    replicas.append(future.result())
+            return replicas
+
+        if key is None:
+            results = [replica[0] for replica in compute_all(0)]
+        else:
+            histogram, _ = cache.extend(
+                key, num_of_sim, lambda first:
+                OutcomeHistogram.from_replicas(compute_all(first)))
+            results = [decode_result(result) for result, count in
+                       histogram.counts.items() for _ in range(count)]
         self.signal.sim_over.emit(results)
         return results
 
+    async def simulate_async(self, seed=None, max_steps=None,
+                             time_limit=None, halt_when=None, executor=None):
+        """
+        A coroutine used to run the whole simulation of the membrane system in
+        a thread, without blocking the event loop (see
+        `AsyncSimulation.simulate_async()`)
+
+        Cancelling the awaiting task stops the computation before its next
+        step
+
+        Parameters
+        ----------
+        seed : int, optional
+            the seed of the random number generator (default is None)
+        max_steps : int, optional
+            the upper limit on the number of steps (default is None)
+        time_limit : float, optional
+            the upper limit on the time of the computation in seconds
+            (default is None)
+        halt_when : HaltingCondition, optional
+            the condition that ends the computation early (default is None)
+        executor : concurrent.futures.Executor, optional
+            the thread executor, the default executor of the loop if None
+
+        Returns
+        -------
+        tuple
+            the result of the computation, the number of steps, the elapsed
+            time and a flag that is True if the computation halted
+        """
+
+        from AsyncSimulation import simulate_async
+        return await simulate_async(self, seed, max_steps, time_limit,
+                                    halt_when, executor)
+
+    def iter_parallel_async(self, num_of_sim=100, seed=None, max_steps=None,
+                            time_limit=None, halt_when=None, executor=None):
+        """
+        A function used to run copies of the membrane system in an executor,
+        returning an asynchronous iterator over their results (see
+        `AsyncSimulation.iter_ensemble()`)
+
+        Parameters
+        ----------
+        num_of_sim : int, optional
+            number of computations (default is 100)
+        seed : int, optional
+            the seed of the ensemble (default is None)
+        max_steps : int, optional
+            the upper limit on the number of steps (default is None)
+        time_limit : float, optional
+            the upper limit on the time of a computation in seconds
+            (default is None)
+        halt_when : HaltingCondition, optional
+            the condition that ends the computations early (default is None)
+        executor : concurrent.futures.Executor, optional
+            a thread or process executor, the default executor of the loop
+            if None
+
+        Returns
+        -------
+        AsyncIterator
+            the (replica index, result tuple) pairs in the order of finishing
+        """
+
+        from AsyncSimulation import iter_ensemble
+        return iter_ensemble(self, num_of_sim, seed, max_steps, time_limit,
+                             halt_when, executor)
+
     @classmethod
     def is_valid_parentheses(cls, m_str):
         """
@@ -649,7 +1255,7 @@ class MembraneSystem(QObject):
                            lambda x: x.id == region_id)
         result_list = self.tree.result
         return None if result_list is None else self.regions[
-            random.choice(result_list).id]
+            self.rng.choice(result_list).id]
 
     def get_root_id(self):
         """
@@ -682,19 +1288,30 @@ class MembraneSystem(QObject):
                     return True
         return False
 
-    def simulate_computation(self):
+    def simulate_computation(self, halt_when=None):
         """
         A function to run the whole simulation of a membrane system
 
         Emits `sim_over` signal when there are no possible rules to apply to any
         region
+
+        Parameters
+        ----------
+        halt_when : HaltingCondition, optional
+            the condition that ends the computation early, checked before
+            every step (default is None)
         """
 
+        monitor = None if halt_when is None else halt_when.monitor(self)
         while self.any_rule_applicable():
+            if monitor is not None and monitor.check():
+                break
             self.simulate_step()
+        if monitor is not None:
+            monitor.close()
         return self.get_result()
 
-    def simulate_timed_computation(self, wait_time=10):
+    def simulate_timed_computation(self, wait_time=10, halt_when=None):
         """
         A function to run the whole simulation of a membrane system
 
@@ -706,14 +1323,133 @@ class MembraneSystem(QObject):
         wait_time : int, optional
             the upper limit on the time of the computation in seconds
             (default is 10)
+        halt_when : HaltingCondition, optional
+            the condition that ends the computation early, checked before
+            every step (default is None)
         """
 
+        monitor = None if halt_when is None else halt_when.monitor(self)
         starting_time = time.time()
         while self.any_rule_applicable() and \
                 time.time() - starting_time < wait_time:
+            if monitor is not None and monitor.check():
+                break
             self.simulate_step()
+        if monitor is not None:
+            monitor.close()
         return self.get_result()
 
+    def record_computation(self, path, max_steps=1000):
+        """
+        A function to run the simulation of the membrane system while recording
+        every step into a trace file
+
+        The recorded trace can be replayed with `StepTrace` without running
+        the simulation again
+
+        Parameters
+        ----------
+        path : str
+            the path of the trace file
+        max_steps : int, optional
+            the upper limit on the number of recorded steps (default is 1000)
+
+        Returns
+        -------
+        int
+            the number of recorded steps
+        """
+
+        from StepTrace import TraceRecorder
+        with TraceRecorder(self, path) as recorder:
+            while recorder.num_of_steps < max_steps and \
+                    self.any_rule_applicable():
+                recorder.record_step()
+        return recorder.num_of_steps
+
+    def explore_state_space(self, **kwargs):
+        """
+        A function used to enumerate every configuration reachable from the
+        current configuration of the membrane system
+
+        Only usable for small systems, see `StateSpaceExplorer`
+
+        Parameters
+        ----------
+        **kwargs
+            the options of `StateSpaceExplorer` (e.g. `memory_limit`,
+            `spill_dir`, `max_states`)
+
+        Returns
+        -------
+        ExplorationResult
+            the reachable halting results and the looping components
+        """
+
+        from StateSpace import StateSpaceExplorer
+        return StateSpaceExplorer(self, **kwargs).explore()
+
+    def outcome_probabilities(self, **kwargs):
+        """
+        A function used to calculate the exact probabilities of the halting
+        results of the computations started from the current configuration
+
+        Only usable for systems with a small, finite state space, see
+        `ExplorationResult.outcome_probabilities()`
+
+        Parameters
+        ----------
+        **kwargs
+            the options of `StateSpaceExplorer`
+
+        Returns
+        -------
+        tuple
+            the {result: probability} pairs of the halting results, where a
+            result is the tuple of sorted (object, multiplicity) pairs, and
+            the probability of never halting
+        """
+
+        from fractions import Fraction
+        with self.explore_state_space(**kwargs) as result:
+            probabilities, loop_probabilities = result.outcome_probabilities()
+        return probabilities, sum(loop_probabilities, Fraction(0))
+
+    def prune_dead_rules(self):
+        """
+        A function used to remove the rules that can never be applied from
+        the current configuration, and to order the remaining rules of the
+        regions by dependency
+
+        Returns
+        -------
+        RuleAnalyzer
+            the analysis, whose `report()` lists the live and the removed
+            rules
+        """
+
+        from RuleAnalysis import RuleAnalyzer
+        analyzer = RuleAnalyzer(self).analyze()
+        analyzer.prune()
+        return analyzer
+
+    def get_state(self):
+        """
+        A function used to return a snapshot of the objects in the membrane
+        system
+
+        Returns
+        -------
+        dict
+            the {region_id: {object: multiplicity}} pairs, the environment's
+            objects are stored with the `ENVIRONMENT_ID` key
+        """
+
+        state = {r_id: dict(region.objects.objects) for r_id, region in
+                 self.regions.items()}
+        state[ENVIRONMENT_ID] = dict(self.environment.objects)
+        return state
+
     @classmethod
     def load_from_json_dict(cls, json_dict):
         """
@@ -724,6 +1460,9 @@ class MembraneSystem(QObject):
         subclasses, since each of them have to implement `create_model_from_str`
         and `parse_rule`, in order to be instantiable.
 
+        The rules are never modified in place, so equal rules are parsed once
+        and the same rule object is shared by the regions.
+
         Parameters
         ----------
         json_dict
@@ -745,16 +1484,16 @@ class MembraneSystem(QObject):
         model.environment.infinite_obj = set(
             env_infinite) if env_infinite else None
 
-        root_id = min(list(map(int, model.regions.keys())))
+        parsed_rules = {}
         for id in json_dict["rules"].keys():
             rule_list = json_dict["rules"][id]
             for rule in rule_list:
-                parsed_rule = cls.parse_rule(rule)
-                shifted_id = int(id) + root_id
-                model.regions[shifted_id].add_rule(parsed_rule)
+                parsed_rule = parsed_rules.get(rule)
+                if parsed_rule is None:
+                    parsed_rule = parsed_rules[rule] = cls.parse_rule(rule)
+                model.regions[int(id)].add_rule(parsed_rule)
         for id in json_dict["objects"].keys():
-            shifted_id = int(id) + root_id
-            model.regions[shifted_id].objects = MultiSet.string_to_multiset(
+            model.regions[int(id)].objects = MultiSet.string_to_multiset(
                 json_dict["objects"][id])
         return model
 
@@ -783,14 +1522,13 @@ class MembraneSystem(QObject):
                   "objects": {}}
 
         for r in self.regions.values():
-            result["objects"][r.id - self.get_root_id()] = str(
-                self.regions[r.id].objects)
+            result["objects"][r.id] = str(self.regions[r.id].objects)
             for _ in r.rules:
-                result["rules"][r.id - self.get_root_id()] = []
+                result["rules"][r.id] = []
 
         for r in self.regions.values():
             for rule in r.rules:
-                result["rules"][r.id - self.get_root_id()].append(str(rule))
+                result["rules"][r.id].append(str(rule))
         return result
 
     def save(self, path):
@@ -804,6 +1542,7 @@ class MembraneSystem(QObject):
             the string containing the file path
         """
 
+        import json
         json_dict = self.create_json_dict()
         with open(path, 'w') as save_file:
             json.dump(json_dict, save_file)
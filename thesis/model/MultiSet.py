@@ -25,6 +25,8 @@ class MultiSet:
         a dict containing the objects as keys and their multiplicity as values
     """
 
+    __slots__ = ('objects',)
+
     def __init__(self, init_objects=None):
         """
         A function used for initializing a multiset
@@ -353,6 +355,25 @@ class MultiSet:
         else:
             raise InvalidOperationException
 
+    def __mul__(self, factor):
+        """
+        A function used to multiply the multiplicities of the objects
+
+        Parameters
+        ----------
+        factor : int
+            the non-negative integer the multiplicities are multiplied by
+
+        Returns
+        -------
+        MultiSet
+            the new multiset containing `factor` times the objects of `self`
+        """
+
+        if not factor:
+            return MultiSet()
+        return MultiSet({obj: mul * factor for obj, mul in self.objects.items()})
+
     def is_empty(self):
         """
         A function used for determining whether the multiset contains no objects
@@ -0,0 +1,262 @@
+import math
+from array import array
+
+
+def encode_result(result):
+    """
+    A function used to convert the result of a computation to its canonical
+    form
+
+    The objects are single letters, thus they serve as their own identifiers,
+    and the pairs are sorted by them, so equal results have equal keys
+    regardless of the order in which their objects were produced
+
+    Parameters
+    ----------
+    result : dict
+        the {object: multiplicity} pairs returned by `get_result()`
+
+    Returns
+    -------
+    tuple
+        the sorted (object, multiplicity) pairs with positive multiplicity
+    """
+
+    return tuple(sorted((obj, mul) for obj, mul in result.items() if mul))
+
+
+def decode_result(key):
+    """
+    A function used to convert a canonical result back to a dictionary
+
+    Parameters
+    ----------
+    key : tuple
+        the result created by `encode_result()`
+
+    Returns
+    -------
+    dict
+        the {object: multiplicity} pairs
+    """
+
+    return dict(key)
+
+
+class OutcomeHistogram:
+    """
+    A class to represent the outcomes of a set of computations in a compact
+    form
+
+    Instead of the results of the single computations, only the number of
+    computations per canonical result is stored. The step counts are summed,
+    and the running times are counted in a fixed-width array of logarithmic
+    buckets (`BUCKETS_PER_OCTAVE` buckets per doubling from `MIN_TIME`), so
+    the size of the histogram does not depend on the number of computations.
+    Histograms of disjoint sets of computations can be merged, so the
+    workers can aggregate their own computations and send only the histogram
+    to the aggregator.
+
+    Attributes
+    ----------
+    counts : dict
+        the {canonical result: number of computations} pairs
+    num_of_sim : int
+        the number of computations
+    halted : int
+        the number of halted computations
+    steps : int
+        the total number of steps
+    time_sum : float
+        the total running time in seconds
+    time_min : float
+        the shortest running time in seconds
+    time_max : float
+        the longest running time in seconds
+    time_buckets : array
+        the number of computations per running time bucket
+    """
+
+    MIN_TIME = 1e-6
+    """The upper end of the first running time bucket in seconds"""
+
+    BUCKETS_PER_OCTAVE = 4
+    """The number of running time buckets per doubling"""
+
+    NUM_OF_BUCKETS = 160
+    """The number of running time buckets"""
+
+    def __init__(self):
+        """
+        A function used to initialize an empty histogram
+        """
+
+        self.counts = {}
+        self.num_of_sim = 0
+        self.halted = 0
+        self.steps = 0
+        self.time_sum = 0.0
+        self.time_min = math.inf
+        self.time_max = 0.0
+        self.time_buckets = array('q', bytes(8 * self.NUM_OF_BUCKETS))
+
+    def __len__(self):
+        return self.num_of_sim
+
+    def _bucket(self, elapsed):
+        """
+        A function used to return the index of the bucket of a running time
+        """
+
+        if elapsed <= self.MIN_TIME:
+            return 0
+        index = math.ceil(math.log2(elapsed / self.MIN_TIME) *
+                          self.BUCKETS_PER_OCTAVE)
+        return min(index, self.NUM_OF_BUCKETS - 1)
+
+    def add(self, result, steps, elapsed, halted):
+        """
+        A function used to add a computation to the histogram
+
+        Parameters
+        ----------
+        result : dict
+            the result of the computation
+        steps : int
+            the number of steps
+        elapsed : float
+            the running time in seconds
+        halted : bool
+            True if the computation halted
+        """
+
+        key = encode_result(result)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.num_of_sim += 1
+        self.halted += bool(halted)
+        self.steps += steps
+        self.time_sum += elapsed
+        self.time_min = min(self.time_min, elapsed)
+        self.time_max = max(self.time_max, elapsed)
+        self.time_buckets[self._bucket(elapsed)] += 1
+
+    def merge(self, other):
+        """
+        A function used to add the computations of another histogram
+
+        Parameters
+        ----------
+        other : OutcomeHistogram
+            the histogram to be added
+
+        Returns
+        -------
+        OutcomeHistogram
+            the histogram itself
+        """
+
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.num_of_sim += other.num_of_sim
+        self.halted += other.halted
+        self.steps += other.steps
+        self.time_sum += other.time_sum
+        self.time_min = min(self.time_min, other.time_min)
+        self.time_max = max(self.time_max, other.time_max)
+        for i, count in enumerate(other.time_buckets):
+            self.time_buckets[i] += count
+        return self
+
+    def median_time(self):
+        """
+        A function used to estimate the median running time from the buckets
+
+        Returns
+        -------
+        float
+            the geometric centre of the bucket of the median, clamped to the
+            shortest and the longest running time (0.0 if the histogram is
+            empty)
+        """
+
+        if not self.num_of_sim:
+            return 0.0
+        seen = 0
+        for i, count in enumerate(self.time_buckets):
+            seen += count
+            if 2 * seen >= self.num_of_sim:
+                break
+        centre = self.MIN_TIME * 2 ** ((i - 0.5) / self.BUCKETS_PER_OCTAVE)
+        return min(max(centre, self.time_min), self.time_max)
+
+    @classmethod
+    def from_replicas(cls, replicas):
+        """
+        A function used to create the histogram of computations
+
+        Parameters
+        ----------
+        replicas : iterable
+            the tuples returned by `simulate_replica()`
+
+        Returns
+        -------
+        OutcomeHistogram
+            the histogram of the computations
+        """
+
+        histogram = cls()
+        for replica in replicas:
+            histogram.add(*replica)
+        return histogram
+
+    def to_json_dict(self):
+        """
+        A function used to convert the histogram to a JSON serializable
+        dictionary
+
+        Returns
+        -------
+        dict
+            the dictionary, the results are stored as lists of
+            [object, multiplicity] pairs
+        """
+
+        return {"counts": [[list(map(list, key)), count] for key, count in
+                           self.counts.items()],
+                "num_of_sim": self.num_of_sim, "halted": self.halted,
+                "steps": self.steps, "time_sum": self.time_sum,
+                "time_min": None if self.time_min == math.inf else
+                self.time_min,
+                "time_max": self.time_max,
+                "time_buckets": list(self.time_buckets)}
+
+    @classmethod
+    def from_json_dict(cls, json_dict):
+        """
+        A function used to restore a histogram from the dictionary created by
+        `to_json_dict()`
+
+        Parameters
+        ----------
+        json_dict : dict
+            the dictionary of the histogram
+
+        Returns
+        -------
+        OutcomeHistogram
+            the restored histogram
+        """
+
+        histogram = cls()
+        histogram.counts = {tuple(map(tuple, key)): count for key, count in
+                            json_dict["counts"]}
+        histogram.num_of_sim = json_dict["num_of_sim"]
+        histogram.halted = json_dict["halted"]
+        histogram.steps = json_dict["steps"]
+        histogram.time_sum = json_dict["time_sum"]
+        histogram.time_min = math.inf if json_dict["time_min"] is None else \
+            json_dict["time_min"]
+        histogram.time_max = json_dict["time_max"]
+        histogram.time_buckets = array('q', json_dict["time_buckets"])
+        return histogram
@@ -0,0 +1,515 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from MembraneSystem import MembraneSystem, InvalidArgumentException
+from HaltingCondition import HaltingCondition
+from Outcomes import OutcomeHistogram
+from WorkerPool import model_from_dict, simulate_replica
+from BatchRunner import load_model_dict, outcome_key
+
+OBJECT_AXIS = re.compile(r'^([a-z])(?:@(\d+))?$')
+"""The pattern of the names of the object axes, e.g. `a` or `a@2`"""
+
+VALUES = re.compile(r'^(\d+)\.\.(\d+)(?::(\d+))?$')
+"""The pattern of the value ranges, e.g. `1..500` or `0..100:10`"""
+
+ENV_INF_AXIS = "env_inf"
+"""The name of the axis of the infinite objects of the environment"""
+
+RULES_AXIS = "rules"
+"""The name of the axis of the rule variants"""
+
+_sweep_state = {}
+
+
+class SweepGrid:
+    """
+    A class for describing the points of a parameter sweep, the cartesian
+    product of its axes
+
+    An object axis sets the multiplicity of an object in a region (the skin
+    if no region is given, the regions are identified as in the saved
+    files), the `env_inf` axis sets the infinite objects of the environment,
+    and the `rules` axis replaces the rules of some regions with a named
+    variant.
+
+    Attributes
+    ----------
+    axes : list
+        the (name, values) pairs of the axes
+    variants : dict
+        the {variant name: {region id: list of rule strings}} pairs
+    """
+
+    def __init__(self):
+        """
+        A function used to initialize an empty grid, which has a single
+        point, the base model
+        """
+
+        self.axes = []
+        self.variants = {}
+
+    def add_objects(self, obj, values, region=None):
+        """
+        A function used to add an axis of the multiplicity of an object
+
+        Parameters
+        ----------
+        obj : str
+            the object
+        values : iterable
+            the multiplicities
+        region : int, optional
+            the id of the region (default is None, the skin)
+
+        Returns
+        -------
+        SweepGrid
+            the grid itself
+        """
+
+        name = obj if region is None else f'{obj}@{region}'
+        if not OBJECT_AXIS.match(name):
+            raise ValueError(f"invalid object axis: {name}")
+        self.axes.append((name, [int(value) for value in values]))
+        return self
+
+    def add_infinite(self, values):
+        """
+        A function used to add an axis of the infinite objects of the
+        environment
+
+        Parameters
+        ----------
+        values : iterable
+            the strings of the infinite objects ('' for none)
+
+        Returns
+        -------
+        SweepGrid
+            the grid itself
+        """
+
+        self.axes.append((ENV_INF_AXIS, [value or '' for value in values]))
+        return self
+
+    def add_variants(self, variants):
+        """
+        A function used to add an axis of rule variants
+
+        Parameters
+        ----------
+        variants : dict
+            the {variant name: {region id: list of rule strings}} pairs, the
+            rules of the listed regions are replaced by the variant
+
+        Returns
+        -------
+        SweepGrid
+            the grid itself
+        """
+
+        self.variants = {name: {int(r_id): list(rules) for r_id, rules in
+                                variant.items()}
+                         for name, variant in variants.items()}
+        self.axes.append((RULES_AXIS, list(self.variants)))
+        return self
+
+    def names(self):
+        """
+        A function used to return the names of the axes
+
+        Returns
+        -------
+        list
+            the names in the order of the axes
+        """
+
+        return [name for name, _ in self.axes]
+
+    def points(self):
+        """
+        A function used to enumerate the points of the grid
+
+        Returns
+        -------
+        list
+            the {axis name: value} dictionaries of the points, the last axis
+            changing the fastest
+        """
+
+        names = self.names()
+        return [dict(zip(names, values)) for values in
+                itertools.product(*(values for _, values in self.axes))]
+
+    @staticmethod
+    def parse_values(string):
+        """
+        A function used to parse the values of an object axis
+
+        Parameters
+        ----------
+        string : str
+            an inclusive range with an optional step (`1..500`, `0..100:10`)
+            or a comma separated list (`1,2,5`)
+
+        Returns
+        -------
+        list
+            the values
+
+        Raises
+        ------
+        ValueError
+            if the string is not a valid list of values
+        """
+
+        match = VALUES.match(string)
+        if match:
+            start, stop, step = match.groups()
+            return list(range(int(start), int(stop) + 1, int(step or 1)))
+        return [int(value) for value in string.split(',')]
+
+
+def apply_point(model, point, variants):
+    """
+    A function used to set the parameters of a point on a model
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model to be modified
+    point : dict
+        the {axis name: value} pairs of the point
+    variants : dict
+        the {variant name: {region id: list of rules}} pairs of the parsed
+        rule variants
+    """
+
+    for name, value in point.items():
+        if name == ENV_INF_AXIS:
+            model.environment.infinite_obj = set(value) if value else None
+        elif name == RULES_AXIS:
+            for r_id, rules in variants[value].items():
+                model.regions[r_id].rules = list(rules)
+        else:
+            obj, region = OBJECT_AXIS.match(name).groups()
+            r_id = model.get_root_id() if region is None else int(region)
+            objects = model.regions[r_id].objects.objects
+            if value:
+                objects[obj] = value
+            else:
+                objects.pop(obj, None)
+
+
+def _init_sweep(json_dict, variants):
+    """
+    The initializer of the worker processes, parses the base model and the
+    rule variants once per process
+    """
+
+    template = model_from_dict(json_dict)
+    cls = template.__class__
+    _sweep_state["template"] = template
+    _sweep_state["variants"] = {
+        name: {r_id: [cls.parse_rule(rule) for rule in rules]
+               for r_id, rules in variant.items()}
+        for name, variant in variants.items()}
+
+
+def _run_point_chunk(point, seeds, max_steps, time_limit, halt_when):
+    """
+    The task of the workers, runs a chunk of replicas of a point
+
+    Returns
+    -------
+    OutcomeHistogram
+        the histogram of the replicas
+    """
+
+    template = _sweep_state["template"]
+    cls = template.__class__
+    point_model = cls.copy_system(template)
+    apply_point(point_model, point, _sweep_state["variants"])
+    return OutcomeHistogram.from_replicas(
+        simulate_replica(cls.copy_system(point_model), seed, max_steps,
+                         time_limit, False, halt_when)
+        for seed in seeds)
+
+
+def point_rows(index, point, histogram):
+    """
+    A function used to create the rows of a point in the result table, one
+    row per outcome
+
+    Parameters
+    ----------
+    index : int
+        the index of the point
+    point : dict
+        the {axis name: value} pairs of the point
+    histogram : OutcomeHistogram
+        the outcomes of the point
+
+    Returns
+    -------
+    list
+        the rows, each one has the index, the values of the axes, the number
+        of computations, the number of halted computations, the mean number
+        of steps, the outcome and its count
+    """
+
+    steps_mean = histogram.steps / histogram.num_of_sim if \
+        histogram.num_of_sim else 0.0
+    return [[index] + list(point.values()) +
+            [histogram.num_of_sim, histogram.halted, steps_mean,
+             outcome_key(dict(key)), count]
+            for key, count in sorted(histogram.counts.items(),
+                                     key=lambda item: -item[1])]
+
+
+def run_sweep(json_dict, grid, num_of_sim=100, seed=None, max_steps=None,
+              time_limit=None, halt_when=None, workers=None, chunk_size=None,
+              on_point=None, start_method=None):
+    """
+    A function used to run an ensemble at every point of a grid
+
+    The base model and the rule variants are parsed once per worker process.
+    Every point is split into chunks of replicas, the chunks of all points
+    are queued on the pool at once, so the idle workers take the next chunk
+    regardless of its point. A point is reported as soon as its last chunk
+    finishes. Replica `i` of point `p` is seeded with
+    `spawn_seed(spawn_seed(seed, p), i)`, so the results do not depend on
+    the scheduling.
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    grid : SweepGrid
+        the grid of the points
+    num_of_sim : int, optional
+        the number of computations per point (default is 100)
+    seed : int, optional
+        the seed of the sweep (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps (default is None)
+    time_limit : float, optional
+        the upper limit on the time of a computation (default is None)
+    halt_when : HaltingCondition, optional
+        the condition that ends the computations early (default is None)
+    workers : int, optional
+        the number of worker processes, 0 runs the sweep in this process
+        (default is the number of CPUs)
+    chunk_size : int, optional
+        the number of replicas per task (default splits every point into
+        about as many chunks as there are workers)
+    on_point : callable, optional
+        called with the index, the point and the histogram when a point
+        finishes (default is None)
+    start_method : str, optional
+        the `multiprocessing` start method of the workers (default is the
+        platform's default)
+
+    Returns
+    -------
+    list
+        the histograms of the points in the order of `grid.points()`
+
+    Raises
+    ------
+    InvalidArgumentException
+        if an axis or a variant refers to a region the model does not have
+    """
+
+    region_ids = {int(r_id) for r_id in json_dict["objects"]}
+    for name in grid.names():
+        match = OBJECT_AXIS.match(name)
+        if match and match.group(2) is not None and \
+                int(match.group(2)) not in region_ids:
+            raise InvalidArgumentException
+    if any(r_id not in region_ids for variant in grid.variants.values()
+           for r_id in variant):
+        raise InvalidArgumentException
+
+    points = grid.points()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-num_of_sim // max(1, workers)))
+
+    def seeds(index):
+        if seed is None:
+            return [None] * num_of_sim
+        point_seed = MembraneSystem.spawn_seed(seed, index)
+        return [MembraneSystem.spawn_seed(point_seed, i)
+                for i in range(num_of_sim)]
+
+    histograms = [None] * len(points)
+    if workers == 0:
+        _init_sweep(json_dict, grid.variants)
+        for index, point in enumerate(points):
+            histograms[index] = _run_point_chunk(point, seeds(index),
+                                                 max_steps, time_limit,
+                                                 halt_when)
+            if on_point is not None:
+                on_point(index, point, histograms[index])
+        return histograms
+
+    remaining = [0] * len(points)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_sweep,
+            initargs=(json_dict, grid.variants)) as executor:
+        futures = {}
+        for index, point in enumerate(points):
+            histograms[index] = OutcomeHistogram()
+            point_seeds = seeds(index)
+            for i in range(0, num_of_sim, chunk_size):
+                future = executor.submit(_run_point_chunk, point,
+                                         point_seeds[i:i + chunk_size],
+                                         max_steps, time_limit, halt_when)
+                futures[future] = index
+                remaining[index] += 1
+        for future in as_completed(futures):
+            index = futures[future]
+            histograms[index].merge(future.result())
+            remaining[index] -= 1
+            if not remaining[index] and on_point is not None:
+                on_point(index, points[index], histograms[index])
+    return histograms
+
+
+def create_parser():
+    """
+    A function used to create the parser of the command line arguments
+
+    Returns
+    -------
+    ArgumentParser
+        the parser of the parameter sweep
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Runs ensembles of a saved membrane system over a grid "
+                    "of initial multiplicities, infinite environment objects "
+                    "and rule variants")
+    parser.add_argument("model", help="the JSON file of the base model")
+    parser.add_argument("--objects", nargs='+', default=[],
+                        metavar="AXIS",
+                        help="object axes, e.g. 'a=1..500', 'b@2=0..100:10' "
+                             "(in region 2) or 'c=1,2,5'")
+    parser.add_argument("--env-inf", nargs='+', default=None,
+                        metavar="OBJECTS",
+                        help="the alternative infinite objects of the "
+                             "environment ('' for none)")
+    parser.add_argument("--variants", default=None,
+                        help="a JSON file of rule variants, {name: {region "
+                             "id: [rules]}}")
+    parser.add_argument("-n", "--num-of-sim", type=int, default=100,
+                        help="the number of computations per point")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="the number of worker processes (0 runs in this "
+                             "process)")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+                        help="the seed of the sweep")
+    parser.add_argument("-m", "--max-steps", type=int, default=None,
+                        help="the step budget of a computation")
+    parser.add_argument("-t", "--time-limit", type=float, default=None,
+                        help="the time budget of a computation in seconds")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="the number of replicas per task")
+    parser.add_argument("--halt-when", nargs='+', default=None,
+                        metavar="PREDICATE",
+                        help="stop a computation when any of the predicates "
+                             "holds (see BatchRunner.py)")
+    parser.add_argument("--halt-all", action='store_true',
+                        help="stop only when every predicate holds")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the CSV file of the results (default: the "
+                             "standard output)")
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the parameter sweep
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.num_of_sim < 1:
+        parser.error("the number of computations must be positive")
+    grid = SweepGrid()
+    try:
+        for axis in args.objects:
+            name, _, values = axis.partition('=')
+            match = OBJECT_AXIS.match(name)
+            if not match:
+                raise ValueError(f"invalid object axis: {axis}")
+            obj, region = match.groups()
+            grid.add_objects(obj, SweepGrid.parse_values(values),
+                             None if region is None else int(region))
+        halt_when = None if not args.halt_when else HaltingCondition.parse(
+            args.halt_when, args.halt_all)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.env_inf is not None:
+        grid.add_infinite(args.env_inf)
+
+    try:
+        json_dict = load_model_dict(args.model)
+        if args.variants is not None:
+            with open(args.variants, 'r') as variants_file:
+                grid.add_variants(json.load(variants_file))
+    except (OSError, ValueError, InvalidArgumentException):
+        print(f"{args.model}: not a valid model or variants file",
+              file=sys.stderr)
+        return 1
+
+    out_file = sys.stdout if args.output is None else \
+        open(args.output, 'w', newline='')
+    try:
+        writer = csv.writer(out_file)
+        writer.writerow(["point"] + grid.names() +
+                        ["num_of_sim", "halted", "steps_mean", "outcome",
+                         "count"])
+
+        def write_point(index, point, histogram):
+            writer.writerows(point_rows(index, point, histogram))
+            out_file.flush()
+
+        run_sweep(json_dict, grid, args.num_of_sim, args.seed,
+                  args.max_steps, args.time_limit, halt_when, args.workers,
+                  args.chunk_size, on_point=write_point)
+    except InvalidArgumentException:
+        print("an axis or a variant refers to a missing region",
+              file=sys.stderr)
+        return 1
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,852 @@
+import copy
+import heapq
+import multiprocessing
+import string
+import time
+import traceback
+from array import array
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+from BaseModel import BaseModel
+from MembraneSystem import MembraneSystem, InvalidArgumentException
+from Region import Region
+
+OBJECTS = string.ascii_lowercase
+"""The objects of the models, the columns of the shared count arrays"""
+
+NUM_OF_OBJECTS = len(OBJECTS)
+"""The number of columns of the shared count arrays"""
+
+SUBTREES_PER_WORKER = 4
+"""The number of subtrees the top of the tree is expanded to per worker, so
+they can be balanced among the workers"""
+
+COORDINATOR = 0
+"""The index of the owner of the top of the tree, the calling process"""
+
+DISSOLVED = -2
+"""The parent sent in an event when a region of a worker dissolves"""
+
+
+def plan_partition(parent_map, root_id, workers):
+    """
+    A function used to split the tree of a membrane system among the owners
+    of a partitioned simulation
+
+    Starting from the skin, the largest subtree is expanded into the top of
+    the tree, until there are `SUBTREES_PER_WORKER` subtrees per worker
+    hanging from it. The subtrees are then assigned whole to the workers, the
+    largest one to the least loaded worker first. Thus every region of a
+    worker has its children in the same worker, and only the regions
+    directly below the top (the boundary) have a parent in another process.
+
+    Parameters
+    ----------
+    parent_map : dict
+        the {region_id: parent_id} pairs of the tree
+    root_id : int
+        the identifier of the skin
+    workers : int
+        the number of worker processes
+
+    Returns
+    -------
+    dict
+        the {region_id: owner} pairs, the top of the tree is owned by
+        `COORDINATOR`, the workers are numbered from 1
+    """
+
+    children = {r_id: [] for r_id in parent_map}
+    for r_id, parent in parent_map.items():
+        if parent is not None:
+            children[parent].append(r_id)
+    sizes = {}
+    stack = [(root_id, False)]
+    while stack:
+        r_id, visited = stack.pop()
+        if visited:
+            sizes[r_id] = 1 + sum(sizes[child] for child in children[r_id])
+        else:
+            stack.append((r_id, True))
+            stack.extend((child, False) for child in children[r_id])
+
+    owners = {r_id: COORDINATOR for r_id in parent_map}
+    if workers < 1:
+        return owners
+    frontier = [(-sizes[root_id], root_id)]
+    while frontier and len(frontier) < SUBTREES_PER_WORKER * workers:
+        expandable = [item for item in frontier if children[item[1]]]
+        if not expandable:
+            break
+        item = min(expandable)
+        frontier.remove(item)
+        frontier.extend((-sizes[child], child) for child in children[item[1]])
+    if root_id in (r_id for _, r_id in frontier):
+        frontier.remove((-sizes[root_id], root_id))
+        frontier.extend((-sizes[child], child) for child in children[root_id])
+
+    loads = [(0, worker) for worker in range(1, workers + 1)]
+    for size, subtree in sorted(frontier):
+        load, worker = heapq.heappop(loads)
+        stack = [subtree]
+        while stack:
+            r_id = stack.pop()
+            owners[r_id] = worker
+            stack.extend(children[r_id])
+        heapq.heappush(loads, (load - size, worker))
+    return owners
+
+
+class SharedArrays:
+    """
+    A class for the arrays exchanged by the owners of a partitioned
+    simulation, every array is a block of `multiprocessing.shared_memory`
+
+    The arrays and their types are listed in `TYPES`, subclasses list their
+    own arrays.
+
+    Attributes
+    ----------
+    segments : dict
+        the {name: SharedMemory} pairs of the blocks
+    views : dict
+        the {name: memoryview} pairs of the typed views of the blocks
+    """
+
+    TYPES = {"down": 'q', "down_dirty": 'b', "up": 'q', "up_dirty": 'b',
+             "parent": 'i', "alive": 'b', "flags": 'b', "events": 'i'}
+    """The type codes of the arrays"""
+
+    def __init__(self, segments):
+        """
+        A function used to initialize the typed views of the blocks
+
+        Parameters
+        ----------
+        segments : dict
+            the {name: SharedMemory} pairs of the blocks
+        """
+
+        self.segments = segments
+        self.views = {name: segment.buf.cast(self.TYPES[name])
+                      for name, segment in segments.items()}
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["views"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def create(cls, lengths):
+        """
+        A function used to allocate zeroed arrays
+
+        Parameters
+        ----------
+        lengths : dict
+            the {name: number of items} pairs of the arrays
+
+        Returns
+        -------
+        SharedArrays
+            the arrays
+        """
+
+        segments = {}
+        for name, length in lengths.items():
+            size = max(1, length) * array(cls.TYPES[name]).itemsize
+            segment = shared_memory.SharedMemory(create=True, size=size)
+            segment.buf[:size] = bytes(size)
+            segments[name] = segment
+        return cls(segments)
+
+    @classmethod
+    def attach(cls, names):
+        """
+        A function used to attach to the arrays created by another process
+
+        Parameters
+        ----------
+        names : dict
+            the {name: block name} pairs returned by `names()`
+
+        Returns
+        -------
+        SharedArrays
+            the arrays
+        """
+
+        return cls({name: shared_memory.SharedMemory(name=block)
+                    for name, block in names.items()})
+
+    def names(self):
+        """
+        A function used to return the names of the blocks, used for
+        attaching to them
+
+        Returns
+        -------
+        dict
+            the {name: block name} pairs
+        """
+
+        return {name: segment.name for name, segment in self.segments.items()}
+
+    def close(self, unlink=False):
+        """
+        A function used to release the views and to close the blocks
+
+        Parameters
+        ----------
+        unlink : bool, optional
+            True if the blocks are also destroyed, done by the creator
+            (default is False)
+        """
+
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        for segment in self.segments.values():
+            segment.close()
+            if unlink:
+                segment.unlink()
+
+
+class PartitionTree:
+    """
+    A class standing in for the tree structure in the model of a partition,
+    the rules only need to recognize the skin
+
+    Attributes
+    ----------
+    root_id : int
+        the identifier of the skin
+    """
+
+    __slots__ = ('root_id',)
+
+    def __init__(self, root_id):
+        self.root_id = root_id
+
+    def get_root_id(self):
+        return self.root_id
+
+
+class PartitionModel(BaseModel):
+    """
+    A class to represent the regions owned by a process in a partitioned
+    simulation
+
+    The rules are selected and applied by the methods of the base model; only
+    the neighbourhood of the regions is looked up in the local maps instead
+    of the tree. A neighbour owned by another process is represented by a
+    ghost region, which only collects the objects sent to it in a step.
+
+    Attributes
+    ----------
+    parents : dict
+        the {region_id: parent_id} pairs of the known regions
+    children : dict
+        the {region_id: list of children identifiers} pairs of the owned
+        regions
+    ghosts : dict
+        the ghost regions keyed by their identifier
+    """
+
+    def __init__(self, regions, parents, children, root_id, seed=None):
+        """
+        A function used to initialize the model of a partition
+
+        Parameters
+        ----------
+        regions : dict
+            the owned regions keyed by their identifier, in the order of the
+            identifiers
+        parents : dict
+            the {region_id: parent_id} pairs of the owned regions (and of the
+            children of the owned regions owned by other processes)
+        children : dict
+            the {region_id: list of children identifiers} pairs of the owned
+            regions
+        root_id : int
+            the identifier of the skin
+        seed : int, optional
+            the seed of the random number generator (default is None)
+        """
+
+        super().__init__(tree=PartitionTree(root_id), regions=regions)
+        # the regions are not shown, the changes need not be signalled
+        for region in regions.values():
+            region.signal = None
+        self.parents = parents
+        self.children = children
+        self.ghosts = {}
+        self.seed(seed)
+
+    def lookup(self, region_id):
+        """
+        A function used to return an owned region or the ghost of a region
+        owned by another process
+
+        Parameters
+        ----------
+        region_id : int
+            the identifier of the region
+
+        Returns
+        -------
+        Region
+            the owned or the ghost region
+        """
+
+        region = self.regions.get(region_id)
+        if region is None:
+            region = self.ghosts.get(region_id)
+            if region is None:
+                region = self.ghosts[region_id] = Region(region_id)
+        return region
+
+    def get_parent_region(self, region):
+        return self.lookup(self.parents[region.id])
+
+    def get_all_children(self, region):
+        return [self.lookup(child) for child in self.children[region.id]]
+
+    def get_num_of_children(self, region):
+        return len(self.children[region.id])
+
+    def get_child(self, region):
+        children = self.children[region.id]
+        return self.lookup(self.rng.choice(children)) if children else None
+
+
+class PartitionOwner:
+    """
+    A class for the part of a partitioned simulation run by a process
+
+    A step has four phases separated by barriers:
+
+    1. the owned regions select and apply their rules, and the objects sent
+       to the ghosts are written to the shared arrays (`up` from a worker to
+       the top of the tree, `down` from the top to the boundary regions)
+    2. the received objects are added, the new objects are merged and the
+       dissolving regions are marked in `alive`
+    3. the objects of a dissolving region are moved to its nearest living
+       ancestor, like by dissolving the regions in the order of their
+       identifiers, and its children are attached to that ancestor in
+       `parent`; a worker reports its dissolved and new boundary regions in
+       `events`
+    4. the moved objects and the events are received, and every owner
+       publishes in `flags` whether its regions have an applicable rule
+
+    Attributes
+    ----------
+    index : int
+        the index of the owner (`COORDINATOR` for the top of the tree)
+    model : PartitionModel
+        the owned regions
+    arrays : SharedArrays
+        the shared arrays
+    barrier : multiprocessing.Barrier
+        the barrier of the owners
+    workers : int
+        the number of workers
+    top_slots : dict
+        the {region_id: slot} pairs of the regions at the top of the tree
+    boundary : set
+        the owned regions whose parent is at the top of the tree (only used
+        by the workers)
+    event_offsets : list
+        the start of the events of every worker in `events`
+    """
+
+    def __init__(self, index, model, arrays, barrier, workers, top_slots,
+                 boundary, event_offsets):
+        self.index = index
+        self.model = model
+        self.arrays = arrays
+        self.barrier = barrier
+        self.workers = workers
+        self.top_slots = top_slots
+        self.top_ids = sorted(top_slots, key=top_slots.get)
+        self.boundary = boundary
+        self.event_offsets = event_offsets
+
+    def nearest_alive(self, region_id):
+        """
+        A function used to return the nearest living ancestor of a region
+        """
+
+        parent, alive = self.arrays.parent, self.arrays.alive
+        ancestor = parent[region_id]
+        while not alive[ancestor]:
+            ancestor = parent[ancestor]
+        return ancestor
+
+    def send_up(self, region_id, objects):
+        """
+        A function used to write objects sent to a region at the top of the
+        tree to the block of the worker in `up`
+        """
+
+        slot = (self.index - 1) * len(self.top_slots) + \
+            self.top_slots[region_id]
+        up, base = self.arrays.up, slot * NUM_OF_OBJECTS
+        for obj, mul in objects.items():
+            up[base + ord(obj) - 97] += mul
+        self.arrays.up_dirty[slot] = 1
+
+    def receive_up(self, new_objects):
+        """
+        A function used to add the objects written by the workers to `up`
+        to the regions at the top of the tree
+
+        Parameters
+        ----------
+        new_objects : bool
+            True if the objects are added to the new objects of the regions
+            (the products of the rules), False if they are added to the
+            objects (the objects of dissolved regions)
+        """
+
+        up, up_dirty = self.arrays.up, self.arrays.up_dirty
+        num_of_top = len(self.top_ids)
+        for slot in range(self.workers * num_of_top):
+            if not up_dirty[slot]:
+                continue
+            up_dirty[slot] = 0
+            region = self.model.regions[self.top_ids[slot % num_of_top]]
+            objects = region.new_objects.objects if new_objects else \
+                region.objects.objects
+            base = slot * NUM_OF_OBJECTS
+            for column in range(NUM_OF_OBJECTS):
+                mul = up[base + column]
+                if mul:
+                    up[base + column] = 0
+                    obj = OBJECTS[column]
+                    objects[obj] = objects.get(obj, 0) + mul
+
+    def send_products(self):
+        """
+        A function used to write the objects collected by the ghosts to the
+        shared arrays
+        """
+
+        for region_id, ghost in self.model.ghosts.items():
+            objects = ghost.new_objects.objects
+            if not objects:
+                continue
+            if self.index == COORDINATOR:
+                down, base = self.arrays.down, region_id * NUM_OF_OBJECTS
+                for obj, mul in objects.items():
+                    down[base + ord(obj) - 97] += mul
+                self.arrays.down_dirty[region_id] = 1
+            else:
+                self.send_up(region_id, objects)
+            objects.clear()
+
+    def receive_products(self):
+        """
+        A function used to add the objects sent by the other processes to the
+        new objects of the owned regions
+        """
+
+        if self.index == COORDINATOR:
+            self.receive_up(new_objects=True)
+            return
+        down, down_dirty = self.arrays.down, self.arrays.down_dirty
+        for region_id in self.boundary:
+            if not down_dirty[region_id]:
+                continue
+            down_dirty[region_id] = 0
+            objects = self.model.regions[region_id].new_objects.objects
+            base = region_id * NUM_OF_OBJECTS
+            for column in range(NUM_OF_OBJECTS):
+                mul = down[base + column]
+                if mul:
+                    down[base + column] = 0
+                    obj = OBJECTS[column]
+                    objects[obj] = objects.get(obj, 0) + mul
+
+    def add_event(self, region_id, parent_id):
+        """
+        A function used to report a change of the boundary of a worker
+        """
+
+        events, offset = self.arrays.events, self.event_offsets[self.index]
+        count = events[offset]
+        events[offset + 1 + 2 * count] = region_id
+        events[offset + 2 + 2 * count] = parent_id
+        events[offset] = count + 1
+
+    def dissolve(self, dissolving):
+        """
+        A function used to remove the dissolving regions, moving their
+        objects to their nearest living ancestor and attaching their living
+        children to it
+
+        Parameters
+        ----------
+        dissolving : list
+            the dissolving owned regions
+        """
+
+        model = self.model
+        parent, alive = self.arrays.parent, self.arrays.alive
+        for region in dissolving:
+            target = self.nearest_alive(region.id)
+            if target in model.regions:
+                objects = model.regions[target].objects.objects
+                for obj, mul in region.objects.objects.items():
+                    objects[obj] = objects.get(obj, 0) + mul
+            else:
+                self.send_up(target, region.objects.objects)
+            del model.regions[region.id]
+            if region.id in self.boundary:
+                self.boundary.discard(region.id)
+                self.add_event(region.id, DISSOLVED)
+            else:
+                siblings = model.children.get(model.parents[region.id])
+                if siblings is not None:
+                    siblings.remove(region.id)
+        if dissolving and self.index == COORDINATOR:
+            self.arrays.flags[self.workers + 1] = 1
+
+        for region in dissolving:
+            for child in model.children.pop(region.id):
+                if not alive[child]:
+                    continue
+                ancestor = self.nearest_alive(child)
+                parent[child] = ancestor
+                model.parents[child] = ancestor
+                if ancestor in model.children:
+                    model.children[ancestor].append(child)
+                else:
+                    self.boundary.add(child)
+                    self.add_event(child, ancestor)
+            del model.parents[region.id]
+
+    def receive_events(self):
+        """
+        A function used to update the neighbourhood of the boundary regions
+        after the dissolutions
+        """
+
+        model = self.model
+        if self.index != COORDINATOR:
+            if self.arrays.flags[self.workers + 1]:
+                parent = self.arrays.parent
+                for region_id in self.boundary:
+                    model.parents[region_id] = parent[region_id]
+            return
+        self.receive_up(new_objects=False)
+        events = self.arrays.events
+        for worker in range(1, self.workers + 1):
+            offset = self.event_offsets[worker]
+            for k in range(events[offset]):
+                region_id = events[offset + 1 + 2 * k]
+                parent_id = events[offset + 2 + 2 * k]
+                if parent_id == DISSOLVED:
+                    siblings = model.children.get(
+                        model.parents.pop(region_id))
+                    if siblings is not None:
+                        siblings.remove(region_id)
+                    model.ghosts.pop(region_id, None)
+                else:
+                    model.parents[region_id] = parent_id
+                    model.children[parent_id].append(region_id)
+            events[offset] = 0
+
+    def step(self):
+        """
+        A function used to simulate a step of the owned regions
+        """
+
+        model = self.model
+        for region in list(model.regions.values()):
+            model.select_and_apply_rules(region)
+        self.send_products()
+        self.barrier.wait()
+
+        self.receive_products()
+        dissolving = []
+        for region in model.regions.values():
+            region.merge_new_objects()
+            if region.is_dissolving:
+                dissolving.append(region)
+                self.arrays.alive[region.id] = 0
+        self.barrier.wait()
+
+        self.dissolve(dissolving)
+        self.barrier.wait()
+
+        self.receive_events()
+        self.arrays.flags[self.index] = model.any_rule_applicable()
+        self.barrier.wait()
+        if self.index == COORDINATOR:
+            self.arrays.flags[self.workers + 1] = 0
+        model.step_counter += 1
+
+    def run(self, max_steps=None):
+        """
+        A function used to simulate the owned regions until no region has an
+        applicable rule or `max_steps` steps are done
+
+        Every owner reads the same flags after the last barrier of a step,
+        so they all stop after the same step.
+
+        Parameters
+        ----------
+        max_steps : int, optional
+            the upper limit on the number of steps (default is None)
+
+        Returns
+        -------
+        bool
+            True if the computation halted
+        """
+
+        flags = self.arrays.flags
+        flags[self.index] = self.model.any_rule_applicable()
+        self.barrier.wait()
+        while any(flags[:self.workers + 1]):
+            if max_steps is not None and self.model.step_counter >= max_steps:
+                return False
+            self.step()
+        return True
+
+    def get_state(self):
+        """
+        A function used to return the objects of the owned regions
+
+        Returns
+        -------
+        dict
+            the {region_id: {object: multiplicity}} pairs
+        """
+
+        return {r_id: dict(region.objects.objects) for r_id, region in
+                self.model.regions.items()}
+
+
+def _run_worker(index, part, names, barrier, queue, max_steps):
+    """
+    The entry point of the worker processes of a partitioned simulation,
+    builds the model of the partition, runs it and sends its final state
+    back
+    """
+
+    arrays = SharedArrays.attach(names)
+    try:
+        regions, parents, children, root_id, seed, workers, top_slots, \
+            offsets = part
+        model = PartitionModel(regions, parents, children, root_id, seed)
+        boundary = {r_id for r_id in regions if parents[r_id] in top_slots}
+        owner = PartitionOwner(index, model, arrays, barrier, workers,
+                               top_slots, boundary, offsets)
+        owner.run(max_steps)
+        queue.put((index, owner.get_state(), None))
+    except BrokenBarrierError:
+        queue.put((index, None, None))
+    except Exception:
+        barrier.abort()
+        queue.put((index, None, traceback.format_exc()))
+    finally:
+        owner = model = None
+        arrays.close()
+
+
+class PartitionedSimulation:
+    """
+    A class for simulating a single computation of a large base model by
+    several processes
+
+    The tree is split by `plan_partition()`: the calling process owns the
+    top of the tree, and every worker process owns whole subtrees hanging
+    from it. The processes step their own regions at the same time and
+    exchange only the objects crossing the boundary (sent in or out by the
+    rules, or left by dissolving regions) and the changes of the boundary,
+    through `SharedArrays` at the barriers of the steps. Dissolution moves
+    the objects to the nearest living ancestor, as dissolving in the order
+    of the identifiers does.
+
+    Each owner draws from its own random number generator (seeded with
+    `MembraneSystem.spawn_seed(seed, index)`), so a computation is
+    reproducible for a given seed and number of workers, and it has the same
+    distribution as the serial simulation, but not the same random choices.
+
+    Attributes
+    ----------
+    model : BaseModel
+        the simulated model, it is not modified
+    workers : int
+        the number of worker processes
+    owners : dict
+        the {region_id: owner} pairs returned by `plan_partition()`
+    seed : int
+        the seed of the computation
+    start_method : str
+        the start method of the worker processes
+    result : dict
+        the objects of the environment after `run()`
+    state : dict
+        the {region_id: {object: multiplicity}} pairs of the living regions
+        after `run()`
+    """
+
+    def __init__(self, model, workers=None, seed=None, start_method=None):
+        """
+        A function used to plan the partitions of a model
+
+        Parameters
+        ----------
+        model : BaseModel
+            the model to be simulated
+        workers : int, optional
+            the number of worker processes, 0 simulates the whole tree in the
+            calling process (default is the number of CPUs minus one)
+        seed : int, optional
+            the seed of the computation (default is None)
+        start_method : str, optional
+            the start method of the worker processes (default is the
+            platform's default)
+
+        Raises
+        ------
+        InvalidArgumentException
+            if the model is not a base model
+        """
+
+        if not isinstance(model, BaseModel):
+            raise InvalidArgumentException(
+                "only base models can be partitioned")
+        if workers is None:
+            workers = max(1, multiprocessing.cpu_count() - 1)
+        self.model = model
+        self.seed = seed
+        self.start_method = start_method
+        self.parent_map = model.tree.get_parent_map()
+        self.owners = plan_partition(self.parent_map, model.tree.get_root_id(),
+                                     workers)
+        self.workers = max(self.owners.values())
+        self.result = None
+        self.state = None
+
+    def _part(self, owner):
+        """
+        A function used to collect the regions and the neighbourhood of an
+        owner
+        """
+
+        owners, parent_map = self.owners, self.parent_map
+        regions, parents, children = {}, {}, {}
+        for r_id, region in self.model.regions.items():
+            if owners[r_id] == owner:
+                regions[r_id] = Region(r_id, dict(region.objects.objects),
+                                       region.rules)
+                parents[r_id] = parent_map[r_id]
+                children[r_id] = []
+        for r_id, parent in parent_map.items():
+            if parent in children:
+                children[parent].append(r_id)
+                parents[r_id] = parent
+        seed = None if self.seed is None else \
+            MembraneSystem.spawn_seed(self.seed, owner)
+        return regions, parents, children, seed
+
+    def run(self, max_steps=None):
+        """
+        A function used to run the computation
+
+        Parameters
+        ----------
+        max_steps : int, optional
+            the upper limit on the number of steps (default is None)
+
+        Returns
+        -------
+        tuple
+            the result, the number of steps, the running time in seconds and
+            True if the computation halted, like `simulate_replica()`
+
+        Raises
+        ------
+        RuntimeError
+            if a worker process failed
+        """
+
+        starting_time = time.perf_counter()
+        workers, owners = self.workers, self.owners
+        top_slots = {r_id: slot for slot, r_id in enumerate(
+            r_id for r_id in sorted(owners) if owners[r_id] == COORDINATOR)}
+        id_bound = max(owners) + 1
+        sizes = [0] * (workers + 1)
+        for owner in owners.values():
+            sizes[owner] += 1
+        offsets = [0] * (workers + 1)
+        for worker in range(2, workers + 1):
+            offsets[worker] = offsets[worker - 1] + 1 + 4 * sizes[worker - 1]
+        arrays = SharedArrays.create({
+            "down": id_bound * NUM_OF_OBJECTS, "down_dirty": id_bound,
+            "up": workers * len(top_slots) * NUM_OF_OBJECTS,
+            "up_dirty": workers * len(top_slots), "parent": id_bound,
+            "alive": id_bound, "flags": workers + 2,
+            "events": offsets[-1] + 1 + 4 * sizes[-1]})
+        for r_id, parent in self.parent_map.items():
+            arrays.parent[r_id] = -1 if parent is None else parent
+            arrays.alive[r_id] = 1
+
+        context = multiprocessing.get_context(self.start_method)
+        barrier = context.Barrier(workers + 1)
+        queue = context.Queue()
+        processes = []
+        try:
+            root_id = self.model.tree.get_root_id()
+            for worker in range(1, workers + 1):
+                regions, parents, children, seed = self._part(worker)
+                part = (regions, parents, children, root_id, seed, workers,
+                        top_slots, offsets)
+                process = context.Process(
+                    target=_run_worker, daemon=True,
+                    args=(worker, part, arrays.names(), barrier, queue,
+                          max_steps))
+                process.start()
+                processes.append(process)
+
+            regions, parents, children, seed = self._part(COORDINATOR)
+            model = PartitionModel(regions, parents, children, root_id, seed)
+            model.environment = copy.deepcopy(self.model.environment)
+            owner = PartitionOwner(COORDINATOR, model, arrays, barrier,
+                                   workers, top_slots, set(), offsets)
+            try:
+                halted = owner.run(max_steps)
+            except BrokenBarrierError:
+                halted = None
+            state = owner.get_state()
+            result = dict(model.environment.objects)
+            steps = model.step_counter
+            for _ in processes:
+                index, worker_state, error = queue.get()
+                if error is not None:
+                    raise RuntimeError(f"worker {index} failed:\n{error}")
+                if worker_state is None:
+                    raise RuntimeError(f"worker {index} stopped")
+                state.update(worker_state)
+            if halted is None:
+                raise RuntimeError("the barrier of the workers was broken")
+        except BaseException:
+            barrier.abort()
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+            owner = model = None
+            arrays.close(unlink=True)
+
+        self.result = result
+        self.state = dict(sorted(state.items()))
+        return result, steps, time.perf_counter() - starting_time, halted
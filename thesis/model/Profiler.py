@@ -0,0 +1,250 @@
+import json
+import time
+from collections import deque
+
+
+class StepProfiler:
+    """
+    A class for collecting timing and rule statistics about the simulation of
+    a membrane system
+
+    The profiler is attached to a model by `MembraneSystem.enable_profiling()`.
+    The phases of `simulate_step()` are timed by calling `lap()` at the end of
+    each phase, while the rule checks, the rule applications and the tree
+    lookups are counted by wrapping the model's methods on the instance, thus
+    a model without a profiler runs the original methods.
+
+    Attributes
+    ----------
+    phases : dict
+        the total wall time of the phases of the steps keyed by the phase name
+    calls : dict
+        the [number of calls, total wall time] lists of the wrapped methods
+        keyed by the method name
+    rules : dict
+        the [region_id, rule string, fires, checks, failed checks] lists keyed
+        by the (region_id, identifier of the rule object) pairs
+    steps : deque
+        the (step, {phase: wall time}, {region_id: number of objects}) tuples
+        of the profiled steps
+    max_steps : int
+        the number of the latest steps kept in `steps`
+    """
+
+    WRAPPED = ("any_rule_applicable", "get_parent_region", "get_child",
+               "get_num_of_children", "get_all_children")
+    """The names of the model's methods whose calls are timed"""
+
+    def __init__(self, max_steps=10000):
+        """
+        A function used to initialize an empty profiler
+
+        Parameters
+        ----------
+        max_steps : int, optional
+            the number of the latest steps kept (default is 10000)
+        """
+
+        self.max_steps = max_steps
+        self.reset()
+
+    def reset(self):
+        """
+        A function used to clear the collected statistics
+        """
+
+        self.phases = {}
+        self.calls = {}
+        self.rules = {}
+        self.steps = deque(maxlen=self.max_steps)
+        self._current = None
+        self._last = None
+
+    def attach(self, model):
+        """
+        A function used to wrap the methods of the model
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the profiled model
+        """
+
+        model.is_applicable = self._wrap_check(model.is_applicable)
+        model.apply = self._wrap_apply(model.apply)
+        model.apply_many = self._wrap_apply_many(model.apply_many)
+        for name in StepProfiler.WRAPPED:
+            setattr(model, name, self._wrap_call(name, getattr(model, name)))
+
+    @staticmethod
+    def detach(model):
+        """
+        A function used to restore the original methods of the model
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the profiled model
+        """
+
+        for name in ("is_applicable", "apply", "apply_many") + \
+                StepProfiler.WRAPPED:
+            model.__dict__.pop(name, None)
+
+    def _rule_entry(self, rule, region):
+        """
+        A function used to return the statistics of a rule, creating them on
+        the first call
+        """
+
+        key = (region.id, id(rule))
+        entry = self.rules.get(key)
+        if entry is None:
+            entry = [region.id, str(rule), 0, 0, 0]
+            self.rules[key] = entry
+        return entry
+
+    def _wrap_check(self, is_applicable):
+        """
+        A function used to wrap `is_applicable` to count the checks and the
+        failed checks of the rules
+        """
+
+        call = self.calls.setdefault("is_applicable", [0, 0.0])
+
+        def wrapper(rule, region):
+            starting_time = time.perf_counter()
+            result = is_applicable(rule, region)
+            call[0] += 1
+            call[1] += time.perf_counter() - starting_time
+            entry = self._rule_entry(rule, region)
+            entry[3] += 1
+            if not result:
+                entry[4] += 1
+            return result
+
+        return wrapper
+
+    def _wrap_apply(self, apply):
+        """
+        A function used to wrap `apply` to count the fires of the rules
+        """
+
+        call = self.calls.setdefault("apply", [0, 0.0])
+
+        def wrapper(rule, region):
+            starting_time = time.perf_counter()
+            apply(rule, region)
+            call[0] += 1
+            call[1] += time.perf_counter() - starting_time
+            self._rule_entry(rule, region)[2] += 1
+
+        return wrapper
+
+    def _wrap_apply_many(self, apply_many):
+        """
+        A function used to wrap `apply_many`, used by tau-leaping, to count
+        the fires of the rules
+        """
+
+        call = self.calls.setdefault("apply_many", [0, 0.0])
+
+        def wrapper(rule, region, count):
+            starting_time = time.perf_counter()
+            apply_many(rule, region, count)
+            call[0] += 1
+            call[1] += time.perf_counter() - starting_time
+            self._rule_entry(rule, region)[2] += count
+
+        return wrapper
+
+    def _wrap_call(self, name, method):
+        """
+        A function used to wrap a method to count its calls and time
+        """
+
+        call = self.calls.setdefault(name, [0, 0.0])
+
+        def wrapper(*args):
+            starting_time = time.perf_counter()
+            result = method(*args)
+            call[0] += 1
+            call[1] += time.perf_counter() - starting_time
+            return result
+
+        return wrapper
+
+    def start_step(self):
+        """
+        A function used to mark the start of a simulation step
+        """
+
+        self._current = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        A function used to mark the end of a phase of the current step
+
+        Parameters
+        ----------
+        phase : str
+            the name of the phase that ended
+        """
+
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._current[phase] = self._current.get(phase, 0.0) + elapsed
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        self._last = now
+
+    def end_step(self, model):
+        """
+        A function used to save the statistics of the finished step
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the profiled model
+        """
+
+        totals = {r_id: sum(region.objects.objects.values()) for r_id, region
+                  in model.regions.items()}
+        self.steps.append((model.step_counter, self._current, totals))
+        self._current = None
+
+    def report(self):
+        """
+        A function used to create the structured report of the statistics
+
+        Returns
+        -------
+        dict
+            the JSON serializable report
+        """
+
+        return {
+            "num_of_steps": len(self.steps),
+            "phases": dict(self.phases),
+            "calls": {name: {"count": count, "time": total} for
+                      name, (count, total) in self.calls.items()},
+            "rules": [{"region": r_id, "rule": rule, "fires": fires,
+                       "checks": checks, "failed_checks": failed} for
+                      r_id, rule, fires, checks, failed in
+                      sorted(self.rules.values())],
+            "steps": [{"step": step, "phases": phases, "objects": totals} for
+                      step, phases, totals in self.steps]
+        }
+
+    def save(self, path):
+        """
+        A function used to save the report into a JSON file
+
+        Parameters
+        ----------
+        path : str
+            the path of the report
+        """
+
+        with open(path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=2)
@@ -1,30 +1,15 @@
 from MultiSet import MultiSet
-from PySide6.QtCore import QObject, Signal
 
 
-class RegionSignal(QObject):
-    """
-    A class for representing the signals that the region emits when either
-    its objects or rules change
-
-    Attributes
-    ----------
-    obj_changed : Signal
-        a signal for communicating to the model that the regions' objects have
-        changed
-    rules_changed : Signal
-        a signal for communicating to the model that the regions' rules have
-        changed
-    """
-
-    obj_changed = Signal(int, str)
-    rules_changed = Signal(int, str)
-
-
-class Region(QObject):
+class Region:
     """
     A class for representing a region in a membranesystem
 
+    The regions do not own Qt objects, since a model may have millions of
+    them. Once a region is part of a model, its `signal` is the signal
+    object of the model, and the changes are emitted on it with the
+    identifier of the region.
+
     Attributes
     ----------
     is_dissolving : bool
@@ -32,15 +17,20 @@ class Region(QObject):
     id : int
         the identifier of the region
     new_objects : MultiSet
-        contains the newly generated objects in a simulation step
+        contains the newly generated objects in a simulation step, it is kept
+        for the whole life of the region and cleared in place after merging
     _objects : MultiSet
         contains the currently present objects in a simulation step
     _rules : list
         contains the evolution rules for the region
-    signal : RegionSignal
-        used for signaling changes in state to the model
+    signal : MembraneSignal
+        used for signaling changes in state to the model (None if the region
+        is not part of a model)
     """
 
+    __slots__ = ('is_dissolving', 'id', 'new_objects', '_objects', '_rules',
+                 'signal')
+
     def __init__(self, id, objects=None,
                  rules=None):
         """
@@ -61,7 +51,7 @@ class Region(QObject):
         self.new_objects = MultiSet()
         self._objects = MultiSet(objects)
         self._rules = [] if rules is None else rules
-        self.signal = RegionSignal()
+        self.signal = None
 
     @property
     def rules(self):
@@ -88,8 +78,8 @@ class Region(QObject):
             the list containing the rules we override the older ones with
         """
         self._rules = value
-        result = self.get_rule_string()
-        self.signal.rules_changed.emit(self.id, result)
+        if self.signal is not None:
+            self.signal.rules_changed.emit(self.id, self.get_rule_string())
 
     @property
     def objects(self):
@@ -116,8 +106,40 @@ class Region(QObject):
             the multiset containing the new state of `objects`
         """
 
-        self.signal.obj_changed.emit(self.id, str(value))
         self._objects = value
+        self.emit_objects()
+
+    def emit_objects(self):
+        """
+        A function used to signal the current objects of the region, after
+        they were modified in place
+
+        Emits `obj_changed`
+        """
+
+        if self.signal is not None:
+            self.signal.obj_changed.emit(self.id, str(self._objects))
+
+    def merge_new_objects(self):
+        """
+        A function used to add the objects produced in the step to the
+        objects of the region in place, and to clear `new_objects` for the
+        next step, so no multiset is allocated
+
+        Returns
+        -------
+        bool
+            True if the region received objects
+        """
+
+        new_objects = self.new_objects.objects
+        if not new_objects:
+            return False
+        objects = self._objects.objects
+        for obj, mul in new_objects.items():
+            objects[obj] = objects.get(obj, 0) + mul
+        new_objects.clear()
+        return True
 
     def __repr__(self):
         """
@@ -152,5 +174,5 @@ class Region(QObject):
             the rule to be added to the list of rules
         """
         self.rules.append(rule)
-        result = self.get_rule_string()
-        self.signal.rules_changed.emit(self.id, result)
+        if self.signal is not None:
+            self.signal.rules_changed.emit(self.id, self.get_rule_string())
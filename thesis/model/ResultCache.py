@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from HaltingCondition import CustomPredicate
+from Outcomes import OutcomeHistogram
+
+CACHE_VERSION = 1
+"""The version of the cached entries, it is part of every key, so changing
+it invalidates the earlier entries"""
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                           "membrane-results")
+"""The default folder of the cache, overridden by `MEMBRANE_CACHE_DIR`"""
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+"""The default upper limit on the size of the cache"""
+
+
+def canonical_model(json_dict):
+    """
+    A function used to create the canonical form of a saved membrane system
+
+    The objects of the regions and of the environment, and the infinite
+    objects are sorted, and the spaces are removed from the rules, so models
+    that only differ in the order of their objects have the same form. The
+    order of the rules is kept, since the rule selection depends on it for a
+    given seed.
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+
+    Returns
+    -------
+    dict
+        the canonical dictionary of the model
+    """
+
+    return {"type": json_dict["type"],
+            "structure": json_dict["structure"],
+            "objects": {str(r_id): ''.join(sorted(objects)) for r_id, objects
+                        in json_dict["objects"].items()},
+            "rules": {str(r_id): [rule.replace(' ', '') for rule in rules]
+                      for r_id, rules in json_dict["rules"].items()},
+            "env_obj": ''.join(sorted(json_dict["env_obj"])),
+            "env_inf": ''.join(sorted(json_dict["env_inf"] or ''))}
+
+
+def halting_key(halt_when):
+    """
+    A function used to create the canonical form of a halting condition
+
+    Parameters
+    ----------
+    halt_when : HaltingCondition
+        the halting condition (or None)
+
+    Returns
+    -------
+    list
+        the [type, object, count, region] lists of the predicates and the
+        `require_all` flag, or None if there is no condition
+
+    Raises
+    ------
+    ValueError
+        if the condition contains a `CustomPredicate`, whose function cannot
+        be compared
+    """
+
+    if halt_when is None:
+        return None
+    predicates = []
+    for predicate in halt_when.predicates:
+        if isinstance(predicate, CustomPredicate):
+            raise ValueError("custom predicates cannot be cached")
+        predicates.append([predicate.__class__.__name__, predicate.obj,
+                           predicate.count, predicate.region])
+    return [predicates, halt_when.require_all]
+
+
+class ResultCache:
+    """
+    A class for storing the outcome histograms of ensembles on disk
+
+    An entry is keyed by the canonical form of the model and the parameters
+    of the computations (the engine, the seed, the step limit and the
+    halting condition), but not by the number of computations: replica `i`
+    always has the seed `MembraneSystem.spawn_seed(seed, i)`, so a cached
+    histogram of `n` computations is the prefix of any larger ensemble, and
+    it can be extended with the computations `n, n+1, ...` instead of
+    starting over (see `extend()`).
+
+    The time limit is not part of the key, since a computation cut off by the
+    clock is not reproducible, so only the histograms whose computations all
+    halted, or were stopped by the step limit, are stored.
+
+    Every entry is a JSON file, written atomically. The modification time of
+    a file is refreshed when it is read, and the least recently used entries
+    are removed when the total size exceeds `max_bytes`.
+
+    Attributes
+    ----------
+    directory : str
+        the folder of the entries
+    max_bytes : int
+        the upper limit on the total size of the entries
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        A function used to initialize the cache, creating its folder
+
+        Parameters
+        ----------
+        directory : str, optional
+            the folder of the entries (default is `MEMBRANE_CACHE_DIR` or
+            `DEFAULT_DIR`)
+        max_bytes : int, optional
+            the upper limit on the total size of the entries (default is
+            `DEFAULT_MAX_BYTES`)
+        """
+
+        self.directory = directory or os.environ.get("MEMBRANE_CACHE_DIR",
+                                                     DEFAULT_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(json_dict, seed, max_steps=None, fast_forward=False,
+                 halt_when=None):
+        """
+        A function used to calculate the key of an ensemble
+
+        Parameters
+        ----------
+        json_dict : dict
+            the dictionary created by the model's `create_json_dict()`
+        seed : int
+            the seed of the ensemble
+        max_steps : int, optional
+            the upper limit on the number of steps (default is None)
+        fast_forward : bool, optional
+            True if the deterministic steps are jumped over (default is False)
+        halt_when : HaltingCondition, optional
+            the condition that ends the computations early (default is None)
+
+        Returns
+        -------
+        str
+            the hexadecimal SHA-256 digest of the key, or None if the
+            ensemble cannot be cached (it has no seed, or its halting
+            condition has a custom predicate)
+        """
+
+        if seed is None:
+            return None
+        try:
+            halting = halting_key(halt_when)
+        except ValueError:
+            return None
+        key = {"version": CACHE_VERSION, "model": canonical_model(json_dict),
+               "engine": "fast_forward" if fast_forward else "exact",
+               "seed": seed, "max_steps": max_steps, "halt_when": halting}
+        canonical = json.dumps(key, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key):
+        """
+        A function used to return the path of an entry
+        """
+
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        A function used to read an entry and to mark it as recently used
+
+        Parameters
+        ----------
+        key : str
+            the key created by `make_key()`
+
+        Returns
+        -------
+        OutcomeHistogram
+            the cached histogram, or None if it is not cached
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, 'r') as cache_file:
+                histogram = OutcomeHistogram.from_json_dict(
+                    json.load(cache_file))
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return histogram
+
+    def put(self, key, histogram):
+        """
+        A function used to store a histogram, replacing the earlier entry of
+        the key, and to evict the least recently used entries
+
+        Parameters
+        ----------
+        key : str
+            the key created by `make_key()`
+        histogram : OutcomeHistogram
+            the histogram to be stored
+        """
+
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+        with os.fdopen(handle, 'w') as tmp_file:
+            json.dump(histogram.to_json_dict(), tmp_file,
+                      separators=(',', ':'))
+        os.replace(tmp_path, self._path(key))
+        self.evict(keep=key)
+
+    def extend(self, key, num_of_sim, compute, bounded=False):
+        """
+        A function used to return the histogram of an ensemble, computing only
+        the replicas missing from the cached histogram of its key
+
+        A cached histogram of more computations than `num_of_sim` cannot be
+        cut, so the ensemble is computed without it, and it is not
+        overwritten. The new histogram is only stored if it is reproducible:
+        every computation halted, or they are only limited by their number of
+        steps.
+
+        Parameters
+        ----------
+        key : str
+            the key created by `make_key()`
+        num_of_sim : int
+            the number of computations
+        compute : callable
+            the function computing the histogram of the replicas `first,
+            ..., num_of_sim - 1`, called with `first` if a replica is missing
+        bounded : bool, optional
+            True if the computations have no time limit (default is False)
+
+        Returns
+        -------
+        tuple
+            the histogram of the ensemble and the number of the cached
+            replicas used
+        """
+
+        cached = self.get(key)
+        # a larger cached ensemble cannot be cut, and it is not overwritten
+        larger = cached is not None and cached.num_of_sim > num_of_sim
+        if larger:
+            cached = None
+        first = 0 if cached is None else cached.num_of_sim
+        if first == num_of_sim:
+            return cached or OutcomeHistogram(), first
+        histogram = compute(first)
+        if cached is not None:
+            histogram = cached.merge(histogram)
+        if not larger and (bounded or
+                           histogram.halted == histogram.num_of_sim):
+            self.put(key, histogram)
+        return histogram, first
+
+    def evict(self, keep=None):
+        """
+        A function used to remove the least recently used entries until the
+        total size is within `max_bytes`
+
+        Parameters
+        ----------
+        keep : str, optional
+            the key of an entry that is not removed (default is None)
+        """
+
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scanner:
+            for entry in scanner:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                total += stat.st_size
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        keep_path = None if keep is None else self._path(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        A function used to remove every entry
+        """
+
+        with os.scandir(self.directory) as scanner:
+            for entry in scanner:
+                if entry.name.endswith('.json'):
+                    os.remove(entry.path)
@@ -45,6 +45,8 @@ class Rule(metaclass=abc.ABCMeta):
     Abstact class describing an evolution rule in a membranesystem
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def weight(self):
         """
@@ -73,6 +75,8 @@ class BaseModelRule(Rule):
         the newly generated objects created by applying the rule to the region
     """
 
+    __slots__ = ('left_side', 'right_side')
+
     def __init__(self, left_side: Dict, right_side: Dict):
         """
          A function used to initialize a `BaseModelRule` instance
@@ -158,6 +162,8 @@ class DissolvingRule(BaseModelRule):
 
     """
 
+    __slots__ = ()
+
     def __str__(self):
         """
         A function used to generate the string representation of the rule
@@ -192,9 +198,26 @@ class PriorityRule:
 
     The 'weak' rule cannot be applied (or at least try to be applied) until
     the 'strong' rule CAN be applied
+
+    The weak rule can be a `PriorityRule` itself, so rules can be chained with
+    any number of priority levels. The chain is compiled into `levels` once,
+    when the rule is created, so the first applicable level can be found with
+    a single pass over the compiled left sides.
+
+    Attributes
+    ----------
+    strong_rule : Union[BaseModelRule,DissolvingRule]
+        the stronger rule
+    weak_rule : Union[BaseModelRule,DissolvingRule,PriorityRule]
+        the weaker rule (or the chain of the weaker rules)
+    levels : tuple
+        the (rule, needed (object, multiplicity) pairs, sends objects inwards,
+        dissolves) tuples of the levels, from the strongest to the weakest
     """
     avail_classes = ['BaseModelRule', 'DissolvingRule']
 
+    __slots__ = ('strong_rule', 'weak_rule', 'levels')
+
     def __init__(self, strong_rule, weak_rule):
         """
         A function used to initialize a `PriorityRule` instance
@@ -203,8 +226,8 @@ class PriorityRule:
         ----------
         strong_rule : Union[BaseModelRule,DissolvingRule]
             the stronger rule
-        weak_rule : Union[BaseModelRule,DissolvingRule]
-            the weaker rule
+        weak_rule : Union[BaseModelRule,DissolvingRule,PriorityRule]
+            the weaker rule, or the chain of the weaker rules
 
         Raises
         ------
@@ -213,11 +236,22 @@ class PriorityRule:
         """
 
         if strong_rule.__class__.__name__ in PriorityRule.avail_classes and \
-                weak_rule.__class__.__name__ in PriorityRule.avail_classes:
+                (weak_rule.__class__.__name__ in PriorityRule.avail_classes or
+                 isinstance(weak_rule, PriorityRule)):
             self.strong_rule = strong_rule
             self.weak_rule = weak_rule
         else:
             raise InvalidTypeException
+        strong_level = (strong_rule, tuple(strong_rule.left_side.items()),
+                        strong_rule.has_in_object(),
+                        isinstance(strong_rule, DissolvingRule))
+        if isinstance(weak_rule, PriorityRule):
+            self.levels = (strong_level,) + weak_rule.levels
+        else:
+            self.levels = (strong_level,
+                           (weak_rule, tuple(weak_rule.left_side.items()),
+                            weak_rule.has_in_object(),
+                            isinstance(weak_rule, DissolvingRule)))
 
     def __str__(self) -> str:
         """
@@ -252,6 +286,8 @@ class SymportRule(Rule):
         if both `import_obj` and `export_obj` are None
     """
 
+    __slots__ = ('rule_type', 'imported_obj', 'exported_obj')
+
     def __init__(self, rule_type, imported_obj=None, exported_obj=None):
         if imported_obj is None and exported_obj is None:
             raise InvalidTypeException
@@ -0,0 +1,331 @@
+import argparse
+import json
+import sys
+
+from Rule import (
+    PriorityRule,
+    DissolvingRule,
+    SymportRule,
+    Direction,
+    TransportationRuleType
+)
+from StepDelta import ENVIRONMENT_ID
+
+
+class RuleAnalyzer:
+    """
+    A class for finding the rules of a membrane system that can never be
+    applied from its current configuration
+
+    The analysis over-approximates the objects that can ever appear in the
+    regions by a fixpoint iteration on the producer/consumer graph of the
+    rules: a rule is live if the objects on its left side (ignoring their
+    multiplicities) can appear in the region it consumes them from, and the
+    objects produced by the live rules flow to the regions given by their
+    directions. Dissolvable regions pass their objects to their parents and
+    their children to the regions above them. Every rule not found live can
+    never fire, e.g. rules consuming objects that are never produced, rules
+    sending objects inwards from a leaf region or dissolving rules in the
+    skin.
+
+    The live rules are ordered by dependency, i.e. by the round of the
+    iteration in which they became live, so the rules enabled by the initial
+    objects come first.
+
+    Attributes
+    ----------
+    model : MembraneSystem
+        the analyzed membrane system
+    reachable : dict
+        the sets of the objects that can appear in the regions keyed by the
+        region identifiers, the environment has the `ENVIRONMENT_ID` key
+    dissolvable : set
+        the identifiers of the regions that can dissolve
+    layers : dict
+        the {region_id: [(round, rule)]} pairs of the live rules in dependency
+        order
+    dead : dict
+        the {region_id: [(rule, reason)]} pairs of the rules that can never
+        be applied
+    """
+
+    def __init__(self, model):
+        """
+        A function used to initialize the analyzer
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system to be analyzed
+        """
+
+        self.model = model
+        self.parents = model.tree.get_parent_map()
+        self.children = {r_id: [] for r_id in self.parents}
+        for r_id, parent_id in self.parents.items():
+            if parent_id is not None:
+                self.children[parent_id].append(r_id)
+        self.reachable = {}
+        self.dissolvable = set()
+        self.layers = {}
+        self.dead = {}
+
+    def analyze(self):
+        """
+        A function used to run the analysis
+
+        Returns
+        -------
+        RuleAnalyzer
+            the analyzer itself, with its attributes filled in
+        """
+
+        model = self.model
+        env = model.environment
+        self.reachable = {r_id: set(region.objects.objects) for r_id, region
+                          in model.regions.items()}
+        self.reachable[ENVIRONMENT_ID] = set(env.objects) | \
+            set(env.infinite_obj or ())
+        self.dissolvable = set()
+        live = {}
+        round_num = 0
+        changed = True
+        while changed:
+            round_num += 1
+            newly_live = [(r_id, rule) for r_id, region in
+                          model.regions.items() for rule in region.rules
+                          if (r_id, id(rule)) not in live and
+                          self._variants(rule, r_id)]
+            for r_id, rule in newly_live:
+                live[r_id, id(rule)] = round_num
+            changed = bool(newly_live)
+            for r_id, region in model.regions.items():
+                for rule in region.rules:
+                    if (r_id, id(rule)) in live:
+                        for variant in self._variants(rule, r_id):
+                            changed |= self._produce(variant, r_id)
+            for r_id in self.dissolvable:
+                parent_id = self.parents[r_id]
+                if not self.reachable[r_id] <= self.reachable[parent_id]:
+                    self.reachable[parent_id] |= self.reachable[r_id]
+                    changed = True
+
+        self.layers = {}
+        self.dead = {}
+        for r_id, region in model.regions.items():
+            order = sorted((live[r_id, id(rule)], i) for i, rule in
+                           enumerate(region.rules) if (r_id, id(rule)) in live)
+            self.layers[r_id] = [(layer, region.rules[i]) for layer, i in
+                                 order]
+            self.dead[r_id] = [(rule, self._reason(rule, r_id)) for rule in
+                               region.rules if (r_id, id(rule)) not in live]
+        return self
+
+    def _targets_in(self, r_id):
+        """
+        A function used to return the regions that can receive the objects
+        sent inwards from a region, including the children of dissolvable
+        children
+        """
+
+        targets = []
+        stack = list(self.children[r_id])
+        while stack:
+            child_id = stack.pop()
+            targets.append(child_id)
+            if child_id in self.dissolvable:
+                stack.extend(self.children[child_id])
+        return targets
+
+    def _source(self, r_id):
+        """
+        A function used to return the identifier of the region receiving the
+        objects sent outwards from a region (the environment for the skin)
+        """
+
+        parent_id = self.parents[r_id]
+        return ENVIRONMENT_ID if parent_id is None else parent_id
+
+    def _variants(self, rule, r_id):
+        """
+        A function used to return the concrete rules that can be applied
+        according to the current approximation (the strong and the weak rule
+        of a priority rule are checked separately)
+        """
+
+        if isinstance(rule, PriorityRule):
+            return self._variants(rule.strong_rule, r_id) + \
+                self._variants(rule.weak_rule, r_id)
+        if isinstance(rule, SymportRule):
+            if rule.rule_type != TransportationRuleType.SYMPORT_IN and \
+                    not set(rule.exported_obj.objects) <= self.reachable[r_id]:
+                return []
+            if rule.rule_type != TransportationRuleType.SYMPORT_OUT and \
+                    not set(rule.imported_obj.objects) <= \
+                    self.reachable[self._source(r_id)]:
+                return []
+            return [rule]
+        if isinstance(rule, DissolvingRule) and self.parents[r_id] is None:
+            return []
+        if rule.has_in_object() and not self.children[r_id]:
+            return []
+        if not set(rule.left_side.objects) <= self.reachable[r_id]:
+            return []
+        return [rule]
+
+    def _add(self, r_id, objects):
+        """
+        A function used to add objects to the approximation of a region
+
+        Returns
+        -------
+        bool
+            True if the approximation changed
+        """
+
+        before = len(self.reachable[r_id])
+        self.reachable[r_id] |= set(objects)
+        return len(self.reachable[r_id]) != before
+
+    def _produce(self, rule, r_id):
+        """
+        A function used to add the products of a live rule to the regions
+        they can reach
+
+        Returns
+        -------
+        bool
+            True if an approximation changed
+        """
+
+        changed = False
+        if isinstance(rule, SymportRule):
+            if rule.rule_type != TransportationRuleType.SYMPORT_IN:
+                changed |= self._add(self._source(r_id),
+                                     rule.exported_obj.objects)
+            if rule.rule_type != TransportationRuleType.SYMPORT_OUT:
+                changed |= self._add(r_id, rule.imported_obj.objects)
+            return changed
+
+        if isinstance(rule, DissolvingRule) and r_id not in self.dissolvable:
+            self.dissolvable.add(r_id)
+            changed = True
+        for (obj, direction), _ in rule.right_side:
+            if direction == Direction.HERE:
+                changed |= self._add(r_id, [obj])
+            elif direction == Direction.OUT:
+                changed |= self._add(self._source(r_id), [obj])
+            else:
+                for target_id in self._targets_in(r_id):
+                    changed |= self._add(target_id, [obj])
+        return changed
+
+    def _reason(self, rule, r_id):
+        """
+        A function used to explain why a rule can never be applied
+        """
+
+        if isinstance(rule, PriorityRule):
+            return f'{self._reason(rule.strong_rule, r_id)}; ' \
+                   f'{self._reason(rule.weak_rule, r_id)}'
+        if isinstance(rule, SymportRule):
+            missing = set()
+            if rule.rule_type != TransportationRuleType.SYMPORT_IN:
+                missing |= set(rule.exported_obj.objects) - \
+                    self.reachable[r_id]
+            if rule.rule_type != TransportationRuleType.SYMPORT_OUT:
+                missing |= set(rule.imported_obj.objects) - \
+                    self.reachable[self._source(r_id)]
+        elif isinstance(rule, DissolvingRule) and self.parents[r_id] is None:
+            return "the skin cannot dissolve"
+        elif rule.has_in_object() and not self.children[r_id]:
+            return "the region has no children"
+        else:
+            missing = set(rule.left_side.objects) - self.reachable[r_id]
+        return "never available: " + ' '.join(sorted(missing))
+
+    def get_num_of_dead_rules(self):
+        """
+        A function used to return the number of rules that can never be
+        applied
+
+        Returns
+        -------
+        int
+            the number of dead rules
+        """
+
+        return sum(len(rules) for rules in self.dead.values())
+
+    def report(self):
+        """
+        A function used to create the readable report of the analysis
+
+        Returns
+        -------
+        list
+            the lines of the report
+        """
+
+        lines = []
+        for r_id in self.layers:
+            lines.append(f'region {r_id}:')
+            for layer, rule in self.layers[r_id]:
+                lines.append(f'  live [{layer}] {rule}')
+            for rule, reason in self.dead[r_id]:
+                lines.append(f'  dead     {rule} ({reason})')
+        return lines
+
+    def prune(self):
+        """
+        A function used to remove the dead rules from the regions and to
+        order the remaining ones by dependency
+
+        Returns
+        -------
+        int
+            the number of removed rules
+        """
+
+        for r_id, region in self.model.regions.items():
+            rules = [rule for _, rule in self.layers[r_id]]
+            if rules != region.rules:
+                region.rules = rules
+        return self.get_num_of_dead_rules()
+
+
+def main(argv=None):
+    """
+    The entry point of the command line analyzer, prints the report of the
+    given model files
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments (default is `sys.argv[1:]`)
+
+    Returns
+    -------
+    int
+        the exit code of the program
+    """
+
+    from WorkerPool import model_from_dict
+
+    parser = argparse.ArgumentParser(
+        description="Reports the rules of saved membrane systems that can "
+                    "never be applied")
+    parser.add_argument("models", nargs='+',
+                        help="the model files saved by the application")
+    args = parser.parse_args(argv)
+    for path in args.models:
+        with open(path, 'r') as model_file:
+            analyzer = RuleAnalyzer(model_from_dict(json.load(model_file)))
+        analyzer.analyze()
+        print(f'{path}: {analyzer.get_num_of_dead_rules()} dead rules')
+        print('\n'.join(analyzer.report()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
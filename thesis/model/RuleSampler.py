@@ -0,0 +1,102 @@
+class RuleSampler:
+    """
+    A class for drawing the rules of a selection group uniformly, one at a
+    time, while the inapplicable ones are removed
+
+    The indices of the rules are kept in an array, the first `size` of which
+    are the remaining ones. A draw picks a uniform position among them, a
+    removal swaps the removed index with the last remaining one and shrinks
+    the remaining part, and a re-insertion grows it again, so every operation
+    takes constant time. Since each remaining index is drawn with the same
+    probability, the selection distribution is the same as drawing from a
+    list of the remaining indices.
+
+    Attributes
+    ----------
+    order : list
+        the permutation of the indices, the remaining ones first
+    positions : list
+        the position of every index in `order`
+    size : int
+        the number of remaining indices
+    """
+
+    __slots__ = ('order', 'positions', 'size')
+
+    def __init__(self, num_of_rules):
+        """
+        A function used to initialize the sampler with every index remaining
+
+        Parameters
+        ----------
+        num_of_rules : int
+            the number of rules in the group
+        """
+
+        self.order = list(range(num_of_rules))
+        self.positions = list(range(num_of_rules))
+        self.size = num_of_rules
+
+    def __len__(self):
+        return self.size
+
+    def draw(self, rng):
+        """
+        A function used to draw a remaining index uniformly
+
+        Parameters
+        ----------
+        rng : random.Random
+            the random number generator
+
+        Returns
+        -------
+        int
+            the drawn index
+        """
+
+        return self.order[rng.randrange(self.size)]
+
+    def _swap(self, position, other):
+        """
+        A function used to swap two positions of the permutation
+        """
+
+        order, positions = self.order, self.positions
+        first, second = order[position], order[other]
+        order[position], order[other] = second, first
+        positions[first], positions[second] = other, position
+
+    def remove(self, index):
+        """
+        A function used to remove an index from the remaining ones
+
+        Parameters
+        ----------
+        index : int
+            the index to be removed, it has to be remaining
+        """
+
+        self.size -= 1
+        self._swap(self.positions[index], self.size)
+
+    def restore(self, index):
+        """
+        A function used to make a removed index remaining again
+
+        Parameters
+        ----------
+        index : int
+            the index to be restored (nothing happens if it is remaining)
+        """
+
+        if self.positions[index] >= self.size:
+            self._swap(self.positions[index], self.size)
+            self.size += 1
+
+    def reset(self):
+        """
+        A function used to make every index remaining again
+        """
+
+        self.size = len(self.order)
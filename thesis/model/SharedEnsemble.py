@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+import os
+import traceback
+
+from Outcomes import OutcomeHistogram
+from PartitionedSimulation import SharedArrays, OBJECTS, NUM_OF_OBJECTS
+from WorkerPool import model_from_dict, simulate_replica
+
+NUM_OF_COLUMNS = 2 + NUM_OF_OBJECTS
+"""The number of columns of a replica in the result array: the number of
+steps, the halting flag and the multiplicities of the objects"""
+
+ERROR_SIZE = 4096
+"""The number of bytes kept from the end of the traceback of a failed
+worker"""
+
+
+class EnsembleArrays(SharedArrays):
+    """
+    A class for the shared arrays of an ensemble: the saved model, the seeds
+    of the replicas, the preallocated results and the error slots of the
+    workers
+    """
+
+    TYPES = {"model": 'B', "seeds": 'Q', "seeded": 'b', "results": 'q',
+             "elapsed": 'd', "counter": 'q', "errors": 'B'}
+    """The type codes of the arrays"""
+
+
+def _run_worker(worker, names, lock, max_steps, time_limit, fast_forward,
+                halt_when):
+    """
+    The entry point of the worker processes of a shared ensemble
+
+    The model is parsed once from the shared block, then the worker claims
+    the replicas one at a time by increasing the shared counter, and writes
+    their results to their rows, so nothing is sent back to the caller. If
+    the worker fails, the end of its traceback is written to its error slot.
+    """
+
+    arrays = EnsembleArrays.attach(names)
+    try:
+        counter = arrays.counter
+        template = model_from_dict(json.loads(bytes(
+            arrays.model[:counter[1]])))
+        cls = template.__class__
+        results, elapsed = arrays.results, arrays.elapsed
+        while True:
+            with lock:
+                index = counter[0]
+                counter[0] = index + 1
+            if index >= counter[2]:
+                break
+            seed = arrays.seeds[index] if arrays.seeded[index] else None
+            result, steps, elapsed[index], halted = simulate_replica(
+                cls.copy_system(template), seed, max_steps, time_limit,
+                fast_forward, halt_when)
+            base = index * NUM_OF_COLUMNS
+            results[base] = steps
+            results[base + 1] = halted
+            for obj, mul in result.items():
+                results[base + 2 + ord(obj) - 97] = mul
+    except Exception:
+        error = traceback.format_exc().encode()[-ERROR_SIZE:]
+        start = worker * ERROR_SIZE
+        arrays.errors[start:start + len(error)] = error
+    finally:
+        template = cls = None
+        arrays.close()
+
+
+def run_shared(json_dict, seeds, max_steps=None, time_limit=None,
+               fast_forward=False, halt_when=None, workers=None,
+               start_method=None, aggregate=False):
+    """
+    A function used to run the computations of a model on worker processes
+    that communicate through shared memory
+
+    The saved model is written once to a shared block and parsed once per
+    worker. The workers take the replicas from a shared counter, and every
+    replica writes its number of steps, its halting flag, its running time
+    and its result into its preallocated row, thus a replica costs a single
+    locked increment instead of a pickled task and a pickled result. The
+    results are single letter objects, as in every saved model.
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    seeds : list
+        the seeds of the replicas (None items use unseeded replicas)
+    max_steps : int, optional
+        the upper limit on the number of steps of a replica
+        (default is None)
+    time_limit : float, optional
+        the upper limit on the time of a replica in seconds
+        (default is None)
+    fast_forward : bool, optional
+        if True, the deterministic steps are jumped over (default is False)
+    halt_when : HaltingCondition, optional
+        the condition that ends the replicas early, it is sent once to every
+        worker, so its predicates have to be picklable (default is None)
+    workers : int, optional
+        the number of worker processes (default is the number of CPUs)
+    start_method : str, optional
+        the `multiprocessing` start method of the workers (default is the
+        platform's default)
+    aggregate : bool, optional
+        if True, the replicas are summarized in an `OutcomeHistogram`
+        (default is False)
+
+    Returns
+    -------
+    list
+        the tuples of `simulate_replica()` in the order of `seeds`, or
+        their `OutcomeHistogram` if `aggregate` is True
+
+    Raises
+    ------
+    RuntimeError
+        if a worker process failed, with the traceback of the worker
+    """
+
+    model = json.dumps(json_dict, separators=(',', ':')).encode()
+    num_of_sim = len(seeds)
+    workers = max(1, min(workers or os.cpu_count() or 1, num_of_sim))
+    arrays = EnsembleArrays.create({
+        "model": len(model), "seeds": num_of_sim, "seeded": num_of_sim,
+        "results": num_of_sim * NUM_OF_COLUMNS, "elapsed": num_of_sim,
+        "counter": 3, "errors": workers * ERROR_SIZE})
+    try:
+        arrays.model[:len(model)] = model
+        for index, seed in enumerate(seeds):
+            if seed is not None:
+                arrays.seeds[index] = seed
+                arrays.seeded[index] = 1
+        arrays.counter[1] = len(model)
+        arrays.counter[2] = num_of_sim
+
+        context = multiprocessing.get_context(start_method)
+        lock = context.Lock()
+        processes = [context.Process(
+            target=_run_worker, daemon=True,
+            args=(worker, arrays.names(), lock, max_steps, time_limit,
+                  fast_forward, halt_when))
+            for worker in range(workers if num_of_sim else 0)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        for worker in range(len(processes)):
+            error = bytes(arrays.errors[worker * ERROR_SIZE:
+                                        (worker + 1) * ERROR_SIZE])
+            if any(error):
+                raise RuntimeError(
+                    f"worker {worker} failed:\n"
+                    f"{error.rstrip(bytes(1)).decode(errors='replace')}")
+        failed = [process.exitcode for process in processes
+                  if process.exitcode]
+        if failed:
+            raise RuntimeError(f"worker processes exited with codes {failed}")
+
+        results, elapsed = arrays.results, arrays.elapsed
+        replicas = []
+        for index in range(num_of_sim):
+            row = results[index * NUM_OF_COLUMNS:
+                          (index + 1) * NUM_OF_COLUMNS].tolist()
+            replicas.append(({OBJECTS[column]: mul for column, mul in
+                              enumerate(row[2:]) if mul},
+                             row[0], elapsed[index], bool(row[1])))
+    finally:
+        arrays.close(unlink=True)
+    if aggregate:
+        return OutcomeHistogram.from_replicas(replicas)
+    return replicas
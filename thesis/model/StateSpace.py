@@ -0,0 +1,884 @@
+import hashlib
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from array import array
+from collections import OrderedDict, deque
+from fractions import Fraction
+from itertools import product
+
+from MultiSet import MultiSet
+
+
+class IncompleteExplorationException(Exception):
+    """
+    A class for signaling that the state space was not fully explored
+    """
+    pass
+
+
+def configuration(model):
+    """
+    A function used to create the canonical configuration of a membrane system
+
+    Since dissolving a region only removes it from the structure, the
+    structure is described by the identifiers of the remaining regions
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the membrane system
+
+    Returns
+    -------
+    tuple
+        the identifiers of the regions, the sorted (object, multiplicity)
+        pairs of the regions and the sorted pairs of the environment
+    """
+
+    ids = tuple(sorted(model.regions))
+    objects = tuple(tuple(sorted(model.regions[r_id].objects.objects.items()))
+                    for r_id in ids)
+    return ids, objects, tuple(sorted(model.environment.objects.items()))
+
+
+def result_key(result):
+    """
+    A function used to create the canonical form of a computation's result
+
+    Parameters
+    ----------
+    result : dict
+        the {object: multiplicity} pairs of the result
+
+    Returns
+    -------
+    tuple
+        the sorted (object, multiplicity) pairs
+    """
+
+    return tuple(sorted(result.items()))
+
+
+class _ScriptedRandom:
+    """
+    A class used in place of the model's random number generator to make the
+    choices inside `apply` predetermined
+
+    Attributes
+    ----------
+    script : list
+        the indices to be chosen by the consecutive calls
+    counts : list
+        the number of options of the consecutive calls
+    """
+
+    def __init__(self):
+        self.script = []
+        self.counts = []
+
+    def reset(self, script):
+        self.script = script
+        self.counts = []
+
+    def choice(self, seq):
+        position = len(self.counts)
+        self.counts.append(len(seq))
+        if position < len(self.script):
+            return seq[self.script[position]]
+        return seq[0]
+
+
+class VisitedStore:
+    """
+    A class for storing the visited configurations of an exploration
+
+    The configurations are identified by a 128 bit digest and numbered in the
+    order of their discovery. When the number of configurations kept in memory
+    reaches `memory_limit`, they are moved to an SQLite database in a
+    temporary directory.
+
+    Attributes
+    ----------
+    memory_limit : int
+        the number of configurations kept in memory
+    spilled : bool
+        True if some configurations have been moved to the disk
+    """
+
+    def __init__(self, memory_limit=1000000, spill_dir=None):
+        """
+        A function used to initialize an empty store
+
+        Parameters
+        ----------
+        memory_limit : int, optional
+            the number of configurations kept in memory (default is 1000000)
+        spill_dir : str, optional
+            the directory of the temporary database (default is the system's
+            temporary directory)
+        """
+
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.spilled = False
+        self._indices = {}
+        self._configs = {}
+        self._count = 0
+        self._db = None
+        self._db_dir = None
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def digest(config):
+        """
+        A function used to calculate the digest of a configuration
+
+        Parameters
+        ----------
+        config : tuple
+            the canonical configuration
+
+        Returns
+        -------
+        bytes
+            the 16 byte digest
+        """
+
+        return hashlib.blake2b(repr(config).encode(), digest_size=16).digest()
+
+    def add(self, config):
+        """
+        A function used to add a configuration to the store
+
+        Parameters
+        ----------
+        config : tuple
+            the canonical configuration
+
+        Returns
+        -------
+        tuple
+            the index of the configuration and a flag that is True if it has
+            not been visited before
+        """
+
+        key = VisitedStore.digest(config)
+        index = self._indices.get(key)
+        if index is None and self._db is not None:
+            row = self._db.execute("SELECT idx FROM states WHERE digest = ?",
+                                   (key,)).fetchone()
+            index = None if row is None else row[0]
+        if index is not None:
+            return index, False
+
+        index = self._count
+        self._count += 1
+        self._indices[key] = index
+        self._configs[index] = config
+        if len(self._indices) >= self.memory_limit:
+            self.spill()
+        return index, True
+
+    def get(self, index):
+        """
+        A function used to return the configuration with the given index
+
+        Parameters
+        ----------
+        index : int
+            the index of the configuration
+
+        Returns
+        -------
+        tuple
+            the canonical configuration
+        """
+
+        config = self._configs.get(index)
+        if config is None and self._db is not None:
+            row = self._db.execute("SELECT config FROM states WHERE idx = ?",
+                                   (index,)).fetchone()
+            config = None if row is None else pickle.loads(row[0])
+        return config
+
+    def spill(self):
+        """
+        A function used to move the configurations kept in memory to the disk
+        """
+
+        if self._db is None:
+            self._db_dir = tempfile.mkdtemp(prefix='pstates',
+                                            dir=self.spill_dir)
+            self._db = sqlite3.connect(os.path.join(self._db_dir,
+                                                    'states.db'))
+            self._db.execute("CREATE TABLE states (digest BLOB PRIMARY KEY, "
+                             "idx INTEGER UNIQUE, config BLOB)")
+        self._db.executemany(
+            "INSERT INTO states VALUES (?, ?, ?)",
+            ((key, index, pickle.dumps(self._configs[index])) for key, index
+             in self._indices.items()))
+        self._db.commit()
+        self._indices.clear()
+        self._configs.clear()
+        self.spilled = True
+
+    def close(self):
+        """
+        A function used to delete the temporary database
+        """
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            shutil.rmtree(self._db_dir, ignore_errors=True)
+
+
+def _solve(matrix, constants):
+    """
+    A function used to solve a system of linear equations by Gauss-Jordan
+    elimination, where the constants are {outcome: coefficient} dictionaries
+
+    Parameters
+    ----------
+    matrix : list
+        the rows of the nonsingular coefficient matrix (modified in place)
+    constants : list
+        the constants of the rows (modified in place)
+
+    Returns
+    -------
+    list
+        the {outcome: coefficient} dictionaries of the unknowns
+    """
+
+    size = len(matrix)
+    for column in range(size):
+        pivot = next(row for row in range(column, size) if matrix[row][column])
+        matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+        constants[column], constants[pivot] = constants[pivot], \
+            constants[column]
+        divisor = matrix[column][column]
+        matrix[column] = [value / divisor for value in matrix[column]]
+        constants[column] = {outcome: value / divisor for outcome, value in
+                             constants[column].items()}
+        for row in range(size):
+            factor = matrix[row][column]
+            if row == column or not factor:
+                continue
+            matrix[row] = [value - factor * pivot_value for value, pivot_value
+                           in zip(matrix[row], matrix[column])]
+            for outcome, value in constants[column].items():
+                constants[row][outcome] = constants[row].get(outcome, 0) - \
+                    factor * value
+    return constants
+
+
+class ExplorationResult:
+    """
+    A class for representing the result of a state space exploration
+
+    Attributes
+    ----------
+    num_of_states : int
+        the number of reachable configurations
+    num_of_transitions : int
+        the number of distinct (configuration, successor) pairs
+    results : dict
+        the {result: number of halting configurations} pairs, where a result
+        is the tuple of sorted (object, multiplicity) pairs
+    halting_states : list
+        the indices of the halting configurations
+    loops : list
+        the (indices, closed) pairs of the looping components, where `closed`
+        is True if no transition leaves the component
+    complete : bool
+        False if the exploration stopped at the limit of the states
+    """
+
+    def __init__(self, store, num_of_transitions, results, halting_states,
+                 loops, complete):
+        self._store = store
+        self.num_of_states = len(store)
+        self.num_of_transitions = num_of_transitions
+        self.results = results
+        self.halting_states = halting_states
+        self.loops = loops
+        self.complete = complete
+        self._transitions = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        A function used to delete the configurations spilled to the disk
+        """
+
+        self._store.close()
+
+    def get_configuration(self, index):
+        """
+        A function used to return a configuration found by the exploration
+
+        Parameters
+        ----------
+        index : int
+            the index of the configuration
+
+        Returns
+        -------
+        tuple
+            the canonical configuration
+        """
+
+        return self._store.get(index)
+
+    def get_results(self):
+        """
+        A function used to return the reachable halting results as
+        dictionaries
+
+        Returns
+        -------
+        list
+            the {object: multiplicity} dictionaries of the results
+        """
+
+        return [dict(result) for result in self.results]
+
+    def set_transitions(self, sources, targets, weights, halting_results):
+        """
+        A function used to store the weighted configuration graph used by
+        `outcome_probabilities()`
+
+        Parameters
+        ----------
+        sources : array
+            the source indices of the transitions
+        targets : array
+            the target indices of the transitions
+        weights : list
+            the probabilities of the transitions
+        halting_results : list
+            the results of the halting configurations in the order of
+            `halting_states`
+        """
+
+        self._transitions = (sources, targets, weights, halting_results)
+
+    def outcome_probabilities(self):
+        """
+        A function used to calculate the exact probability of every halting
+        result under the rule selection of `simulate_step()`
+
+        The configuration graph is a finite Markov chain whose absorbing
+        states are the halting configurations and the closed looping
+        components. The absorption probabilities are calculated component by
+        component in reverse topological order, the transient components with
+        a cycle are solved as a system of linear equations over fractions.
+
+        Returns
+        -------
+        tuple
+            the {result: probability} pairs of the halting results and the
+            list of the probabilities of getting stuck in the components of
+            `loops` (zero for the components that can be left)
+
+        Raises
+        ------
+        IncompleteExplorationException
+            if the exploration stopped at the limit of the states
+        """
+
+        if not self.complete or self._transitions is None:
+            raise IncompleteExplorationException
+        sources, targets, weights, halting_results = self._transitions
+        outgoing = [[] for _ in range(self.num_of_states)]
+        for source, target, weight in zip(sources, targets, weights):
+            outgoing[source].append((target, weight))
+        halting = dict(zip(self.halting_states, halting_results))
+        loop_index = {tuple(indices): i for i, (indices, closed) in
+                      enumerate(self.loops) if closed}
+
+        # the absorbing outcomes are the results and the indices of the
+        # closed loops
+        absorbed = [None] * self.num_of_states
+        components, _, _ = StateSpaceExplorer.strongly_connected_components(
+            self.num_of_states, sources, targets)
+        for component in components:
+            if len(component) == 1 and component[0] in halting:
+                absorbed[component[0]] = {halting[component[0]]: Fraction(1)}
+                continue
+            loop = loop_index.get(tuple(sorted(component)))
+            if loop is not None:
+                for member in component:
+                    absorbed[member] = {loop: Fraction(1)}
+                continue
+
+            position = {member: i for i, member in enumerate(component)}
+            matrix = [[Fraction(int(i == j)) for j in range(len(component))]
+                      for i in range(len(component))]
+            constants = []
+            for i, member in enumerate(component):
+                constant = {}
+                for target, weight in outgoing[member]:
+                    j = position.get(target)
+                    if j is not None:
+                        matrix[i][j] -= weight
+                        continue
+                    for outcome, probability in absorbed[target].items():
+                        constant[outcome] = constant.get(outcome, 0) + \
+                            weight * probability
+                constants.append(constant)
+            for member, solution in zip(component,
+                                        _solve(matrix, constants)):
+                absorbed[member] = solution
+
+        start = absorbed[0] if self.num_of_states else {}
+        probabilities = {outcome: probability for outcome, probability in
+                         start.items() if isinstance(outcome, tuple)}
+        loop_probabilities = [start.get(i, Fraction(0))
+                              for i in range(len(self.loops))]
+        return dict(sorted(probabilities.items())), loop_probabilities
+
+
+class StateSpaceExplorer:
+    """
+    A class for enumerating every configuration reachable from the current
+    configuration of a membrane system
+
+    A step is enumerated by following the selection procedure of the model
+    (see `MembraneSystem.get_selection_groups()`) with every possible choice,
+    using the model's own `is_applicable` and `apply`. The partial states of
+    the selection are memoized, so different orders of the same rule
+    applications are only followed once.
+
+    The exploration is meant for small systems, since the number of
+    configurations can grow exponentially.
+
+    Attributes
+    ----------
+    template : MembraneSystem
+        the copy of the model at the start of the exploration
+    initial : tuple
+        the canonical starting configuration
+    memory_limit : int
+        the number of visited configurations kept in memory
+    max_states : int
+        the upper limit on the number of explored configurations
+    cache_size : int
+        the number of configurations whose successors are memoized
+    """
+
+    def __init__(self, model, memory_limit=1000000, spill_dir=None,
+                 max_states=None, cache_size=10000):
+        """
+        A function used to initialize the explorer
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system to be explored (left unchanged)
+        memory_limit : int, optional
+            the number of visited configurations kept in memory
+            (default is 1000000)
+        spill_dir : str, optional
+            the directory of the spilled configurations (default is the
+            system's temporary directory)
+        max_states : int, optional
+            the upper limit on the number of explored configurations
+            (default is None)
+        cache_size : int, optional
+            the number of configurations whose successors are memoized
+            (default is 10000)
+        """
+
+        self.template = model.__class__.copy_system(model)
+        self.initial = configuration(model)
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.max_states = max_states
+        self.cache_size = cache_size
+        self._successors = OrderedDict()
+        self._rng = _ScriptedRandom()
+
+    def model_at(self, config):
+        """
+        A function used to create a model in the given configuration
+
+        Parameters
+        ----------
+        config : tuple
+            the canonical configuration
+
+        Returns
+        -------
+        MembraneSystem
+            the model in the configuration
+        """
+
+        ids, objects, env_objects = config
+        model = self.template.__class__.copy_system(self.template)
+        present = set(ids)
+        for r_id in [r_id for r_id in model.regions if r_id not in present]:
+            model.tree.preorder(model.tree.skin, model.tree.remove_node,
+                                lambda x: x.id == r_id)
+            del model.regions[r_id]
+        for r_id, region_objects in zip(ids, objects):
+            model.regions[r_id].objects.objects = dict(region_objects)
+        model.environment.objects = dict(env_objects)
+        model.rng = self._rng
+        return model
+
+    @staticmethod
+    def _snapshot(model):
+        """
+        A function used to capture the state of a model in the middle of the
+        selection of the rules
+        """
+
+        env = model.environment
+        return (tuple((tuple(sorted(region.objects.objects.items())),
+                       tuple(sorted(region.new_objects.objects.items())),
+                       region.is_dissolving)
+                      for region in model.regions.values()),
+                tuple(sorted(env.objects.items())),
+                tuple(sorted(env.new_objects.objects.items())))
+
+    @staticmethod
+    def _restore(model, snapshot):
+        """
+        A function used to put a model back into a captured state
+        """
+
+        regions, env_objects, env_new_objects = snapshot
+        for region, (objects, new_objects, is_dissolving) in zip(
+                model.regions.values(), regions):
+            region.objects.objects = dict(objects)
+            region.new_objects = MultiSet(dict(new_objects))
+            region.is_dissolving = is_dissolving
+        model.environment.objects = dict(env_objects)
+        model.environment.new_objects = MultiSet(dict(env_new_objects))
+
+    def _apply_all(self, model, snapshot, rule, region):
+        """
+        A function used to apply a rule with every possible choice made by
+        `apply` (e.g. the child receiving the objects sent inwards)
+
+        Returns
+        -------
+        dict
+            the {snapshot: probability} pairs of the outcomes
+        """
+
+        self._restore(model, snapshot)
+        self._rng.reset([])
+        model.apply(rule, region)
+        counts = self._rng.counts
+        if not counts:
+            return {self._snapshot(model): Fraction(1)}
+        probability = Fraction(1)
+        for count in counts:
+            probability /= count
+        outcomes = {}
+        for script in product(*(range(count) for count in counts)):
+            self._restore(model, snapshot)
+            self._rng.reset(list(script))
+            model.apply(rule, region)
+            outcome = self._snapshot(model)
+            outcomes[outcome] = outcomes.get(outcome, 0) + probability
+        return outcomes
+
+    def _expand(self, model, group, node):
+        """
+        A function used to return the states following a state of the
+        selection of a group
+
+        Every remaining rule is chosen with the same probability, like by
+        `random.choice` in `simulate_step()`
+
+        Returns
+        -------
+        list
+            the (probability, state) pairs of the following states
+        """
+
+        snapshot, remaining = node
+        children = []
+        for idx in remaining:
+            rule, region = group[idx]
+            self._restore(model, snapshot)
+            if model.is_applicable(rule, region):
+                for outcome, probability in self._apply_all(
+                        model, snapshot, rule, region).items():
+                    children.append((probability / len(remaining),
+                                     (outcome, remaining)))
+            else:
+                children.append((Fraction(1, len(remaining)),
+                                 (snapshot, remaining - {idx})))
+        return children
+
+    def _select_group(self, model, group, snapshot):
+        """
+        A function used to enumerate the states at the end of the selection
+        of a group of rules
+
+        Returns
+        -------
+        dict
+            the {snapshot: probability} pairs of the states at the end of the
+            selection
+        """
+
+        memo = {}
+        start = (snapshot, frozenset(range(len(group))))
+        stack = [start]
+        pending = {}
+        while stack:
+            node = stack[-1]
+            if node in memo:
+                stack.pop()
+                continue
+            if not node[1]:
+                memo[node] = {node[0]: Fraction(1)}
+                stack.pop()
+                continue
+            children = pending.get(node)
+            if children is None:
+                children = self._expand(model, group, node)
+                pending[node] = children
+            missing = [child for _, child in children if child not in memo]
+            if missing:
+                stack.extend(missing)
+                continue
+            finals = {}
+            for probability, child in children:
+                for final, child_probability in memo[child].items():
+                    finals[final] = finals.get(final, 0) + \
+                        probability * child_probability
+            memo[node] = finals
+            del pending[node]
+            stack.pop()
+        return memo[start]
+
+    def successors(self, config):
+        """
+        A function used to enumerate the configurations reachable in one step
+
+        Parameters
+        ----------
+        config : tuple
+            the canonical configuration
+
+        Returns
+        -------
+        dict
+            the {configuration: probability} pairs of the distinct successor
+            configurations in sorted order (empty if the configuration is
+            halting)
+        """
+
+        cached = self._successors.get(config)
+        if cached is not None:
+            self._successors.move_to_end(config)
+            return cached
+
+        model = self.model_at(config)
+        if not model.any_rule_applicable():
+            result = {}
+        else:
+            snapshots = {self._snapshot(model): Fraction(1)}
+            for group in model.get_selection_groups():
+                selected = {}
+                for snapshot, probability in snapshots.items():
+                    for final, final_probability in self._select_group(
+                            model, group, snapshot).items():
+                        selected[final] = selected.get(final, 0) + \
+                            probability * final_probability
+                snapshots = selected
+            found = {}
+            for snapshot, probability in snapshots.items():
+                self._restore(model, snapshot)
+                dissolving_regions = model.merge_new_objects()
+                for region in dissolving_regions:
+                    model.dissolve_region(region)
+                next_config = configuration(model)
+                found[next_config] = found.get(next_config, 0) + probability
+                if dissolving_regions:
+                    model = self.model_at(config)
+            result = dict(sorted(found.items()))
+
+        self._successors[config] = result
+        if len(self._successors) > self.cache_size:
+            self._successors.popitem(last=False)
+        return result
+
+    def explore(self):
+        """
+        A function used to explore the reachable configurations in a
+        breadth-first order
+
+        Returns
+        -------
+        ExplorationResult
+            the halting results and the looping components of the state space
+        """
+
+        store = VisitedStore(self.memory_limit, self.spill_dir)
+        sources = array('Q')
+        targets = array('Q')
+        weights = []
+        results = {}
+        halting_states = []
+        halting_results = []
+        complete = True
+
+        start, _ = store.add(self.initial)
+        queue = deque([(start, self.initial)])
+        while queue:
+            index, config = queue.popleft()
+            next_configs = self.successors(config)
+            if not next_configs:
+                halting_states.append(index)
+                key = result_key(self.model_at(config).get_result())
+                halting_results.append(key)
+                results[key] = results.get(key, 0) + 1
+                continue
+            for next_config, probability in next_configs.items():
+                next_index, is_new = store.add(next_config)
+                sources.append(index)
+                targets.append(next_index)
+                weights.append(probability)
+                if is_new:
+                    if self.max_states is not None and \
+                            len(store) > self.max_states:
+                        complete = False
+                    else:
+                        queue.append((next_index, next_config))
+
+        loops = StateSpaceExplorer.find_loops(len(store), sources, targets)
+        result = ExplorationResult(store, len(sources), results,
+                                   halting_states, loops, complete)
+        result.set_transitions(sources, targets, weights, halting_results)
+        return result
+
+    @staticmethod
+    def strongly_connected_components(num_of_states, sources, targets):
+        """
+        A static method used to find the strongly connected components of the
+        configuration graph
+
+        Parameters
+        ----------
+        num_of_states : int
+            the number of configurations
+        sources : array
+            the source indices of the transitions
+        targets : array
+            the target indices of the transitions
+
+        Returns
+        -------
+        tuple
+            the list of the components in reverse topological order (every
+            component precedes the components it can be reached from), and
+            the offsets and the targets of the transitions in CSR form
+        """
+
+        offsets = array('Q', bytes(8 * (num_of_states + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(num_of_states):
+            offsets[i + 1] += offsets[i]
+        edges = array('Q', bytes(8 * len(sources)))
+        position = array('Q', offsets)
+        for source, target in zip(sources, targets):
+            edges[position[source]] = target
+            position[source] += 1
+
+        # iterative version of Tarjan's algorithm
+        index_of = array('q', [-1]) * num_of_states
+        low = array('q', [0]) * num_of_states
+        on_stack = bytearray(num_of_states)
+        stack = []
+        components = []
+        counter = 0
+        for root in range(num_of_states):
+            if index_of[root] != -1:
+                continue
+            work = [(root, offsets[root])]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = edges[edge]
+                    if index_of[target] == -1:
+                        index_of[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append((target, offsets[target]))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], index_of[target])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components, offsets, edges
+
+    @staticmethod
+    def find_loops(num_of_states, sources, targets):
+        """
+        A static method used to find the strongly connected components of the
+        configuration graph in which the computation can loop
+
+        Parameters
+        ----------
+        num_of_states : int
+            the number of configurations
+        sources : array
+            the source indices of the transitions
+        targets : array
+            the target indices of the transitions
+
+        Returns
+        -------
+        list
+            the (indices, closed) pairs of the components containing a cycle,
+            `closed` is True if no transition leaves the component
+        """
+
+        components, offsets, edges = \
+            StateSpaceExplorer.strongly_connected_components(num_of_states,
+                                                             sources, targets)
+        loops = []
+        for component in components:
+            members = set(component)
+            targets_of = [edges[e] for m in component
+                          for e in range(offsets[m], offsets[m + 1])]
+            if len(component) > 1 or component[0] in targets_of:
+                closed = all(t in members for t in targets_of)
+                loops.append((sorted(component), closed))
+        return loops
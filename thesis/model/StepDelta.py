@@ -0,0 +1,217 @@
+ENVIRONMENT_ID = -1
+"""The identifier used for the environment in states and deltas"""
+
+
+class StepDelta:
+    """
+    A class for representing the changes caused by a single evolution step of
+    a membrane system
+
+    A state of the membrane system is a dictionary of {region_id: {object:
+    multiplicity}} pairs, where the environment is stored with the
+    `ENVIRONMENT_ID` key
+
+    Attributes
+    ----------
+    step : int
+        the number of the step that caused the changes
+    changes : dict
+        the dictionary containing {region_id: {object: difference}} pairs,
+        where the difference is the signed change of the multiplicity
+    dissolved : list
+        the list of (region_id, parent_id, child_ids) tuples of the regions
+        dissolved in the step, in the order of their dissolution
+    removed : dict
+        the {region_id: (node, region, position)} pairs of the dissolved
+        regions, used to put them back into the membrane system (only present
+        in deltas created during the simulation, not in recorded ones)
+    """
+
+    def __init__(self, step, changes=None, dissolved=None, removed=None):
+        """
+        A function used to initialize a `StepDelta` instance
+
+        Parameters
+        ----------
+        step : int
+            the number of the step that caused the changes
+        changes : dict, optional
+            the {region_id: {object: difference}} pairs (default is None)
+        dissolved : list, optional
+            the (region_id, parent_id, child_ids) tuples (default is None)
+        removed : dict, optional
+            the {region_id: (node, region, position)} pairs (default is None)
+        """
+
+        self.step = step
+        self.changes = {} if changes is None else changes
+        self.dissolved = [] if dissolved is None else dissolved
+        self.removed = {} if removed is None else removed
+
+    def __repr__(self):
+        """
+        A function used to generate the instance's representation
+
+        Returns
+        -------
+        str
+            the string containing the changes of the step
+        """
+
+        return f'StepDelta({self.step}, {self.changes}, {self.dissolved})'
+
+    @staticmethod
+    def diff(before, after):
+        """
+        A static method used to calculate the difference between two states of
+        the same region
+
+        Parameters
+        ----------
+        before : dict
+            the {object: multiplicity} pairs before the step
+        after : dict
+            the {object: multiplicity} pairs after the step
+
+        Returns
+        -------
+        dict
+            the {object: difference} pairs of the objects whose multiplicity
+            changed
+        """
+
+        result = {}
+        for obj, mul in after.items():
+            difference = mul - before.get(obj, 0)
+            if difference:
+                result[obj] = difference
+        for obj, mul in before.items():
+            if obj not in after:
+                result[obj] = -mul
+        return result
+
+    @classmethod
+    def from_states(cls, step, before, after, dissolved=None, removed=None):
+        """
+        A class method used to create the delta between two states of a
+        membrane system
+
+        Regions that are missing from one of the states are treated as empty.
+        The simulation compares only the regions touched by the step, this
+        comparison of full states is used for checking its deltas.
+
+        Parameters
+        ----------
+        step : int
+            the number of the step that caused the changes
+        before : dict
+            the state of the membrane system before the step
+        after : dict
+            the state of the membrane system after the step
+        dissolved : list, optional
+            the (region_id, parent_id, child_ids) tuples of the dissolved
+            regions (default is None)
+        removed : dict, optional
+            the {region_id: (node, region, position)} pairs of the dissolved
+            regions (default is None)
+
+        Returns
+        -------
+        StepDelta
+            the delta containing the changes
+        """
+
+        changes = {}
+        for r_id in before.keys() | after.keys():
+            difference = StepDelta.diff(before.get(r_id, {}),
+                                        after.get(r_id, {}))
+            if difference:
+                changes[r_id] = difference
+        return cls(step, changes, dissolved, removed)
+
+    def changed_regions(self):
+        """
+        A function used to return the identifiers of the regions whose objects
+        changed in the step
+
+        Returns
+        -------
+        set
+            the identifiers of the changed regions (including the environment)
+        """
+
+        return set(self.changes.keys())
+
+    def apply_objects(self, state, reverse=False):
+        """
+        A function used to apply the object changes of the delta to a state
+
+        Parameters
+        ----------
+        state : dict
+            the state to be modified in place
+        reverse : bool, optional
+            if True, the changes are undone instead (default is False)
+        """
+
+        sign = -1 if reverse else 1
+        for r_id, difference in self.changes.items():
+            objects = state.setdefault(r_id, {})
+            for obj, change in difference.items():
+                new_mul = objects.get(obj, 0) + sign * change
+                if new_mul:
+                    objects[obj] = new_mul
+                else:
+                    objects.pop(obj, None)
+
+    def apply_structure(self, parents, reverse=False):
+        """
+        A function used to apply the dissolutions of the delta to a parent map
+
+        Parameters
+        ----------
+        parents : dict
+            the {region_id: parent_id} pairs to be modified in place
+        reverse : bool, optional
+            if True, the dissolutions are undone instead (default is False)
+        """
+
+        if reverse:
+            for r_id, parent_id, child_ids in reversed(self.dissolved):
+                parents[r_id] = parent_id
+                for child_id in child_ids:
+                    parents[child_id] = r_id
+        else:
+            for r_id, parent_id, child_ids in self.dissolved:
+                for child_id in child_ids:
+                    parents[child_id] = parent_id
+                del parents[r_id]
+
+    def apply(self, state, parents, reverse=False):
+        """
+        A function used to apply both the object changes and the dissolutions
+        of the delta
+
+        Dissolved regions are removed from `state` when going forward and put
+        back when going backward
+
+        Parameters
+        ----------
+        state : dict
+            the state to be modified in place
+        parents : dict
+            the {region_id: parent_id} pairs to be modified in place
+        reverse : bool, optional
+            if True, the step is undone instead (default is False)
+        """
+
+        if reverse:
+            self.apply_structure(parents, reverse=True)
+            for r_id, _, _ in self.dissolved:
+                state.setdefault(r_id, {})
+            self.apply_objects(state, reverse=True)
+        else:
+            self.apply_objects(state)
+            self.apply_structure(parents)
+            for r_id, _, _ in self.dissolved:
+                state.pop(r_id, None)
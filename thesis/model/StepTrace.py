@@ -0,0 +1,415 @@
+import json
+import mmap
+import struct
+from array import array
+
+from StepDelta import StepDelta, ENVIRONMENT_ID
+
+MAGIC = b'PSTRACE1'
+END_MAGIC = b'PSTREND1'
+
+_LENGTH = struct.Struct('<Q')
+_RECORD_HEADER = struct.Struct('<II')
+_CHANGE = struct.Struct('<iIq')
+_DISSOLVED = struct.Struct('<iiI')
+_TRAILER = struct.Struct('<QQQ8s')
+
+
+class InvalidTraceException(Exception):
+    """
+    A class to signal that a file is not a valid step trace
+    """
+    pass
+
+
+class TraceRecorder:
+    """
+    A class responsible for recording the steps of a membrane system into a
+    trace file
+
+    The file starts with a header containing the configuration of the system
+    (as created by `create_json_dict`), followed by one binary record per step
+    holding the changed multiplicities and the dissolved regions. The file ends
+    with the symbol table and the offsets of the records, so that the trace can
+    be read with random access by `StepTrace`.
+
+    Region identifiers are stored as they are (the skin is always 0), the
+    environment is stored with the `ENVIRONMENT_ID` identifier.
+
+    Attributes
+    ----------
+    model : MembraneSystem
+        the membrane system being recorded
+    symbols : list
+        the list of the objects that appeared in the trace
+    offsets : array
+        the file offsets of the step records
+    """
+
+    def __init__(self, model, path):
+        """
+        A function used to initialize the recorder and to write the header of
+        the trace file
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system to be recorded
+        path : str
+            the path of the trace file
+        """
+
+        self.model = model
+        self.symbols = []
+        self._symbol_ids = {}
+        self.offsets = array('Q')
+
+        header = json.dumps({"model": model.create_json_dict(),
+                             "step": model.step_counter}).encode()
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._file.write(_LENGTH.pack(len(header)))
+        self._file.write(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def num_of_steps(self):
+        """
+        A getter method for the number of recorded steps
+
+        Returns
+        -------
+        int
+            the number of records written to the trace
+        """
+
+        return len(self.offsets)
+
+    def record_step(self):
+        """
+        A function used to simulate a single step of the model and to record
+        its changes
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step (None if no rule was applicable)
+        """
+
+        delta = self.model.simulate_step(return_delta=True)
+        if delta is not None:
+            self.write_delta(delta)
+        return delta
+
+    def _symbol_id(self, obj):
+        """
+        A function used to return the index of an object in the symbol table,
+        adding it to the table if it is not present yet
+        """
+
+        if obj not in self._symbol_ids:
+            self._symbol_ids[obj] = len(self.symbols)
+            self.symbols.append(obj)
+        return self._symbol_ids[obj]
+
+    def write_delta(self, delta):
+        """
+        A function used to append the record of a step to the trace
+
+        Parameters
+        ----------
+        delta : StepDelta
+            the changes caused by the step
+        """
+
+        self.offsets.append(self._file.tell())
+        changes = [(r_id, self._symbol_id(obj), change)
+                   for r_id, difference in delta.changes.items()
+                   for obj, change in difference.items()]
+        chunks = [_RECORD_HEADER.pack(len(changes), len(delta.dissolved))]
+        chunks.extend(_CHANGE.pack(*change) for change in changes)
+        for r_id, parent_id, child_ids in delta.dissolved:
+            chunks.append(_DISSOLVED.pack(r_id, parent_id, len(child_ids)))
+            chunks.append(struct.pack(f'<{len(child_ids)}i', *child_ids))
+        self._file.write(b''.join(chunks))
+
+    def close(self):
+        """
+        A function used to write the symbol table and the index of the records
+        and to close the trace file
+        """
+
+        if self._file.closed:
+            return
+        footer_offset = self._file.tell()
+        self._file.write(json.dumps({"symbols": self.symbols}).encode())
+        index_offset = self._file.tell()
+        self._file.write(self.offsets.tobytes())
+        self._file.write(_TRAILER.pack(footer_offset, index_offset,
+                                       len(self.offsets), END_MAGIC))
+        self._file.close()
+
+
+class StepTrace:
+    """
+    A class for reading a trace file written by `TraceRecorder`
+
+    The file is memory-mapped, thus opening a trace does not depend on the
+    number of recorded steps and every step can be read with random access
+
+    Attributes
+    ----------
+    model_dict : dict
+        the configuration of the membrane system at the start of the recording
+    start_step : int
+        the value of the model's step counter at the start of the recording
+    symbols : list
+        the objects appearing in the trace
+    num_of_steps : int
+        the number of recorded steps
+    """
+
+    def __init__(self, path):
+        """
+        A function used to open a trace file
+
+        Parameters
+        ----------
+        path : str
+            the path of the trace file
+
+        Raises
+        ------
+        InvalidTraceException
+            if the file is not a complete trace file
+        """
+
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise InvalidTraceException
+        try:
+            self._read_header()
+        except (InvalidTraceException, struct.error, ValueError):
+            self.close()
+            raise InvalidTraceException
+
+    def _read_header(self):
+        """
+        A function used to parse the header, the footer and the index of the
+        trace file
+        """
+
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC or len(mm) < len(MAGIC) + _TRAILER.size:
+            raise InvalidTraceException
+        footer_offset, index_offset, self.num_of_steps, end_magic = \
+            _TRAILER.unpack_from(mm, len(mm) - _TRAILER.size)
+        if end_magic != END_MAGIC:
+            raise InvalidTraceException
+
+        header_len, = _LENGTH.unpack_from(mm, len(MAGIC))
+        header_start = len(MAGIC) + _LENGTH.size
+        header = json.loads(bytes(mm[header_start:header_start + header_len]))
+        self.model_dict = header["model"]
+        self.start_step = header["step"]
+        self.symbols = json.loads(bytes(mm[footer_offset:index_offset]))[
+            "symbols"]
+        self._index = memoryview(mm)[
+                      index_offset:index_offset + 8 * self.num_of_steps].cast(
+            'Q')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """
+        A function that returns the number of recorded steps
+
+        Returns
+        -------
+        int
+            the number of steps in the trace
+        """
+
+        return self.num_of_steps
+
+    def delta(self, step):
+        """
+        A function used to read the changes of a recorded step
+
+        Parameters
+        ----------
+        step : int
+            the number of the step counted from the start of the recording,
+            must be in range [1, num_of_steps]
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step
+        """
+
+        assert 1 <= step <= self.num_of_steps
+
+        mm = self._mm
+        offset = self._index[step - 1]
+        num_of_changes, num_of_dissolved = _RECORD_HEADER.unpack_from(mm,
+                                                                      offset)
+        offset += _RECORD_HEADER.size
+
+        changes = {}
+        end = offset + num_of_changes * _CHANGE.size
+        for r_id, symbol, change in _CHANGE.iter_unpack(mm[offset:end]):
+            changes.setdefault(r_id, {})[self.symbols[symbol]] = change
+        offset = end
+
+        dissolved = []
+        for _ in range(num_of_dissolved):
+            r_id, parent_id, num_of_children = _DISSOLVED.unpack_from(mm,
+                                                                      offset)
+            offset += _DISSOLVED.size
+            child_ids = struct.unpack_from(f'<{num_of_children}i', mm, offset)
+            offset += 4 * num_of_children
+            dissolved.append((r_id, parent_id, list(child_ids)))
+        return StepDelta(step, changes, dissolved)
+
+    def close(self):
+        """
+        A function used to release the memory map and to close the file
+        """
+
+        if getattr(self, '_index', None) is not None:
+            self._index.release()
+            self._index = None
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+
+class TraceCursor:
+    """
+    A class used to move back and forth in a recorded trace
+
+    Moving by a few steps applies the recorded deltas (backwards in reverse),
+    long jumps start from the closest keyframe, which are saved while moving
+    forward
+
+    Attributes
+    ----------
+    trace : StepTrace
+        the trace being replayed
+    step : int
+        the current position in the trace
+    state : dict
+        the {region_id: {object: multiplicity}} state at the current position
+    parents : dict
+        the {region_id: parent_id} pairs of the regions existing at the
+        current position
+    keyframe_interval : int
+        the number of steps between two saved keyframes
+    """
+
+    def __init__(self, trace, state, parents, keyframe_interval=1000):
+        """
+        A function used to initialize the cursor at the start of the trace
+
+        Parameters
+        ----------
+        trace : StepTrace
+            the trace being replayed
+        state : dict
+            the state of the model at the start of the recording
+        parents : dict
+            the parent map of the model at the start of the recording
+        keyframe_interval : int, optional
+            the number of steps between two saved keyframes (default is 1000)
+        """
+
+        self.trace = trace
+        self.step = 0
+        self.state = state
+        self.parents = parents
+        self.keyframe_interval = keyframe_interval
+        self._keyframes = {}
+        self._save_keyframe()
+
+    def _save_keyframe(self):
+        """
+        A function used to save the current position as a keyframe
+        """
+
+        self._keyframes[self.step] = (
+            {r_id: dict(objects) for r_id, objects in self.state.items()},
+            dict(self.parents))
+
+    def _load_keyframe(self, step):
+        """
+        A function used to move the cursor to a saved keyframe
+        """
+
+        state, parents = self._keyframes[step]
+        self.step = step
+        self.state = {r_id: dict(objects) for r_id, objects in state.items()}
+        self.parents = dict(parents)
+
+    def seek(self, step):
+        """
+        A function used to move the cursor to the given step
+
+        Parameters
+        ----------
+        step : int
+            the target step, it is clamped to range [0, num_of_steps]
+
+        Returns
+        -------
+        tuple
+            the set of the identifiers of the regions whose objects changed and
+            a flag that is True if the structure changed
+        """
+
+        target = max(0, min(step, self.trace.num_of_steps))
+        changed = set()
+        structure_changed = False
+
+        keyframe = max(k for k in self._keyframes if k <= target)
+        if target - keyframe < abs(target - self.step):
+            old_state, old_parents = self.state, self.parents
+            self._load_keyframe(keyframe)
+            changed = {r_id for r_id in old_state.keys() | self.state.keys()
+                       if old_state.get(r_id) != self.state.get(r_id)}
+            structure_changed = old_parents != self.parents
+
+        while self.step < target:
+            delta = self.trace.delta(self.step + 1)
+            delta.apply(self.state, self.parents)
+            self.step += 1
+            changed |= delta.changed_regions()
+            if delta.dissolved:
+                structure_changed = True
+            if self.step % self.keyframe_interval == 0 and \
+                    self.step not in self._keyframes:
+                self._save_keyframe()
+
+        while self.step > target:
+            delta = self.trace.delta(self.step)
+            delta.apply(self.state, self.parents, reverse=True)
+            self.step -= 1
+            changed |= delta.changed_regions()
+            if delta.dissolved:
+                structure_changed = True
+
+        changed.discard(ENVIRONMENT_ID)
+        return changed, structure_changed
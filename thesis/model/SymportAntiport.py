@@ -1,5 +1,4 @@
 import copy
-import random
 import re
 
 from MembraneSystem import MembraneSystem, InvalidArgumentException
@@ -10,6 +9,7 @@ from Rule import (
 )
 from MembraneStructure import MembraneStructure, Node
 from Region import Region
+from RuleSampler import RuleSampler
 
 
 class SymportAntiport(MembraneSystem):
@@ -96,6 +96,11 @@ class SymportAntiport(MembraneSystem):
             the region that the rule is assigned to
         """
 
+        if self.touched is not None or self.dirty_regions is not None:
+            self.touch(region)
+            if region.id != self.get_root_id() and rule.rule_type != \
+                    TransportationRuleType.SYMPORT_OUT:
+                self.touch(self.get_parent_region(region))
         if rule.rule_type == TransportationRuleType.SYMPORT_IN:
             if region.id == self.get_root_id():
                 self.environment -= rule.imported_obj
@@ -121,6 +126,105 @@ class SymportAntiport(MembraneSystem):
                 parent.new_objects += rule.exported_obj
                 parent.objects -= rule.imported_obj
 
+    def apply_many(self, rule, region, count):
+        """
+        A function that overrides the base class's `apply_many`
+
+        Parameters
+        ----------
+        rule : SymportRule
+            the rule to be applied
+        region : Region
+            the region that the rule is assigned to
+        count : int
+            the number of applications
+        """
+
+        imported_obj = rule.imported_obj * count if rule.imported_obj \
+            is not None else None
+        exported_obj = rule.exported_obj * count if rule.exported_obj \
+            is not None else None
+        if self.touched is not None or self.dirty_regions is not None:
+            self.touch(region)
+            if region.id != self.get_root_id() and rule.rule_type != \
+                    TransportationRuleType.SYMPORT_OUT:
+                self.touch(self.get_parent_region(region))
+        # the objects are updated in place, the change is signalled when the
+        # new objects are merged at the end of the step
+        if rule.rule_type != TransportationRuleType.SYMPORT_IN:
+            objects = region.objects
+            objects -= exported_obj
+            self.changed_regions.add(region.id)
+            if self.get_root_id() == region.id:
+                self.environment.add_to_new_objects(exported_obj)
+            else:
+                self.get_parent_region(region).new_objects += exported_obj
+        if rule.rule_type != TransportationRuleType.SYMPORT_OUT:
+            if region.id == self.get_root_id():
+                self.environment -= imported_obj
+            else:
+                parent = self.get_parent_region(region)
+                parent_objects = parent.objects
+                parent_objects -= imported_obj
+                self.changed_regions.add(parent.id)
+            region.new_objects += imported_obj
+
+    def get_consumption(self, rule, region):
+        """
+        A function that overrides the base class's `get_consumption`
+
+        Parameters
+        ----------
+        rule : SymportRule
+            the rule to be applied
+        region : Region
+            the region that the rule is assigned to
+
+        Returns
+        -------
+        list
+            the (multiset, consumed multiset) pairs of the rule
+        """
+
+        consumption = []
+        if rule.rule_type != TransportationRuleType.SYMPORT_IN:
+            consumption.append((region.objects, rule.exported_obj))
+        if rule.rule_type != TransportationRuleType.SYMPORT_OUT:
+            if region.id == self.get_root_id():
+                consumption.append((self.environment, rule.imported_obj))
+            else:
+                consumption.append((self.get_parent_region(region).objects,
+                                    rule.imported_obj))
+        return consumption
+
+    def get_production(self, rule, region):
+        """
+        A function that overrides the base class's `get_production`
+
+        Parameters
+        ----------
+        rule : SymportRule
+            the rule to be applied
+        region : Region
+            the region that the rule is assigned to
+
+        Returns
+        -------
+        list
+            the (multiset, produced multiset) pairs of the rule
+        """
+
+        production = []
+        if rule.rule_type != TransportationRuleType.SYMPORT_OUT:
+            production.append((region.objects, rule.imported_obj))
+        if rule.rule_type != TransportationRuleType.SYMPORT_IN:
+            if region.id == self.get_root_id():
+                production.append((self.environment, rule.exported_obj))
+            else:
+                production.append((self.get_parent_region(region).objects,
+                                   rule.exported_obj))
+        return production
+
     def is_applicable(self, rule, region):
         """
         A function that checks if a rule can be applied to a region
@@ -170,30 +274,101 @@ class SymportAntiport(MembraneSystem):
             else:
                 return False
 
-    def simulate_step(self):
+    def simulate_step(self, return_delta=False):
         """
         A function to simulate a single evolution step in the membrane system
 
         The order in which the rules are selected across all the regions has
         to be random, in order to guarantee non-determinisic behaviour
+
+        Parameters
+        ----------
+        return_delta : bool, optional
+            if True, the changes caused by the step are returned even if the
+            history is disabled (default is False)
+
+        Returns
+        -------
+        StepDelta
+            the changes caused by the step (None if neither `return_delta` nor
+            the history is enabled)
         """
 
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_step()
         if not self.any_rule_applicable():
             self.signal.sim_over.emit([self.get_result()])
             return
 
+        if profiler is not None:
+            profiler.lap("applicability")
+        before = self.begin_delta() if self.is_capturing_delta(
+            return_delta) else None
+        if profiler is not None:
+            profiler.lap("history")
         self.select_and_apply_rules()
+        if profiler is not None:
+            profiler.lap("rules")
 
-        for region in self.regions.values():
-            region.objects += region.new_objects
-            region.new_objects = MultiSet()
-
-        for obj, mul in self.environment.new_objects:
-            self.environment.add_object(obj, mul)
-        self.environment.new_objects = MultiSet()
+        self.merge_new_objects()
+        if profiler is not None:
+            profiler.lap("merge")
 
         self.step_counter += 1
+        delta = None if before is None else self.finish_delta(before, [])
+        if profiler is not None:
+            profiler.lap("history")
         self.signal.sim_step_over.emit(self.step_counter)
+        if profiler is not None:
+            profiler.lap("signals")
+            profiler.end_step(self)
+        return delta
+
+    def merge_new_objects(self):
+        """
+        A function used to add the objects produced in the step to the objects
+        of the regions and the environment
+
+        Returns
+        -------
+        list
+            the regions marked for dissolution (always empty, since regions
+            cannot dissolve in this type of system)
+        """
+
+        changed = self.changed_regions
+        tracking = self.touched is not None or \
+            self.dirty_regions is not None
+        for region in self.regions.values():
+            if tracking and region.new_objects.objects:
+                self.touch(region)
+            if region.merge_new_objects() or region.id in changed:
+                region.emit_objects()
+        changed.clear()
+
+        new_objects = self.environment.new_objects.objects
+        for obj, mul in new_objects.items():
+            self.environment.add_object(obj, mul)
+        new_objects.clear()
+        return []
+
+    def get_selection_groups(self):
+        """
+        A function used to return the groups of the rules that are selected
+        together in a step
+
+        In the symport/antiport system every rule of every region is selected
+        from a single pool
+
+        Returns
+        -------
+        list
+            the list containing the list of every (rule, region) pair
+        """
+
+        return [[(rule, region) for region in self.regions.values() for rule
+                 in region.rules]]
 
     def get_result(self):
         """
@@ -234,10 +409,13 @@ class SymportAntiport(MembraneSystem):
         structure_str = copy.deepcopy(ms.structure_str)
         out_id = copy.deepcopy(ms.output_id)
 
+        # the memo is shared, so the rules shared by regions stay shared
+        rule_memo = {}
         regions_dict = {k: [None, None] for k in ms.regions.keys()}
         for r_id, rule in ms.regions.items():
             regions_dict[r_id][0] = copy.deepcopy(ms.regions[r_id].objects.objects)
-            regions_dict[r_id][1] = copy.deepcopy(ms.regions[r_id].rules)
+            regions_dict[r_id][1] = copy.deepcopy(ms.regions[r_id].rules,
+                                                  rule_memo)
 
         regions = {r_id: Region(r_id, l[0], l[1]) for r_id, l in
                    regions_dict.items()}
@@ -251,25 +429,22 @@ class SymportAntiport(MembraneSystem):
         A function responsible for non-deterministically selecting rules in
         the whole membrane system and then applying them
 
-        The randomness is guaranteed by `random.choice` method's uniform
-        distribution 
+        The randomness is guaranteed by the uniform draws of a `RuleSampler`
+        using the model's random number generator
         """
 
-        rule_indices = {}
-        idx = 0
-        for region in self.regions.values():
-            for rule in region.rules:
-                rule_indices[idx] = (rule, region)
-                idx = idx + 1
-
-        while rule_indices:
-            rand_idx = random.choice(list(rule_indices.keys()))
-            rand_rule = rule_indices[rand_idx][0]
-            rand_region = rule_indices[rand_idx][1]
+        group = self.get_selection_groups()[0]
+        if self.tau_leaper is not None:
+            self.tau_leaper.select(self, group)
+            return
+        sampler = RuleSampler(len(group))
+        while sampler:
+            idx = sampler.draw(self.rng)
+            rand_rule, rand_region = group[idx]
             if self.is_applicable(rand_rule, rand_region):
                 self.apply(rand_rule, rand_region)
             else:
-                del rule_indices[rand_idx]
+                sampler.remove(idx)
 
     @classmethod
     def create_model_from_str(cls, m_str):
@@ -308,7 +483,7 @@ class SymportAntiport(MembraneSystem):
                     regions[root_node.id] = Region(root_node.id)
                     current_node = root_node
                 else:
-                    new_node = Node()
+                    new_node = Node(current_node)
                     regions[new_node.id] = Region(new_node.id)
                     current_node.add_child(new_node)
                     current_node = new_node
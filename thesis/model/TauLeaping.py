@@ -0,0 +1,254 @@
+import math
+
+
+def binomial(rng, n, p):
+    """
+    A function used to draw a binomially distributed random number
+
+    Small means are drawn exactly by inverting the distribution function,
+    large ones by the normal approximation
+
+    Parameters
+    ----------
+    rng : random.Random
+        the random number generator
+    n : int
+        the number of trials
+    p : float
+        the probability of success
+
+    Returns
+    -------
+    int
+        the number of successes
+    """
+
+    if n <= 0 or p <= 0.0:
+        return 0
+    if p >= 1.0:
+        return n
+    if p > 0.5:
+        return n - binomial(rng, n, 1.0 - p)
+    mean = n * p
+    if mean < 30:
+        q = 1.0 - p
+        ratio = p / q
+        prob = q ** n
+        u = rng.random()
+        k = 0
+        while u > prob and k < n:
+            u -= prob
+            k += 1
+            prob *= ratio * (n - k + 1) / k
+        return k
+    k = round(rng.gauss(mean, math.sqrt(mean * (1.0 - p))))
+    return min(max(k, 0), n)
+
+
+def multinomial(rng, n, k):
+    """
+    A function used to distribute `n` trials uniformly among `k` categories
+
+    Parameters
+    ----------
+    rng : random.Random
+        the random number generator
+    n : int
+        the number of trials
+    k : int
+        the number of categories
+
+    Returns
+    -------
+    list
+        the number of trials falling into the categories
+    """
+
+    counts = []
+    for i in range(k - 1):
+        count = binomial(rng, n, 1.0 / (k - i))
+        counts.append(count)
+        n -= count
+    counts.append(n)
+    return counts
+
+
+class TauLeaper:
+    """
+    A class for approximating the rule selection of a step by applying the
+    rules in bulk
+
+    In a group of rules (see `MembraneSystem.get_selection_groups()`), the
+    exact procedure applies a uniformly chosen applicable rule, one at a time,
+    until no rule is applicable. As long as the applicable rules stay
+    applicable, the number of times they are applied during the next `L`
+    applications follow a uniform multinomial distribution, thus they can be
+    drawn at once. The size of a leap is chosen so that the expected change of
+    every consumed object is at most `epsilon` times its multiplicity, and
+    a leap consuming more objects than available is halved. If the leap would
+    be shorter than `threshold` applications, `exact_firings` applications
+    are simulated exactly instead.
+
+    The model has to provide `get_consumption()` and `apply_many()`.
+
+    Attributes
+    ----------
+    epsilon : float
+        the error tolerance, the upper limit on the expected relative change
+        of the multiplicity of an object during a leap
+    threshold : int
+        the shortest leap, below which the rules are applied one at a time
+    exact_firings : int
+        the number of rule applications simulated exactly before trying to
+        leap again
+    """
+
+    def __init__(self, epsilon=0.03, threshold=10, exact_firings=100):
+        """
+        A function used to initialize the leaper
+
+        Parameters
+        ----------
+        epsilon : float, optional
+            the error tolerance (default is 0.03)
+        threshold : int, optional
+            the shortest leap (default is 10)
+        exact_firings : int, optional
+            the number of applications simulated exactly when the leap is too
+            short (default is 100)
+        """
+
+        self.epsilon = epsilon
+        self.threshold = threshold
+        self.exact_firings = exact_firings
+
+    def select(self, model, group):
+        """
+        A function used to select and apply the rules of a group
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+        group : list
+            the (rule, region) pairs of the group
+        """
+
+        active = list(group)
+        while active:
+            active = [pair for pair in active if model.is_applicable(*pair)]
+            if not active:
+                break
+            counts = self.draw(model, active)
+            if counts is None:
+                self.fire_exact(model, active)
+                continue
+            for (rule, region), count in zip(active, counts):
+                if count:
+                    model.apply_many(rule, region, count)
+
+    def leap_size(self, consumptions):
+        """
+        A function used to calculate the number of applications in the next
+        leap
+
+        Parameters
+        ----------
+        consumptions : list
+            the results of `get_consumption()` for the applicable rules
+
+        Returns
+        -------
+        int
+            the number of applications (0 if the rules consume nothing)
+        """
+
+        demand = {}
+        for consumption in consumptions:
+            for multiset, consumed in consumption:
+                needs = demand.setdefault(id(multiset), (multiset, {}))[1]
+                for obj, mul in consumed.items():
+                    needs[obj] = needs.get(obj, 0) + mul
+
+        leap = math.inf
+        for multiset, needs in demand.values():
+            for obj, need in needs.items():
+                available = TauLeaper._available(multiset, obj)
+                if available != math.inf:
+                    leap = min(leap, self.epsilon * available *
+                               len(consumptions) / need)
+        return 0 if leap == math.inf else int(leap)
+
+    def draw(self, model, active):
+        """
+        A function used to draw the number of applications of the rules in
+        the next leap
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+        active : list
+            the applicable (rule, region) pairs
+
+        Returns
+        -------
+        list
+            the number of applications of the rules, or None if the leap
+            would be shorter than `threshold`
+        """
+
+        consumptions = [model.get_consumption(rule, region) for rule, region
+                        in active]
+        leap = self.leap_size(consumptions)
+        multisets = {id(multiset): multiset for consumption in consumptions
+                     for multiset, _ in consumption}
+        while leap >= self.threshold:
+            counts = multinomial(model.rng, leap, len(active))
+            used = {}
+            for consumption, count in zip(consumptions, counts):
+                for multiset, consumed in consumption:
+                    for obj, mul in consumed.items():
+                        key = (id(multiset), obj)
+                        used[key] = used.get(key, 0) + mul * count
+            if all(amount <= self._available(multisets[key], obj) for
+                   (key, obj), amount in used.items()):
+                return counts
+            leap //= 2
+        return None
+
+    @staticmethod
+    def _available(multiset, obj):
+        """
+        A function used to return the available multiplicity of an object
+        """
+
+        infinite_obj = getattr(multiset, 'infinite_obj', None) or ()
+        if obj in infinite_obj:
+            return math.inf
+        return multiset.objects.get(obj, 0)
+
+    def fire_exact(self, model, active):
+        """
+        A function used to apply the rules one at a time, like the exact
+        selection procedure, until `exact_firings` rules have been applied or
+        no rule is applicable
+
+        Parameters
+        ----------
+        model : MembraneSystem
+            the membrane system
+        active : list
+            the (rule, region) pairs, the inapplicable ones are removed
+        """
+
+        fired = 0
+        while active and fired < self.exact_firings:
+            idx = model.rng.randrange(len(active))
+            rule, region = active[idx]
+            if model.is_applicable(rule, region):
+                model.apply(rule, region)
+                fired += 1
+            else:
+                active[idx] = active[-1]
+                active.pop()
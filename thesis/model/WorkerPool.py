@@ -0,0 +1,341 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from BaseModel import BaseModel
+from Outcomes import OutcomeHistogram
+from SymportAntiport import SymportAntiport
+
+MODEL_TYPES = {"BaseModel": BaseModel, "SymportAntiport": SymportAntiport}
+"""The membrane system classes keyed by the `type` stored in the saved files"""
+
+CACHE_SIZE = 8
+"""The number of models kept in the cache of a worker process"""
+
+FAST_FORWARD_STEPS = 10000
+"""The number of steps jumped over at once if the steps are not limited"""
+
+_model_cache = OrderedDict()
+
+
+def model_from_dict(json_dict):
+    """
+    A function used to create a membrane system of the type stored in the
+    dictionary
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+
+    Returns
+    -------
+    MembraneSystem
+        the model of the corresponding type
+    """
+
+    return MODEL_TYPES[json_dict["type"]].load(json_dict)
+
+
+def model_hash(json_dict):
+    """
+    A function used to calculate the content hash of a model
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+
+    Returns
+    -------
+    str
+        the hexadecimal SHA-256 digest of the canonical JSON of the model
+    """
+
+    canonical = json.dumps(json_dict, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def simulate_replica(model, seed=None, max_steps=None, time_limit=None,
+                     fast_forward=False, halt_when=None, cancelled=None):
+    """
+    A function used to run a single computation of a membrane system
+
+    Parameters
+    ----------
+    model : MembraneSystem
+        the model to be simulated, it is modified in place
+    seed : int, optional
+        the seed of the random number generator (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps (default is None)
+    time_limit : float, optional
+        the upper limit on the time of the computation in seconds
+        (default is None)
+    fast_forward : bool, optional
+        if True, the deterministic steps are jumped over with
+        `MembraneSystem.fast_forward()` (default is False)
+    halt_when : HaltingCondition, optional
+        the condition that ends the computation early, checked before every
+        step, or after every jump when fast-forwarding (default is None)
+    cancelled : threading.Event, optional
+        the computation is stopped before the next step once it is set, used
+        when the computation runs in a thread (default is None)
+
+    Returns
+    -------
+    tuple
+        the result of the computation, the number of steps, the elapsed time
+        in seconds and a flag that is True if the computation halted, i.e.
+        no rule is applicable or `halt_when` holds
+    """
+
+    if seed is not None:
+        model.seed(seed)
+    monitor = None if halt_when is None else halt_when.monitor(model)
+    starting_time = time.perf_counter()
+    steps = 0
+    halted = False
+    while max_steps is None or steps < max_steps:
+        if time_limit is not None and \
+                time.perf_counter() - starting_time >= time_limit:
+            break
+        if cancelled is not None and cancelled.is_set():
+            break
+        if not model.any_rule_applicable() or \
+                monitor is not None and monitor.check():
+            halted = True
+            break
+        if fast_forward:
+            skipped = model.fast_forward(FAST_FORWARD_STEPS if max_steps is
+                                         None else max_steps - steps)
+            if skipped:
+                steps += skipped
+                continue
+        model.simulate_step()
+        steps += 1
+    elapsed = time.perf_counter() - starting_time
+    if monitor is not None:
+        monitor.close()
+    return dict(model.get_result()), steps, elapsed, halted
+
+
+def run_replica(json_dict, seed=None, max_steps=None, time_limit=None,
+                fast_forward=False, halt_when=None):
+    """
+    A function used to run a single computation of a saved membrane system
+
+    Parameters
+    ----------
+    json_dict : dict
+        the dictionary created by the model's `create_json_dict()`
+    seed : int, optional
+        the seed of the random number generator (default is None)
+    max_steps : int, optional
+        the upper limit on the number of steps (default is None)
+    time_limit : float, optional
+        the upper limit on the time of the computation in seconds
+        (default is None)
+    fast_forward : bool, optional
+        if True, the deterministic steps are jumped over (default is False)
+    halt_when : HaltingCondition, optional
+        the condition that ends the computation early (default is None)
+
+    Returns
+    -------
+    tuple
+        the same tuple as `simulate_replica()`
+    """
+
+    return simulate_replica(model_from_dict(json_dict), seed, max_steps,
+                            time_limit, fast_forward, halt_when)
+
+
+def _run_chunk(key, json_dict, seeds, max_steps, time_limit,
+               fast_forward=False, halt_when=None, aggregate=False):
+    """
+    The task executed by the worker processes, runs a chunk of replicas of
+    the model cached with the given key
+
+    Parameters
+    ----------
+    key : str
+        the content hash of the model
+    json_dict : dict
+        the dictionary of the model, or None if the worker is expected to
+        have it in its cache
+    seeds : list
+        the seeds of the replicas
+    aggregate : bool, optional
+        if True, the replicas are summarized in the worker (default is False)
+
+    Returns
+    -------
+    list
+        the tuples of `simulate_replica()`, or their `OutcomeHistogram` if
+        `aggregate` is True, or None if the model is neither cached nor sent
+    """
+
+    template = _model_cache.get(key)
+    if template is None:
+        if json_dict is None:
+            return None
+        template = model_from_dict(json_dict)
+        _model_cache[key] = template
+        if len(_model_cache) > CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    else:
+        _model_cache.move_to_end(key)
+
+    cls = template.__class__
+    replicas = (simulate_replica(cls.copy_system(template), seed, max_steps,
+                                 time_limit, fast_forward, halt_when)
+                for seed in seeds)
+    if aggregate:
+        return OutcomeHistogram.from_replicas(replicas)
+    return list(replicas)
+
+
+def _ready():
+    """
+    An empty task used to start the worker processes in advance
+    """
+
+    return os.getpid()
+
+
+class WorkerPool:
+    """
+    A class for running computations on a long-lived pool of worker processes
+
+    Every worker keeps the latest models it received in a cache keyed by the
+    content hash of the model. Once a model has been sent, further runs only
+    send its hash and the seeds of the replicas. If a worker does not have the
+    model (it was evicted from its cache, or another worker received it), the
+    missed chunks are all sent again together with the model. The model stays
+    marked as sent, since the other workers may still have it, so only the
+    workers that miss it receive it again.
+
+    Attributes
+    ----------
+    workers : int
+        the number of worker processes
+    """
+
+    def __init__(self, workers=None, start_method=None):
+        """
+        A function used to initialize the pool
+
+        Parameters
+        ----------
+        workers : int, optional
+            the number of worker processes (default is the number of CPUs)
+        start_method : str, optional
+            the `multiprocessing` start method of the workers (default is the
+            platform's default)
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(start_method))
+        self._sent = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def warm_up(self):
+        """
+        A function used to start all the worker processes, so that the first
+        run does not have to wait for them
+        """
+
+        futures = [self._executor.submit(_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def run(self, json_dict, seeds, max_steps=None, time_limit=None,
+            fast_forward=False, halt_when=None, aggregate=False):
+        """
+        A function used to run the computations of a model
+
+        Parameters
+        ----------
+        json_dict : dict
+            the dictionary created by the model's `create_json_dict()`
+        seeds : list
+            the seeds of the replicas (None items use unseeded replicas)
+        max_steps : int, optional
+            the upper limit on the number of steps of a replica
+            (default is None)
+        time_limit : float, optional
+            the upper limit on the time of a replica in seconds
+            (default is None)
+        fast_forward : bool, optional
+            if True, the deterministic steps are jumped over
+            (default is False)
+        halt_when : HaltingCondition, optional
+            the condition that ends the replicas early, it is sent to the
+            workers, so its predicates have to be picklable (default is None)
+        aggregate : bool, optional
+            if True, every worker summarizes its replicas, and only the
+            histograms are sent back and merged (default is False)
+
+        Returns
+        -------
+        list
+            the tuples of `simulate_replica()` in the order of `seeds`, or
+            their `OutcomeHistogram` if `aggregate` is True
+        """
+
+        key = model_hash(json_dict)
+        payload = None if key in self._sent else json_dict
+        self._sent.add(key)
+
+        num_of_chunks = max(1, min(len(seeds), 4 * self.workers))
+        size = -(-len(seeds) // num_of_chunks)
+        chunks = [seeds[i:i + size] for i in range(0, len(seeds), size)]
+        pending = {self._executor.submit(_run_chunk, key, payload, chunk,
+                                         max_steps, time_limit, fast_forward,
+                                         halt_when, aggregate): index
+                   for index, chunk in enumerate(chunks)}
+
+        # a worker that evicted the model (or never received it) reports a
+        # miss, the missed chunks are sent again with the model at once
+        chunk_results = [None] * len(chunks)
+        while pending:
+            missed = []
+            for future in as_completed(pending):
+                index = pending[future]
+                replicas = future.result()
+                if replicas is None:
+                    missed.append(index)
+                else:
+                    chunk_results[index] = replicas
+            pending = {self._executor.submit(_run_chunk, key, json_dict,
+                                             chunks[index], max_steps,
+                                             time_limit, fast_forward,
+                                             halt_when, aggregate): index
+                       for index in missed}
+
+        if aggregate:
+            results = OutcomeHistogram()
+            for replicas in chunk_results:
+                results.merge(replicas)
+            return results
+        return [replica for replicas in chunk_results for replica in replicas]
+
+    def shutdown(self):
+        """
+        A function used to stop the worker processes
+        """
+
+        self._executor.shutdown(cancel_futures=True)
+        self._sent.clear()
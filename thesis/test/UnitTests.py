@@ -1,9 +1,15 @@
 import sys
 import pytest
 import math
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
 
 sys.path.append("../model")
 sys.path.append("../view")
+sys.path.append("../benchmark")
 from MultiSet import (
     MultiSet,
     ObjectNotFoundException,
@@ -29,12 +35,31 @@ from Rule import (
     InvalidTypeException
 )
 
-from MembraneSystem import Environment, MembraneSystem
+from MembraneSystem import Environment, MembraneSystem, InvalidArgumentException
 
 from BaseModel import BaseModel
 
 from SymportAntiport import SymportAntiport
 
+from StepTrace import StepTrace, TraceCursor
+from StepDelta import StepDelta
+from BatchRunner import run_batch, main as batch_main, \
+    create_parser as batch_create_parser
+from WorkerPool import WorkerPool, run_replica, simulate_replica, \
+    CACHE_SIZE as WORKER_CACHE_SIZE
+from TauLeaping import multinomial
+from HaltingCondition import HaltingCondition, CustomPredicate
+from Outcomes import OutcomeHistogram, encode_result, decode_result
+from RuleSampler import RuleSampler
+from ResultCache import ResultCache
+from ParameterSweep import SweepGrid, run_sweep, main as sweep_main
+from PartitionedSimulation import PartitionedSimulation, plan_partition
+from SharedEnsemble import run_shared
+from Generators import GENERATORS, LETTERS
+from Benchmark import run_case
+from StartupBenchmark import measure_startup, parse_importtime
+from PySide6.QtCore import QObject, Signal
+
 
 def test_multiset():
     m = MultiSet()
@@ -96,6 +121,9 @@ def test_multiset():
     assert len(m6) == 6
     assert m6.multiplicity('c') == 4
 
+    assert m6 * 3 == {'c': 12, 'd': 3, 'e': 3}
+    assert (m6 * 0).is_empty()
+
 
 def test_membrane_structure():
     n = Node()
@@ -748,3 +776,791 @@ def test_symport_regions():
 
     results = model.simulate_parallel(num_of_sim=10)
     assert isinstance(results[0], dict)
+
+
+def test_record_and_replay_trace(tmp_path):
+    model = BaseModel.create_model_from_str("[ab[aa[b]][c]]")
+    root_id = model.get_root_id()
+    model.regions[root_id + 1].add_rule(
+        BaseModel.parse_rule("a -># IN: OUT: b HERE: c"))
+    model.regions[root_id + 3].add_rule(
+        BaseModel.parse_rule("c -> IN: OUT: HERE: cc"))
+    initial_state = model.get_state()
+    initial_parents = model.tree.get_parent_map()
+
+    path = str(tmp_path / "run.ptrace")
+    recorded = BaseModel.copy_system(model)
+    assert recorded.record_computation(path, max_steps=5) == 5
+    assert recorded.regions[root_id + 3].objects == {'c': 32}
+
+    with StepTrace(path) as trace:
+        assert len(trace) == 5
+        delta = trace.delta(1)
+        assert delta.dissolved == [(root_id + 1, root_id, [root_id + 2])]
+        assert delta.changes[root_id + 1] == {'a': -2}
+
+        cursor = TraceCursor(trace, model.get_state(),
+                             model.tree.get_parent_map(),
+                             keyframe_interval=2)
+        changed, structure_changed = cursor.seek(5)
+        assert structure_changed
+        assert root_id + 3 in changed
+        assert cursor.state == recorded.get_state()
+        assert cursor.parents[root_id + 2] == root_id
+
+        cursor.seek(0)
+        assert cursor.state == initial_state
+        assert cursor.parents == initial_parents
+        cursor.seek(4)
+        assert cursor.state[root_id + 3] == {'c': 16}
+
+
+def test_step_back():
+    model = BaseModel.create_model_from_str("[ab[aa[b]][c]]")
+    root_id = model.get_root_id()
+    model.regions[root_id + 1].add_rule(
+        BaseModel.parse_rule("a -># IN: OUT: b HERE: c"))
+    model.regions[root_id + 3].add_rule(
+        BaseModel.parse_rule("c -> IN: OUT: HERE: cc"))
+    model.set_history_limit(2)
+    initial_state = model.get_state()
+    initial_parents = model.tree.get_parent_map()
+
+    model.simulate_step()
+    assert root_id + 1 not in model.regions
+    assert model.step_back()
+    assert model.step_counter == 0
+    assert model.get_state() == initial_state
+    assert model.tree.get_parent_map() == initial_parents
+    assert model.get_parent_region(model.regions[root_id + 2]).id == root_id + 1
+
+    model.simulate_step()
+    model.simulate_step()
+    model.simulate_step()
+    assert model.step_back() and model.step_back()
+    assert not model.step_back()
+    assert model.step_counter == 1
+    assert model.regions[root_id + 3].objects == {'c': 2}
+
+    models = [BaseModel.create_model_from_str("[ab[aab[b]][c[a]]]"),
+              SymportAntiport.create_model_from_str("[#[ab[b]][ab]]")]
+    for r_id in (1, 2, 4):
+        models[0].regions[r_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: c"))
+        models[0].regions[r_id].add_rule(BaseModel.parse_rule("cc -> # IN: OUT: HERE: a"))
+        models[0].regions[r_id].add_rule(BaseModel.parse_rule("b -> IN: b OUT: a HERE: "))
+    for r_id in (1, 2, 3):
+        models[1].regions[r_id].add_rule(SymportAntiport.parse_rule("IN: b OUT: a"))
+        models[1].regions[r_id].add_rule(SymportAntiport.parse_rule("IN: a"))
+    for model in models:
+        model.seed(4)
+        model.set_history_limit(10)
+        states = [model.get_state()]
+        for _ in range(4):
+            delta = model.simulate_step(return_delta=True)
+            if delta is not None:
+                states.append(model.get_state())
+                assert delta.changes == StepDelta.from_states(0, states[-2], states[-1]).changes
+        assert len(states) > 2
+        while model.step_back():
+            states.pop()
+            assert model.get_state() == states[-1]
+
+
+def test_batch_runner(tmp_path):
+    model = BaseModel.create_model_from_str("[aaaa[b]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    path = str(tmp_path / "model.json")
+    model.save(path)
+
+    summary = run_batch(model.create_json_dict(), num_of_sim=20, seed=1)
+    assert sum(summary["histogram"].values()) == 20
+    assert summary["halted"] == 20
+    assert all(sum(int(p.split(':')[1]) for p in key.split()) == 4
+               for key in summary["histogram"])
+    assert run_batch(model.create_json_dict(), num_of_sim=20,
+                     seed=1)["histogram"] == summary["histogram"]
+
+    out = str(tmp_path / "out.json")
+    assert batch_main([path, "-n", "5", "-b", "serial", "-m", "0", "-o",
+                       out]) == 0
+    with open(out) as out_file:
+        result = json.load(out_file)[path]
+    assert result["histogram"] == {"": 5}
+    assert result["halted"] == 0
+
+    looping = BaseModel.create_model_from_str("[a]")
+    looping.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: a"))
+    looping_path = str(tmp_path / "looping.json")
+    looping.save(looping_path)
+    assert batch_create_parser().parse_args([looping_path]).time_limit == 10
+    assert batch_main([looping_path, "-n", "1", "-b", "serial", "-t", "0.2",
+                       "-o", out]) == 0
+    with open(out) as out_file:
+        assert json.load(out_file)[looping_path]["halted"] == 0
+
+
+def test_worker_pool_reuses_cached_model():
+    model = BaseModel.create_model_from_str("[aaaa[b]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+    seeds = list(range(10))
+    expected = [run_replica(json_dict, seed)[0] for seed in seeds]
+
+    with WorkerPool(workers=2) as pool:
+        first = pool.run(json_dict, seeds)
+        second = pool.run(json_dict, seeds, max_steps=0)
+        third = pool.run(json_dict, seeds)
+    assert [r[0] for r in first] == expected
+    assert [r[0] for r in third] == expected
+    assert all(r[0] == {} and r[1] == 0 for r in second)
+
+    # the first model is evicted from the cache of the worker by the others,
+    # so the worker misses it and it is sent again
+    others = []
+    for size in range(1, WORKER_CACHE_SIZE + 2):
+        other = BaseModel.create_model_from_str('[' + 'a' * size + ']')
+        other.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: d HERE: "))
+        others.append((size, other.create_json_dict()))
+    with WorkerPool(workers=1) as pool:
+        for size, other_dict in others:
+            assert [r[0] for r in pool.run(other_dict, seeds[:2])] == [{'d': size}] * 2
+        for _ in range(2):
+            size, other_dict = others[0]
+            assert [r[0] for r in pool.run(other_dict, seeds)] == [{'d': size}] * len(seeds)
+            assert pool.run(json_dict, seeds, aggregate=True).num_of_sim == len(seeds)
+
+
+def test_reproducible_replica_streams():
+    model = BaseModel.create_model_from_str("[aaaaaa[b]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+
+    assert MembraneSystem.spawn_seed(7, 0) == MembraneSystem.spawn_seed(7, 0)
+    assert MembraneSystem.spawn_seed(7, 0) != MembraneSystem.spawn_seed(7, 1)
+    assert model.simulate_parallel(20, seed=7) == \
+        model.simulate_parallel(20, seed=7)
+
+    serial = run_batch(json_dict, num_of_sim=30, seed=3)
+    threaded = run_batch(json_dict, num_of_sim=30, backend="thread",
+                         workers=4, seed=3)
+    assert serial["histogram"] == threaded["histogram"]
+
+
+def test_benchmark_generators():
+    for name, generator in GENERATORS.items():
+        model = generator()
+        copy_model = model.__class__.copy_system(model)
+        assert copy_model.get_state() == model.get_state()
+        assert model.any_rule_applicable()
+        model.simulate_step()
+        assert model.step_counter == 1
+
+    result = run_case("deep_chain", {"depth": 5, "multiplicity": 10},
+                      num_of_sim=0, min_time=0.01)
+    assert result["steps"] == 5
+    assert result["regions"] == 5
+    assert result["peak_memory"] > 0
+
+
+def test_profiling_report(tmp_path):
+    model = BaseModel.create_model_from_str("[ab[aa[b]][c]]")
+    root_id = model.get_root_id()
+    model.regions[root_id + 1].add_rule(
+        BaseModel.parse_rule("a -># IN: OUT: b HERE: c"))
+    model.regions[root_id + 3].add_rule(
+        BaseModel.parse_rule("c -> IN: OUT: HERE: cc"))
+    profiler = model.enable_profiling()
+    model.simulate_step()
+    model.simulate_step()
+
+    report = profiler.report()
+    assert report["num_of_steps"] == 2
+    assert {"rules", "merge", "dissolution", "signals"} <= \
+        report["phases"].keys()
+    rules = {(r["region"], r["rule"]): r for r in report["rules"]}
+    dissolving = rules[(root_id + 1, "a -># IN:  OUT: b HERE: c")]
+    assert dissolving["fires"] == 2
+    assert dissolving["failed_checks"] >= 1
+    assert report["steps"][1]["objects"][root_id + 3] == 4
+
+    path = str(tmp_path / "profile.json")
+    profiler.save(path)
+    with open(path) as report_file:
+        assert json.load(report_file)["num_of_steps"] == 2
+
+    assert model.disable_profiling() is profiler
+    assert "is_applicable" not in model.__dict__
+    model.simulate_step()
+    assert len(profiler.steps) == 2
+
+    model = GENERATORS["many_rules"](num_of_rules=3, multiplicity=3000)
+    model.enable_tau_leaping()
+    profiler = model.enable_profiling()
+    model.set_history_limit(5)
+    model.simulate_step()
+    report = profiler.report()
+    assert report["calls"]["apply_many"]["count"] >= 1
+    assert sum(rule["fires"] for rule in report["rules"]) >= 1000
+    assert "history" in report["phases"]
+    model.disable_profiling()
+    assert "apply_many" not in model.__dict__
+
+    model = BaseModel.create_model_from_str("[a]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: a"))
+    profiler = model.enable_profiling(max_steps=3)
+    for _ in range(5):
+        model.simulate_step()
+    assert [step for step, _, _ in profiler.steps] == [3, 4, 5]
+
+
+def test_state_space_exploration(tmp_path):
+    model = BaseModel.create_model_from_str("[aaaa[b]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("aa -> IN: OUT: c HERE: "))
+    with model.explore_state_space(memory_limit=2,
+                                   spill_dir=str(tmp_path)) as result:
+        assert result.complete
+        assert result.num_of_states == 4
+        assert sorted(result.results) == [(('b', 2), ('c', 1)),
+                                          (('b', 4),), (('c', 2),)]
+        assert result.get_configuration(0)[1][0] == (('a', 4),)
+        assert not result.loops
+    assert model.regions[root_id].objects == {'a': 4}
+
+    model = BaseModel.create_model_from_str("[a[][]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: b"))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("b -> IN: OUT: HERE: a"))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("b -> IN: c OUT: HERE: "))
+    model.regions[root_id + 1].add_rule(
+        BaseModel.parse_rule("c -># IN: OUT: d HERE: "))
+    result = model.explore_state_space()
+    assert result.get_results() == [{}]
+    assert len(result.halting_states) == 2
+    assert result.loops == [([0, 1], False)]
+
+
+def test_exact_outcome_probabilities(tmp_path):
+    model = BaseModel.create_model_from_str("[aaaa[b]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("aa -> IN: OUT: c HERE: "))
+    probabilities, non_halting = model.outcome_probabilities()
+    assert probabilities == {(('b', 2), ('c', 1)): Fraction(5, 8),
+                             (('b', 4),): Fraction(1, 8),
+                             (('c', 2),): Fraction(1, 4)}
+    assert non_halting == 0
+
+    path = tmp_path / "model.json"
+    model.save(str(path))
+    out_path = tmp_path / "exact.json"
+    assert batch_main([str(path), "--exact", "-o", str(out_path)]) == 0
+    with open(out_path) as out_file:
+        summary = json.load(out_file)[str(path)]
+    assert summary["probabilities"] == {"b:2 c:1": "5/8", "c:2": "1/4",
+                                        "b:4": "1/8"}
+
+    model = BaseModel.create_model_from_str("[a]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: b"))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("b -> IN: OUT: HERE: b"))
+    probabilities, non_halting = model.outcome_probabilities()
+    assert probabilities == {(('c', 1),): Fraction(1, 2)}
+    assert non_halting == Fraction(1, 2)
+
+
+def test_tau_leaping():
+    model = GENERATORS["many_rules"](num_of_rules=10, multiplicity=5000)
+    root_id = model.get_root_id()
+    model.seed(3)
+    leaper = model.enable_tau_leaping(epsilon=0.05)
+    assert model.tau_leaper is leaper
+    model.simulate_step()
+    objects = model.regions[root_id].objects.objects
+    assert 'a' not in objects
+    assert sum((i + 1) * objects.get(LETTERS[i], 0) for i in range(10)) == 5000
+
+    model = SymportAntiport.create_model_from_str("[[#]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].objects = MultiSet({'a': 3000, 'b': 3000})
+    model.regions[root_id + 1].add_rule(SymportAntiport.parse_rule("IN: a"))
+    model.regions[root_id + 1].add_rule(SymportAntiport.parse_rule("IN: ab"))
+    model.seed(5)
+    model.enable_tau_leaping()
+    model.simulate_step()
+    assert 'a' not in model.regions[root_id].objects
+    moved = model.regions[root_id + 1].objects.objects
+    assert moved['a'] == 3000
+    assert moved.get('b', 0) + model.regions[root_id].objects['b'] == 3000
+
+    assert sum(multinomial(model.rng, 1000, 7)) == 1000
+    model.disable_tau_leaping()
+    assert model.tau_leaper is None
+
+
+def test_dead_rule_pruning():
+    model = BaseModel.create_model_from_str("[aa[b[]]]")
+    root_id = model.get_root_id()
+    for rule in ["c -> IN: d OUT: HERE: ", "x -> IN: OUT: HERE: y",
+                 "a -># IN: OUT: HERE: z", "a -> IN: c OUT: HERE: "]:
+        model.regions[root_id].add_rule(BaseModel.parse_rule(rule))
+    model.regions[root_id + 1].add_rule(BaseModel.parse_rule("c -> IN: e OUT: HERE: "))
+    model.regions[root_id + 1].add_rule(BaseModel.parse_rule("b -># IN: OUT: f HERE: "))
+    model.regions[root_id + 2].add_rule(BaseModel.parse_rule("e -> IN: g OUT: HERE: "))
+    model.regions[root_id + 2].add_rule(BaseModel.parse_rule("f -> IN: OUT: HERE: h"))
+    analyzer = model.prune_dead_rules()
+    assert analyzer.get_num_of_dead_rules() == 4
+    assert [str(rule) for rule in model.regions[root_id].rules] == \
+           ["a -> IN: c OUT:  HERE: ", "c -> IN: d OUT:  HERE: "]
+    assert len(model.regions[root_id + 1].rules) == 2
+    assert model.regions[root_id + 2].rules == []
+    assert root_id + 1 in analyzer.dissolvable
+    assert any("the skin cannot dissolve" in line for line in analyzer.report())
+
+    model = SymportAntiport.create_model_from_str("[ab[#][c]]")
+    root_id = model.get_root_id()
+    model.regions[root_id + 1].add_rule(SymportAntiport.parse_rule("IN: a"))
+    model.regions[root_id + 1].add_rule(SymportAntiport.parse_rule("IN: c"))
+    model.regions[root_id + 2].add_rule(SymportAntiport.parse_rule("IN: b OUT: c"))
+    model.regions[root_id + 2].add_rule(SymportAntiport.parse_rule("IN: b OUT: d"))
+    analyzer = model.prune_dead_rules()
+    assert analyzer.get_num_of_dead_rules() == 1
+    assert len(model.regions[root_id + 1].rules) == 2
+    assert [str(rule) for rule in model.regions[root_id + 2].rules] == \
+           ["IN: b OUT: c"]
+
+
+def test_fast_forward():
+    def counter():
+        model = BaseModel.create_model_from_str("[[]]")
+        root_id = model.get_root_id()
+        model.regions[root_id].objects = MultiSet({'a': 1, 'c': 1})
+        model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: aa"))
+        model.regions[root_id].add_rule(BaseModel.parse_rule("c -> IN: OUT: HERE: d"))
+        model.regions[root_id].add_rule(BaseModel.parse_rule("d -> IN: e OUT: HERE: "))
+        model.regions[root_id + 1].add_rule(BaseModel.parse_rule("eee -># IN: OUT: HERE: "))
+        return model
+
+    exact, fast = counter(), counter()
+    result, steps, _, _ = run_replica(exact.create_json_dict(), 1, 10)
+    assert simulate_replica(fast, 1, 10, fast_forward=True)[:2] == (result, steps)
+    assert fast.step_counter == 10
+    assert fast.regions[fast.get_root_id()].objects == {'a': 2 ** 10}
+
+    model = counter()
+    assert model.fast_forward(100) == 1
+    assert model.regions[model.get_root_id()].objects == {'a': 2, 'd': 1}
+    model.set_history_limit(10)
+    assert model.fast_forward(100) == 0
+
+    model = BaseModel.create_model_from_str("[aa[]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: b"))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: c"))
+    assert model.fast_forward(100) == 0
+
+    # linear phases are jumped over at once
+    model = BaseModel.create_model_from_str("[a]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: ab"))
+    assert model.fast_forward(10 ** 6) == 10 ** 6
+    assert model.regions[0].objects == {'a': 1, 'b': 10 ** 6}
+    model = BaseModel.create_model_from_str("[c[]]")
+    model.regions[0].objects = MultiSet({'c': 1, 'e': 1000})
+    model.regions[0].add_rule(BaseModel.parse_rule("ce -> IN: OUT: HERE: cf"))
+    model.regions[0].add_rule(BaseModel.parse_rule("ffff -> IN: g OUT: HERE: "))
+    assert model.fast_forward(10 ** 6) == 4
+    assert model.regions[0].objects == {'c': 1, 'e': 996, 'f': 4}
+
+
+def test_halting_condition():
+    def emitter():
+        model = BaseModel.create_model_from_str("[a[]]")
+        root_id = model.get_root_id()
+        model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: b OUT: c HERE: a"))
+        return model
+
+    condition = HaltingCondition.parse(["c>=5"])
+    result, steps, _, halted = simulate_replica(emitter(), 1, 100, halt_when=condition)
+    assert (result, steps, halted) == ({'c': 5}, 5, True)
+
+    model = emitter()
+    assert model.simulate_computation(HaltingCondition.parse(["b>=3@1"])) == {'c': 3}
+    condition = HaltingCondition.parse(["c>=2", "b>=4@1"], require_all=True)
+    assert emitter().simulate_timed_computation(halt_when=condition) == {'c': 4}
+    condition = HaltingCondition([CustomPredicate(lambda objects: objects.get('b') == 2, 1)])
+    assert emitter().simulate_computation(condition) == {'c': 2}
+    assert str(HaltingCondition.parse(["a", "b>=2@env"])) == "a or b>=2"
+    with pytest.raises(ValueError):
+        HaltingCondition.parse(["a>"])
+
+    json_dict = emitter().create_json_dict()
+    summary = run_batch(json_dict, num_of_sim=4, backend="process", workers=2,
+                        seed=1, max_steps=100,
+                        halt_when=HaltingCondition.parse(["c>=7"]))
+    assert summary["halted"] == 4
+    assert summary["histogram"] == {"c:7": 4}
+
+    # only the predicates of the regions modified by the steps are read
+    model = BaseModel.create_model_from_str("[[bx][c][e]]")
+    model.regions[1].add_rule(BaseModel.parse_rule("b -> IN: OUT: HERE: d"))
+    model.regions[1].add_rule(BaseModel.parse_rule("d -># IN: OUT: HERE: "))
+    model.regions[2].add_rule(BaseModel.parse_rule("c -> IN: OUT: HERE: c"))
+    calls = []
+    condition = HaltingCondition(
+        [CustomPredicate(lambda objects: calls.append(2) or False, 2),
+         CustomPredicate(lambda objects: calls.append(3) or False, 3)] +
+        HaltingCondition.parse(["x@0"]).predicates)
+    model.simulate_computation(condition)
+    assert model.step_counter == 2 and model.regions[0].objects == {'x': 1}
+    assert calls == [2, 3, 2, 2] and model.dirty_regions is None
+
+
+def test_outcome_histogram():
+    assert encode_result({'b': 2, 'a': 1}) == encode_result({'a': 1, 'b': 2, 'c': 0})
+    assert decode_result(encode_result({'b': 2, 'a': 1})) == {'a': 1, 'b': 2}
+
+    model = BaseModel.create_model_from_str("[aaa[]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+    seeds = list(range(40))
+    replicas = [run_replica(json_dict, seed) for seed in seeds]
+    histogram = OutcomeHistogram.from_replicas(replicas)
+    assert len(histogram) == 40 and histogram.halted == 40
+    assert sum(histogram.counts.values()) == 40
+    with WorkerPool(2) as pool:
+        aggregated = pool.run(json_dict, seeds, aggregate=True)
+    assert aggregated.counts == histogram.counts
+    assert aggregated.steps == histogram.steps == sum(r[1] for r in replicas)
+    assert sum(aggregated.time_buckets) == 40
+    assert histogram.time_min <= histogram.median_time() <= histogram.time_max
+
+
+def test_dense_region_ids():
+    first = BaseModel.create_model_from_str("[a[b[c]][d]]")
+    second = BaseModel.create_model_from_str("[a[b[c]][d]]")
+    assert list(first.regions) == list(second.regions) == [0, 1, 2, 3]
+    assert first.tree.get_id_bound() == 4
+
+    first.regions[2].add_rule(BaseModel.parse_rule("c -> IN: OUT: e HERE: "))
+    json_dict = first.create_json_dict()
+    assert set(json_dict["objects"]) == {0, 1, 2, 3}
+    loaded = BaseModel.load(json.loads(json.dumps(json_dict)))
+    assert list(loaded.regions) == [0, 1, 2, 3]
+    assert [str(rule) for rule in loaded.regions[2].rules] == \
+           [str(rule) for rule in first.regions[2].rules]
+
+    n = Node()
+    subtree = Node()
+    subtree.add_child(Node())
+    n.add_child(Node())
+    n.add_child(subtree)
+    assert [n[0].id, n[1].id, n[1][0].id] == [1, 2, 3]
+    assert MembraneStructure(n).get_id_bound() == 4
+
+    copied = BaseModel.copy_system(first)
+    copied.tree.skin.add_child(Node())
+    assert copied.tree.get_id_bound() == 5 and first.tree.get_id_bound() == 4
+
+    def add_children():
+        for _ in range(500):
+            n.add_child(Node())
+
+    threads = [threading.Thread(target=add_children) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(child.id for child in n.children[2:]) == list(range(4, 2004))
+
+
+def test_in_place_merge():
+    model = BaseModel.create_model_from_str("[a[][c]]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: b"))
+    buffers = {r_id: region.new_objects for r_id, region in model.regions.items()}
+    emitted = []
+    model.signal.obj_changed.connect(lambda r_id, objects: emitted.append((r_id, objects)))
+    model.simulate_step()
+    assert model.regions[0].objects == {'b': 1}
+    assert emitted[-1] == (0, 'b')
+    assert all(r_id == 0 for r_id, _ in emitted)
+    assert all(region.new_objects is buffers[r_id] and region.new_objects.is_empty()
+               for r_id, region in model.regions.items())
+    assert not isinstance(model.regions[0], QObject) and \
+           not hasattr(model.regions[0], '__dict__')
+
+
+def test_compact_regions():
+    model = BaseModel.create_model_from_str("[a[a][a]]")
+    rule_str = "a -> IN: OUT: b HERE: "
+    for region in model.regions.values():
+        region.add_rule(BaseModel.parse_rule(rule_str))
+    instances = [model.tree.skin, model.tree.skin.allocator, model.regions[1],
+                 model.regions[1].objects, model.environment,
+                 BaseModel.parse_rule(rule_str),
+                 BaseModel.parse_rule("a -># IN: OUT: HERE: b"),
+                 BaseModel.parse_rule("a -> IN: OUT: HERE: b > b -> IN: OUT: HERE: c"),
+                 SymportAntiport.parse_rule("IN: a OUT: b")]
+    assert all(not hasattr(instance, '__dict__') for instance in instances)
+    assert not isinstance(model.regions[1], QObject)
+    assert not any(isinstance(getattr(Region, name), Signal) for name in dir(Region))
+    assert Region(5).signal is None
+    assert all(region.signal is model.signal for region in model.regions.values())
+
+    loaded = BaseModel.load(model.create_json_dict())
+    shared = loaded.regions[0].rules[0]
+    assert all(region.rules == [shared] for region in loaded.regions.values())
+    copied = BaseModel.copy_system(loaded)
+    assert copied.regions[1].rules[0] is copied.regions[2].rules[0] is not shared
+
+    analyzer = loaded.prune_dead_rules()
+    assert all(len(analyzer.layers[r_id]) == 1 for r_id in loaded.regions)
+    profiler = loaded.enable_profiling()
+    loaded.simulate_step()
+    loaded.disable_profiling()
+    assert sorted(entry[0] for entry in profiler.rules.values()) == [0, 1, 2]
+
+
+def test_rule_sampler():
+    import random
+    rng = random.Random(3)
+    sampler = RuleSampler(5)
+    sampler.remove(1)
+    sampler.remove(3)
+    counts = {}
+    for _ in range(3000):
+        idx = sampler.draw(rng)
+        counts[idx] = counts.get(idx, 0) + 1
+    assert set(counts) == {0, 2, 4}
+    assert all(900 < count < 1100 for count in counts.values())
+    sampler.restore(3)
+    sampler.restore(3)
+    assert len(sampler) == 4
+    assert sorted(sampler.order[:len(sampler)]) == [0, 2, 3, 4]
+    sampler.reset()
+    assert len(sampler) == 5
+    assert all(sampler.order[sampler.positions[i]] == i for i in range(5))
+
+
+def test_priority_chain():
+    rule = BaseModel.parse_rule(
+        "a -> IN: OUT: HERE: x > b -> IN: c OUT: HERE: y > b -> IN: OUT: HERE: z")
+    assert BaseModel.is_valid_rule(str(rule))
+    assert str(BaseModel.parse_rule(str(rule))) == str(rule)
+    assert len(rule.levels) == 3
+    model = BaseModel.create_model_from_str("[bb]")
+    model.regions[0].add_rule(rule)
+    assert model.resolve_priority(rule, model.regions[0]) is rule.levels[2][0]
+    model.simulate_step()
+    assert model.regions[0].objects == {'z': 2}
+    model.regions[0].objects.add_object('a')
+    assert model.resolve_priority(rule, model.regions[0]) is rule.levels[0][0]
+
+
+def test_lazy_startup():
+    imports = parse_importtime("import time: self [us] | cumulative | imported package\n"
+                               "import time:       120 |        300 |   json.decoder\n"
+                               "import time:        80 |        380 | json")
+    assert imports == [("json.decoder", 120e-6, 300e-6, 1), ("json", 80e-6, 380e-6, 0)]
+    result = measure_startup()
+    assert result["loaded_deferred"] == []
+    assert 0 < result["imports"] <= result["first_window"]
+    assert any(name == "MainWindow" for name, _, _, _ in result["import_times"])
+
+
+def test_async_simulation():
+    model = BaseModel.create_model_from_str("[aaaaaaaa]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+
+    async def collect(seed):
+        return {index: replica[0] async for index, replica in
+                model.iter_parallel_async(20, seed=seed)}
+
+    first, second = asyncio.run(collect(5)), asyncio.run(collect(5))
+    assert sorted(first) == list(range(20)) and first == second
+    assert all(result.get('b', 0) + result.get('c', 0) == 8 for result in first.values())
+    assert len(set(map(str, first.values()))) > 1
+    assert model.regions[0].objects == {'a': 8}
+
+    looping = BaseModel.create_model_from_str("[a]")
+    looping.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: a"))
+
+    futures = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            futures.append(super().submit(*args, **kwargs))
+            return futures[-1]
+
+    async def cancel(executor):
+        task = asyncio.create_task(looping.simulate_async(executor=executor))
+        ticks = 0
+        while looping.step_counter < 100:
+            await asyncio.sleep(0.001)
+            ticks += 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # the computation has stopped and no step is made after the cancel
+        assert len(futures) == 1 and futures[0].done()
+        steps = looping.step_counter
+        await asyncio.sleep(0.1)
+        assert looping.step_counter == steps
+        return ticks
+
+    with RecordingExecutor(max_workers=1) as executor:
+        assert asyncio.run(cancel(executor)) > 0
+    assert asyncio.run(looping.simulate_async(max_steps=3))[1:4:2] == (3, False)
+
+
+def test_result_cache(tmp_path):
+    model = BaseModel.create_model_from_str("[aaaaaa]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    first = run_batch(json_dict, num_of_sim=20, seed=3, cache=cache)
+    again = run_batch(json_dict, num_of_sim=20, seed=3, cache=cache)
+    assert (first["cached"], again["cached"]) == (0, 20)
+    assert again["histogram"] == first["histogram"]
+    extended = run_batch(json_dict, num_of_sim=30, seed=3, cache=cache)
+    assert extended["cached"] == 20
+    assert extended["histogram"] == run_batch(json_dict, num_of_sim=30, seed=3)["histogram"]
+    assert run_batch(json_dict, num_of_sim=10, seed=3, cache=cache)["cached"] == 0
+    assert run_batch(json_dict, num_of_sim=10, cache=cache)["cached"] == 0
+    assert cache.get(ResultCache.make_key(json_dict, 3)).num_of_sim == 30
+    # the time limit is not part of the key
+    assert run_batch(json_dict, num_of_sim=30, seed=3, time_limit=5,
+                     cache=cache)["cached"] == 30
+
+    mixed = dict(json_dict, objects={0: "aabc"}, env_obj="ab")
+    shuffled = dict(json_dict, objects={0: "caba"}, env_obj="ba")
+    assert ResultCache.make_key(shuffled, 3) == ResultCache.make_key(mixed, 3)
+    assert ResultCache.make_key(dict(mixed, objects={0: "aabb"}), 3) != \
+           ResultCache.make_key(mixed, 3)
+    assert ResultCache.make_key(json_dict, 3) != ResultCache.make_key(json_dict, 4)
+
+    # a computation cut off by the clock is not reproducible, so it is not
+    # cached, while one stopped by the step limit is
+    looping = BaseModel.create_model_from_str("[a]")
+    looping.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: HERE: a"))
+    looping_dict = looping.create_json_dict()
+    assert run_batch(looping_dict, num_of_sim=2, seed=1, time_limit=0.05,
+                     cache=cache)["halted"] == 0
+    assert cache.get(ResultCache.make_key(looping_dict, 1)) is None
+    run_batch(looping_dict, num_of_sim=2, seed=1, max_steps=5, cache=cache)
+    assert cache.get(ResultCache.make_key(looping_dict, 1, 5)).num_of_sim == 2
+
+    results = model.simulate_parallel(12, seed=1, cache=cache)
+    assert sorted(map(encode_result, results)) == \
+           sorted(map(encode_result, model.simulate_parallel(12, seed=1)))
+    assert model.simulate_parallel(12, seed=1, cache=cache) == results
+    assert len(model.simulate_parallel(5, seed=1, cache=cache)) == 5
+    assert model.simulate_parallel(12, seed=1, cache=cache) == results
+
+    small = ResultCache(str(tmp_path / "small"), max_bytes=1)
+    run_batch(json_dict, num_of_sim=5, seed=1, cache=small)
+    run_batch(json_dict, num_of_sim=5, seed=2, cache=small)
+    assert len(list((tmp_path / "small").iterdir())) == 1
+    assert small.get(ResultCache.make_key(json_dict, 2)).num_of_sim == 5
+
+
+def test_parameter_sweep(tmp_path):
+    model = BaseModel.create_model_from_str("[a]")
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[0].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+    grid = SweepGrid().add_objects('a', SweepGrid.parse_values("1..3"))
+    grid.add_variants({"both": {}, "only_b": {"0": ["a -> IN: OUT: b HERE: "]}})
+    assert SweepGrid.parse_values("0..10:5") == [0, 5, 10]
+    assert grid.points()[:2] == [{'a': 1, 'rules': 'both'}, {'a': 1, 'rules': 'only_b'}]
+
+    seen = []
+    histograms = run_sweep(json_dict, grid, num_of_sim=10, seed=1, workers=0,
+                           on_point=lambda index, point, histogram: seen.append(index))
+    assert seen == list(range(6))
+    assert histograms[5].counts == {(('b', 3),): 10}
+    assert all(sum(mul for _, mul in key) == point['a'] for point, histogram in
+               zip(grid.points(), histograms) for key in histogram.counts)
+    parallel = run_sweep(json_dict, grid, num_of_sim=10, seed=1, workers=2,
+                         chunk_size=3, start_method="spawn")
+    assert [h.counts for h in parallel] == [h.counts for h in histograms]
+    with pytest.raises(InvalidArgumentException):
+        run_sweep(json_dict, SweepGrid().add_objects('a', [1], region=4), workers=0)
+
+    model.save(str(tmp_path / "model.json"))
+    output = tmp_path / "sweep.csv"
+    assert sweep_main([str(tmp_path / "model.json"), "--objects", "a=2,4", "--env-inf", "", "b",
+                       "-n", "5", "-s", "3", "-w", "0", "-o", str(output)]) == 0
+    lines = output.read_text().splitlines()
+    assert lines[0] == "point,a,env_inf,num_of_sim,halted,steps_mean,outcome,count"
+    assert {line.split(',')[0] for line in lines[1:]} == {'0', '1', '2', '3'}
+
+
+def test_partitioned_simulation():
+    model = BaseModel.create_model_from_str(
+        "[ac [aad [ac] [ac [aad]]] [ac [aad [ac]] [ac]] [aad [ac] [ac [ac]]]]")
+    for r_id, region in model.regions.items():
+        region.add_rule(BaseModel.parse_rule("a -> IN: OUT: a HERE: "))
+        region.add_rule(BaseModel.parse_rule("c -> IN: OUT: b HERE: "))
+        if r_id != model.tree.get_root_id():
+            region.add_rule(BaseModel.parse_rule("d -> # IN: e OUT: HERE: f"))
+        region.add_rule(BaseModel.parse_rule("f -> IN: g OUT: HERE: > f -> IN: OUT: h HERE: "))
+
+    parent_map = model.tree.get_parent_map()
+    owners = plan_partition(parent_map, model.tree.get_root_id(), 2)
+    assert owners[model.tree.get_root_id()] == 0 and set(owners.values()) == {0, 1, 2}
+    assert all(owners[parent] in (0, owners[r_id]) for r_id, parent in parent_map.items()
+               if parent is not None)
+
+    serial = BaseModel.copy_system(model)
+    result = simulate_replica(serial, seed=1)[0]
+    for workers in (0, 2):
+        simulation = PartitionedSimulation(model, workers=workers, seed=1, start_method="spawn")
+        assert simulation.run()[0] == result
+        assert sorted(simulation.state) == sorted(serial.regions)
+        for obj in "abdeg":
+            assert sum(objects.get(obj, 0) for objects in simulation.state.values()) == \
+                sum(region.objects.objects.get(obj, 0) for region in serial.regions.values())
+    assert model.regions[model.tree.get_root_id()].objects.objects == {'a': 1, 'c': 1}
+
+    again = PartitionedSimulation(model, workers=2, seed=1, start_method="spawn")
+    again.run()
+    assert again.state == simulation.state
+    with pytest.raises(InvalidArgumentException):
+        PartitionedSimulation(SymportAntiport.create_model_from_str("[[#ab]]"))
+
+
+def test_shared_ensemble():
+    model = BaseModel.create_model_from_str("[aaaa[]]")
+    root_id = model.get_root_id()
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: b HERE: "))
+    model.regions[root_id].add_rule(BaseModel.parse_rule("a -> IN: OUT: c HERE: "))
+    json_dict = model.create_json_dict()
+    seeds = [MembraneSystem.spawn_seed(3, i) for i in range(30)] + [None]
+
+    replicas = run_shared(json_dict, seeds, workers=2, start_method="spawn")
+    expected = [run_replica(json_dict, seed) for seed in seeds[:-1]]
+    assert [replica[0] for replica in replicas[:-1]] == [replica[0] for replica in expected]
+    assert all(replica[1] == 1 and replica[3] and replica[2] >= 0 for replica in replicas)
+    assert sum(replicas[-1][0].values()) == 4
+
+    summary = run_batch(json_dict, num_of_sim=30, backend="shared", workers=2, seed=3)
+    assert summary["histogram"] == run_batch(json_dict, num_of_sim=30, seed=3)["histogram"]
+    histogram = run_shared(json_dict, seeds[:5], max_steps=0, aggregate=True)
+    assert histogram.counts == {(): 5} and histogram.halted == 0
+
+    with pytest.raises(RuntimeError, match="KeyError: 'unknown'"):
+        run_shared(dict(json_dict, type="unknown"), seeds[:2], workers=1,
+                   start_method="spawn")
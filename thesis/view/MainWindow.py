@@ -13,23 +13,25 @@ from PySide6.QtWidgets import (
     QStatusBar,
     QFileDialog,
     QMessageBox,
-    QDialog
+    QDialog,
+    QInputDialog,
+    QToolBar,
+    QDockWidget
 )
-from PySide6.QtCore import QFile
-from PySide6.QtGui import QResizeEvent, QAction, QIcon
+from PySide6.QtCore import QFile, Qt, QTimer
+from PySide6.QtGui import QResizeEvent, QAction, QIcon, QCloseEvent
 
-from StructureDialog import StructureDialog
 from ModelType import ModelType
 from MembraneSimulator import MembraneSimulator, InvalidStructureException
-from HelpMenu import HelpMenu
-from SimulationStepDialog import SimulationStepDialog
-from ResultDialog import ResultDialog
-import resources
 
 
 class MainWindow(QMainWindow):
     """
     A class for displaying the main window of the application
+
+    Only the simulator is constructed with the window, the dialogs, the help
+    menu, the playback controls and the profiler panel are imported and
+    constructed on first use, so the window appears as soon as possible
     """
 
     def __init__(self):
@@ -48,6 +50,8 @@ class MainWindow(QMainWindow):
         self.membranes.signal.counter_increment.connect(
             self.increment_counter_label)
         self.membranes.signal.simulation_over.connect(self.simulation_over)
+        self.membranes.signal.playback_started.connect(self.playback_started)
+        self.membranes.signal.playback_stopped.connect(self.playback_stopped)
 
         # Constructing the outer layer of the menubar
         menu = self.menuBar()
@@ -55,10 +59,11 @@ class MainWindow(QMainWindow):
         save_action.setShortcut("Ctrl+S")
         load_action = QAction("Betöltés", self)
         load_action.setShortcut("Ctrl+O")
+        load_trace_action = QAction("Felvétel visszajátszása", self)
 
         # File menu
         file_menu = menu.addMenu("Fájl")
-        file_menu.addActions([save_action, load_action])
+        file_menu.addActions([save_action, load_action, load_trace_action])
 
         # Menu for constructing the structure
         create_menu = menu.addMenu("Membránstruktúra megadása")
@@ -69,6 +74,7 @@ class MainWindow(QMainWindow):
         # Connecting the signals
         save_action.triggered.connect(self.save_file_dialog)
         load_action.triggered.connect(self.load_file_dialog)
+        load_trace_action.triggered.connect(self.load_trace_dialog)
         create_menu.addActions([create_base_action, create_symport_action])
         create_base_action.triggered.connect(self.create_base_dialog)
         create_symport_action.triggered.connect(self.create_symport_dialog)
@@ -77,9 +83,18 @@ class MainWindow(QMainWindow):
         run_menu = menu.addMenu("Futtatás")
         run_step = QAction("Szimuláció lépés futtatása", self)
         run_sim = QAction("Teljes szimuláció indítása", self)
-        run_menu.addActions([run_sim, run_step])
+        record_sim = QAction("Számítás rögzítése", self)
+        undo_step = QAction("Lépés visszavonása", self)
+        undo_step.setShortcut("Ctrl+Z")
+        run_menu.addActions([run_sim, run_step, undo_step, record_sim])
         run_step.triggered.connect(self.membranes.simulate_step)
+        undo_step.triggered.connect(self.membranes.step_back)
         run_sim.triggered.connect(self.run_simulation)
+        record_sim.triggered.connect(self.record_dialog)
+        profile_action = QAction("Profilozás", self)
+        profile_action.setCheckable(True)
+        run_menu.addAction(profile_action)
+        profile_action.toggled.connect(self.toggle_profiling)
 
         # Help menu
         help_menu = menu.addMenu("Súgó")
@@ -91,31 +106,164 @@ class MainWindow(QMainWindow):
         self.setStatusBar(QStatusBar(self))
         run_sim_button = QPushButton("Teljes szimuláció indítása")
         run_step_button = QPushButton("Szimuláció lépés indítása")
+        undo_step_button = QPushButton("Lépés visszavonása")
         run_sim_button.clicked.connect(self.run_simulation)
         run_step_button.clicked.connect(self.membranes.simulate_step)
+        undo_step_button.clicked.connect(self.membranes.step_back)
 
         self.statusBar().addPermanentWidget(run_sim_button)
         self.counter_label = QLabel("Lépések száma: 0")
         self.statusBar().addPermanentWidget(run_step_button)
+        self.statusBar().addPermanentWidget(undo_step_button)
         self.statusBar().addPermanentWidget(self.counter_label)
         self.statusBar().hide()
 
+        # The playback toolbar and the profiler panel are constructed on
+        # first use
+        self.playback = None
+        self.playback_toolbar = None
+        self.profiler_panel = None
+        self.profiler_dock = None
+
         self.setCentralWidget(self.membranes.view)
 
+    def get_playback_toolbar(self):
+        """
+        A function used to return the toolbar for replaying recorded traces,
+        constructing it on the first call
+
+        Returns
+        -------
+        QToolBar
+            the toolbar containing the playback controls
+        """
+
+        if self.playback_toolbar is None:
+            from PlaybackWidget import PlaybackWidget
+            self.playback = PlaybackWidget(self.membranes)
+            self.playback_toolbar = QToolBar("Visszajátszás", self)
+            self.playback_toolbar.addWidget(self.playback)
+            self.addToolBar(Qt.BottomToolBarArea, self.playback_toolbar)
+        return self.playback_toolbar
+
+    def get_profiler_dock(self):
+        """
+        A function used to return the panel displaying the profiling
+        statistics, constructing it on the first call
+
+        Returns
+        -------
+        QDockWidget
+            the dock widget containing the profiler panel
+        """
+
+        if self.profiler_dock is None:
+            from ProfilerPanel import ProfilerPanel
+            self.profiler_panel = ProfilerPanel(self.membranes)
+            self.profiler_dock = QDockWidget("Profilozás", self)
+            self.profiler_dock.setWidget(self.profiler_panel)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.profiler_dock)
+            # the panel is closed by the profiling action, which also stops
+            # the profiling
+            self.profiler_dock.setFeatures(
+                QDockWidget.DockWidgetMovable |
+                QDockWidget.DockWidgetFloatable)
+            self.profiler_dock.hide()
+        return self.profiler_dock
+
+    def toggle_profiling(self, enabled):
+        """
+        The function connected to the `toggled` signal of the profiling action,
+        turns the profiling on or off and shows or hides the profiler panel
+
+        Parameters
+        ----------
+        enabled : bool
+            True if the profiling is to be turned on
+        """
+
+        self.membranes.set_profiling(enabled)
+        self.get_profiler_dock().setVisible(enabled)
+
     def run_simulation(self):
         """
         The function connected to the `clicked` signal of `run_sim` button
 
         SimulationStepDialog is enabled to help the user choose the number of
-        simulation steps
+        simulation steps and, optionally, their seed
         """
 
         if self.membranes.model is None:
             return
+        from SimulationStepDialog import SimulationStepDialog
         dialog = SimulationStepDialog()
         result = dialog.exec()
         if result == dialog.Accepted:
-            self.membranes.simulate_computation(dialog.get_number())
+            self.membranes.simulate_computation(dialog.get_number(),
+                                                dialog.get_seed())
+
+    def record_dialog(self):
+        """
+        A function that displays the dialogs used to record the computation of
+        the membrane system into a trace file
+        """
+
+        if self.membranes.model is None or \
+                self.membranes.trace_cursor is not None:
+            return
+        max_steps, accepted = QInputDialog.getInt(
+            self, "Számítás rögzítése", "Add meg a lépések maximális számát!",
+            1000, 1, 10000000)
+        if not accepted:
+            return
+        name = QFileDialog.getSaveFileName(self, 'Számítás rögzítése',
+                                           filter="Trace files (*.ptrace)")
+        if name[0] != '':
+            self.membranes.record_trace(name[0], max_steps)
+
+    def load_trace_dialog(self):
+        """
+        A function that displays the dialog used to load a recorded trace
+
+        After selecting the file, the simulator object's `load_trace()` will be
+        called with the selected file path (if the file truly exists)
+        """
+
+        name = QFileDialog.getOpenFileName(self, 'Felvétel visszajátszása',
+                                           filter="Trace files (*.ptrace)")
+        if QFile.exists(name[0]):
+            from StepTrace import InvalidTraceException
+            try:
+                self.membranes.load_trace(name[0])
+            except InvalidTraceException:
+                msg_box = QMessageBox()
+                msg_box.setWindowTitle("Figyelmeztetés")
+                msg_box.setText("A megadott fájl nem egy érvényes felvétel!")
+                msg_box.exec()
+
+    def playback_started(self, num_of_steps):
+        """
+        Event handler for loading a recorded trace
+
+        Parameters
+        ----------
+        num_of_steps : int
+            the number of steps in the trace
+        """
+
+        toolbar = self.get_playback_toolbar()
+        self.playback.set_num_of_steps(num_of_steps)
+        toolbar.show()
+        self.statusBar().show()
+
+    def playback_stopped(self):
+        """
+        Event handler for leaving the playback mode
+        """
+
+        if self.playback_toolbar is not None:
+            self.playback.pause()
+            self.playback_toolbar.hide()
 
     def increment_counter_label(self, event):
         """
@@ -140,6 +288,7 @@ class MainWindow(QMainWindow):
             the list containing the results
         """
 
+        from ResultDialog import ResultDialog
         result_dialog = ResultDialog(result)
         result_dialog.exec()
 
@@ -148,9 +297,24 @@ class MainWindow(QMainWindow):
         A function for instantiating and displaying the help menu for the user
         """
 
+        from HelpMenu import HelpMenu
         help_menu = HelpMenu()
         help_menu.exec()
 
+    def closeEvent(self, event: QCloseEvent):
+        """
+        Event handler for closing the window, stops the worker processes of
+        the simulator
+
+        Parameters
+        ----------
+        event : QCloseEvent
+            the event containing information about the closing
+        """
+
+        self.membranes.shutdown_pool()
+        super().closeEvent(event)
+
     def resizeEvent(self, event: QResizeEvent):
         """
         Event handler for resizing of the window
@@ -184,6 +348,7 @@ class MainWindow(QMainWindow):
         base model
         """
 
+        from StructureDialog import StructureDialog
         dialog = StructureDialog(parent=self, type=ModelType.BASE,
                                  valid_fn=MembraneSimulator.is_valid_structure)
         result = dialog.exec()
@@ -205,6 +370,7 @@ class MainWindow(QMainWindow):
         symport-antiport model
         """
 
+        from StructureDialog import StructureDialog
         dialog = StructureDialog(parent=self, type=ModelType.SYMPORT,
                                  valid_fn=MembraneSimulator.is_valid_structure)
         result = dialog.exec()
@@ -249,11 +415,26 @@ class MainWindow(QMainWindow):
             self.statusBar().show()
 
 
-if __name__ == "__main__":
-    app = QApplication([])
+def load_resources(app):
+    """
+    A function used to load the embedded resources and to set up the
+    application icon, it is called after the main window appeared
+
+    Parameters
+    ----------
+    app : QApplication
+        the application
+    """
 
-    # Setting up the application icon
+    import resources
     app.setWindowIcon(QIcon(":/icon/icon.png"))
+
+
+if __name__ == "__main__":
+    app = QApplication([])
     window = MainWindow()
     window.show()
+
+    # Setting up the application icon once the event loop is running
+    QTimer.singleShot(0, lambda: load_resources(app))
     sys.exit(app.exec())
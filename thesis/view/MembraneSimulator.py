@@ -1,4 +1,3 @@
-import json
 from PySide6.QtWidgets import (
     QWidget,
     QGraphicsScene,
@@ -8,8 +7,6 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 
 from MembraneSystem import MembraneSystem, InvalidArgumentException
-from BaseModel import BaseModel
-from SymportAntiport import SymportAntiport
 from MultiSet import MultiSet
 from ModelType import ModelType
 from RegionView import RegionView
@@ -35,10 +32,17 @@ class SimulatorSignal(QObject):
     counter_increment : Signal
         the signal that communicates to the view that the number of simulation
         steps has increased
+    playback_started : Signal
+        the signal that communicates to the view that a recorded trace with the
+        given number of steps has been loaded
+    playback_stopped : Signal
+        the signal that communicates to the view that the replay has ended
     """
 
     simulation_over = Signal(dict)
     counter_increment = Signal(int)
+    playback_started = Signal(int)
+    playback_stopped = Signal()
 
 
 class MembraneSimulator(QWidget):
@@ -46,6 +50,10 @@ class MembraneSimulator(QWidget):
     A class responsible for communicating with the model of the membrane system
     and displaying its current state for the view
 
+    The models, the trace files and the worker pool are imported on first
+    use, so the main window can appear before the simulation back-ends are
+    loaded
+
     Attributes
     ----------
     type : ModelType
@@ -67,8 +75,31 @@ class MembraneSimulator(QWidget):
         the maximum width for the rectangle of the skin region
     max_height : int
         the maximum height for the rectangle of the skin region
+    trace : StepTrace
+        the recorded trace being replayed (None if not in playback mode)
+    trace_cursor : TraceCursor
+        the current position in the replayed trace (None if not in playback
+        mode)
+    dissolved_views : dict
+        the `RegionView` objects of the dissolved regions keyed by the region
+        identifiers, kept for stepping back
+    pool : WorkerPool
+        the worker processes running the computations, kept alive between
+        the runs (None until the first run)
+    cache : ResultCache
+        the cache of the outcome histograms of the seeded runs (None until
+        the first seeded run)
+    profiling : bool
+        True if the statistics of the simulated steps are collected
+    history_limit : int
+        the number of steps that can be stepped back in the simulator
+    time_limit : int
+        the upper limit on the time of a computation in seconds
     """
 
+    history_limit = 100
+    time_limit = 10
+
     def __init__(self, max_width, max_height, parent=None):
         """
         A function to initialize the simulator
@@ -94,6 +125,12 @@ class MembraneSimulator(QWidget):
         self.signal = SimulatorSignal()
         self.max_width = max_width
         self.max_height = max_height
+        self.trace = None
+        self.trace_cursor = None
+        self.dissolved_views = {}
+        self.pool = None
+        self.cache = None
+        self.profiling = False
 
     def set_model_object(self, model_obj):
         """
@@ -108,18 +145,15 @@ class MembraneSimulator(QWidget):
             the membrane system loaded from a file
         """
 
+        from BaseModel import BaseModel
+        from SymportAntiport import SymportAntiport
         if isinstance(model_obj, BaseModel):
             self.type = ModelType.BASE
         elif isinstance(model_obj, SymportAntiport):
             self.type = ModelType.SYMPORT
 
         self.model = model_obj
-        self.model.signal.sim_over.connect(self.summarize_results)
-        self.model.signal.sim_step_over.connect(
-            self.signal.counter_increment.emit)
-        self.model.signal.obj_changed.connect(self.update_obj_view)
-        self.model.signal.rules_changed.connect(self.update_rule_view)
-        self.model.signal.region_dissolved.connect(self.update_dissolve)
+        self.connect_model()
         self.draw_model()
 
     def set_model(self, type, string):
@@ -142,6 +176,9 @@ class MembraneSimulator(QWidget):
             system
         """
 
+        from BaseModel import BaseModel
+        from SymportAntiport import SymportAntiport
+        self.stop_playback()
         try:
             if type == ModelType.BASE:
                 self.model = BaseModel.create_model_from_str(string)
@@ -149,16 +186,59 @@ class MembraneSimulator(QWidget):
             elif type == ModelType.SYMPORT:
                 self.type = ModelType.SYMPORT
                 self.model = SymportAntiport.create_model_from_str(string)
-            self.model.signal.sim_over.connect(self.summarize_results)
-            self.model.signal.sim_step_over.connect(
-                self.signal.counter_increment.emit)
-            self.model.signal.obj_changed.connect(self.update_obj_view)
-            self.model.signal.rules_changed.connect(self.update_rule_view)
-            self.model.signal.region_dissolved.connect(self.update_dissolve)
+            self.connect_model()
             self.draw_model()
         except (InvalidArgumentException, AttributeError):
             raise InvalidStructureException
 
+    def connect_model(self):
+        """
+        A function used to connect the signals of the model to the simulator
+        and to enable stepping back in the model
+        """
+
+        self.model.set_history_limit(MembraneSimulator.history_limit)
+        if self.profiling:
+            self.model.enable_profiling()
+        self.model.signal.sim_over.connect(self.summarize_results)
+        self.model.signal.sim_step_over.connect(
+            self.signal.counter_increment.emit)
+        self.model.signal.obj_changed.connect(self.update_obj_view)
+        self.model.signal.rules_changed.connect(self.update_rule_view)
+        self.model.signal.region_dissolved.connect(self.update_dissolve)
+        self.model.signal.region_restored.connect(self.update_restore)
+
+    def set_profiling(self, enabled):
+        """
+        A function used to turn the collection of the step statistics on or
+        off for the current and the later models
+
+        Parameters
+        ----------
+        enabled : bool
+            True if the statistics are to be collected
+        """
+
+        self.profiling = enabled
+        if self.model is None:
+            return
+        if enabled:
+            self.model.enable_profiling()
+        else:
+            self.model.disable_profiling()
+
+    def get_profiler(self):
+        """
+        A function used to return the profiler of the current model
+
+        Returns
+        -------
+        StepProfiler
+            the profiler of the model (None if there is no profiled model)
+        """
+
+        return None if self.model is None else self.model.profiler
+
     def update_dissolve(self, id):
         """
         A function to update the scene of the membrane system on the event of a
@@ -182,7 +262,30 @@ class MembraneSimulator(QWidget):
 
         self.view_regions[parent_id].adjust_text()
         self.view_regions[parent_id].center_text()
-        del self.view_regions[id]
+        self.dissolved_views[id] = self.view_regions.pop(id)
+
+    def update_restore(self, id):
+        """
+        A function to update the scene of the membrane system when a dissolved
+        region is put back by stepping back
+
+        Parameters
+        ----------
+        id : int
+            the identifier of the restored region
+        """
+
+        region_view = self.dissolved_views.pop(id, None)
+        if region_view is None:
+            self.draw_model()
+            return
+        parent_id = self.model.get_parent_region(self.model.regions[id]).id
+        region_view.setParentItem(self.view_regions[parent_id])
+        self.view_regions[id] = region_view
+        child_list = self.model.get_all_children(self.model.regions[id])
+        if child_list:
+            for child in child_list:
+                self.view_regions[child.id].setParentItem(region_view)
 
     def update_obj_view(self, id, string):
         """
@@ -233,6 +336,8 @@ class MembraneSimulator(QWidget):
         """
 
         self.scene.clear()
+        self.view_regions = {}
+        self.dissolved_views = {}
         self.skin_id = self.model.get_root_id()
         self.view_regions[self.skin_id] = RegionView(self.skin_id,
                                                      QRectF(0, 0,
@@ -282,6 +387,8 @@ class MembraneSimulator(QWidget):
                                                                  current_node_id])
                     self.view_regions[child.id].setPos(i * child_width, 0)
                 gen_child_list.remove(current_node_id)
+        if self.trace_cursor is not None:
+            self.refresh_trace_view()
         self.view.show()
 
     @classmethod
@@ -319,6 +426,7 @@ class MembraneSimulator(QWidget):
         """
 
         new_multiset = MultiSet.string_to_multiset(new_objects)
+        self.model.clear_history()
         self.model.regions[id].objects = new_multiset
 
     def update_region_rules(self, id, new_rules: str):
@@ -344,21 +452,115 @@ class MembraneSimulator(QWidget):
         Essentially calls the model's `simulate_step()` function
         """
 
-        if self.model is None:
+        if self.model is None or self.trace_cursor is not None:
             return
         self.model.simulate_step()
 
-    def simulate_computation(self, num_of_sim=10):
+    def step_back(self):
+        """
+        A function to undo the latest simulated step
+
+        Essentially calls the model's `step_back()` function
+        """
+
+        if self.model is None or self.trace_cursor is not None:
+            return
+        self.model.step_back()
+
+    def simulate_computation(self, num_of_sim=10, seed=None):
         """
         A function to simulate the whole computation the membrane system
 
-        Essentially a wrapper around the model's `simulate_timed_computation()`
-        function
+        The computations are run by the simulator's worker pool, which keeps
+        the model cached between the runs. If a region of the model has
+        already dissolved, the saved structure no longer describes the model,
+        so the model's `simulate_parallel()` function is used instead.
+
+        The workers summarize their computations, and only the histograms of
+        the results are sent back.
+
+        If `seed` is given, computation `i` is seeded with
+        `MembraneSystem.spawn_seed(seed, i)`, and the histograms are kept in
+        the result cache (see `ResultCache.extend()`): a cached histogram of
+        the same ensemble is shown without computing, and a smaller one is
+        extended with the missing computations.
+
+        Parameters
+        ----------
+        num_of_sim : int, optional
+            the number of computations (default is 10)
+        seed : int, optional
+            the seed of the computations (default is None)
         """
 
-        if self.model is None:
+        if self.model is None or self.trace_cursor is not None:
             return
-        self.model.simulate_parallel(num_of_sim)
+        from Outcomes import OutcomeHistogram, decode_result
+        cache = None if seed is None else self.get_cache()
+        json_dict = self.model.create_json_dict()
+        structure = json_dict["structure"]
+        if structure is None or len(self.model.regions) != sum(
+                structure.count(c) for c in '[{('):
+            self.model.simulate_parallel(num_of_sim, seed, cache=cache)
+            return
+
+        def compute(first):
+            seeds = [None if seed is None else
+                     MembraneSystem.spawn_seed(seed, i)
+                     for i in range(first, num_of_sim)]
+            return self.get_pool().run(
+                json_dict, seeds, time_limit=MembraneSimulator.time_limit,
+                aggregate=True) if seeds else OutcomeHistogram()
+
+        if cache is None:
+            outcomes = compute(0)
+        else:
+            outcomes, _ = cache.extend(cache.make_key(json_dict, seed),
+                                       num_of_sim, compute)
+        self.signal.simulation_over.emit(
+            {str(decode_result(key)): count for key, count in
+             outcomes.counts.items()})
+
+    def get_pool(self):
+        """
+        A function used to return the worker pool of the simulator, starting
+        it on the first call
+
+        Returns
+        -------
+        WorkerPool
+            the pool of the worker processes
+        """
+
+        if self.pool is None:
+            from WorkerPool import WorkerPool
+            self.pool = WorkerPool(start_method="spawn")
+        return self.pool
+
+    def get_cache(self):
+        """
+        A function used to return the result cache of the simulator, opening
+        it on the first call
+
+        Returns
+        -------
+        ResultCache
+            the cache of the outcome histograms
+        """
+
+        if self.cache is None:
+            from ResultCache import ResultCache
+            self.cache = ResultCache()
+        return self.cache
+
+    def shutdown_pool(self):
+        """
+        A function used to stop the worker processes of the simulator
+        """
+
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
 
     def summarize_results(self, list):
         """
@@ -415,10 +617,144 @@ class MembraneSimulator(QWidget):
             the absolute path to the file
         """
 
+        import json
         with open(name, 'r') as load_file:
             json_dict = json.load(load_file)
-        if json_dict["type"] == 'BaseModel':
-            model = BaseModel.load(json_dict)
-        elif json_dict["type"] == 'SymportAntiport':
-            model = SymportAntiport.load(json_dict)
-        self.set_model_object(model)
+        self.stop_playback()
+        self.set_model_object(MembraneSimulator.model_from_dict(json_dict))
+
+    @staticmethod
+    def model_from_dict(json_dict):
+        """
+        A static method used to construct the model of the type given in the
+        JSON dictionary
+
+        Parameters
+        ----------
+        json_dict : dict
+            the dictionary created by the model's `create_json_dict()`
+
+        Returns
+        -------
+        MembraneSystem
+            the model constructed from the dictionary
+        """
+
+        from WorkerPool import model_from_dict
+        return model_from_dict(json_dict)
+
+    def record_trace(self, name, max_steps):
+        """
+        A function used to record the computation of a copy of the model into
+        a trace file
+
+        The displayed model is left unchanged, the recording can be replayed
+        with `load_trace()`
+
+        Parameters
+        ----------
+        name : str
+            the absolute path to the trace file
+        max_steps : int
+            the upper limit on the number of recorded steps
+
+        Returns
+        -------
+        int
+            the number of recorded steps
+        """
+
+        if self.model is None or self.trace_cursor is not None:
+            return 0
+        model_copy = self.model.__class__.copy_system(self.model)
+        return model_copy.record_computation(name, max_steps)
+
+    def load_trace(self, name):
+        """
+        A function used to load a recorded trace and to start replaying it
+
+        The model is constructed from the configuration at the start of the
+        recording, then the view is updated from the recorded changes without
+        simulating again
+
+        Parameters
+        ----------
+        name : str
+            the absolute path to the trace file
+        """
+
+        from StepTrace import StepTrace, TraceCursor
+        self.stop_playback()
+        trace = StepTrace(name)
+        self.set_model_object(MembraneSimulator.model_from_dict(
+            trace.model_dict))
+        self.trace = trace
+        self.trace_cursor = TraceCursor(trace, self.model.get_state(),
+                                        self.model.tree.get_parent_map())
+        self.signal.counter_increment.emit(trace.start_step)
+        self.signal.playback_started.emit(trace.num_of_steps)
+
+    def stop_playback(self):
+        """
+        A function used to leave playback mode and to close the replayed trace
+        """
+
+        if self.trace is None:
+            return
+        self.trace_cursor = None
+        self.trace.close()
+        self.trace = None
+        self.signal.playback_stopped.emit()
+
+    def show_trace_step(self, step):
+        """
+        A function used to display the state of the replayed trace at the given
+        step
+
+        Only the regions that changed between the previous and the new
+        position are updated
+
+        Parameters
+        ----------
+        step : int
+            the step to be displayed
+        """
+
+        if self.trace_cursor is None:
+            return
+        changed, structure_changed = self.trace_cursor.seek(step)
+        if structure_changed:
+            self.arrange_trace_regions()
+        for region_id in changed:
+            if region_id in self.view_regions:
+                self.update_obj_view(region_id, str(
+                    MultiSet(self.trace_cursor.state.get(region_id))))
+        self.signal.counter_increment.emit(
+            self.trace.start_step + self.trace_cursor.step)
+
+    def arrange_trace_regions(self):
+        """
+        A function used to hide the regions that are dissolved at the current
+        position of the replayed trace and to move their children into the
+        corresponding parent region
+        """
+
+        parents = self.trace_cursor.parents
+        for region_id, region_view in self.view_regions.items():
+            region_view.setVisible(region_id in parents)
+            parent_id = parents.get(region_id)
+            if parent_id is not None:
+                parent_view = self.view_regions[parent_id]
+                if region_view.parentItem() is not parent_view:
+                    region_view.setParentItem(parent_view)
+
+    def refresh_trace_view(self):
+        """
+        A function used to display the whole state of the replayed trace at the
+        current position
+        """
+
+        self.arrange_trace_regions()
+        for region_id in self.view_regions:
+            self.update_obj_view(region_id, str(
+                MultiSet(self.trace_cursor.state.get(region_id))))
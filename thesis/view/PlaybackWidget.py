@@ -0,0 +1,151 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QHBoxLayout,
+    QPushButton,
+    QSlider,
+    QSpinBox,
+    QLabel
+)
+from PySide6.QtCore import Qt, QTimer
+
+
+class PlaybackWidget(QWidget):
+    """
+    A class for displaying the controls used to replay a recorded trace
+
+    Attributes
+    ----------
+    simulator : MembraneSimulator
+        the simulator displaying the replayed trace
+    slider : QSlider
+        the slider used to scrub through the trace
+    speed_box : QSpinBox
+        the spin box used to select the number of steps played per second
+    timer : QTimer
+        the timer driving the playback
+    """
+
+    max_fps = 50
+
+    def __init__(self, simulator, parent=None):
+        """
+        A function for initializing the playback controls
+
+        Parameters
+        ----------
+        simulator : MembraneSimulator
+            the simulator displaying the replayed trace
+        parent : QWidget
+            the parent widget of the controls
+        """
+
+        super().__init__(parent)
+        self.simulator = simulator
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.advance)
+        self.steps_per_tick = 1
+
+        self.back_button = QPushButton("Vissza")
+        self.play_button = QPushButton("Lejátszás")
+        self.forward_button = QPushButton("Előre")
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setMinimum(0)
+        self.speed_box = QSpinBox()
+        self.speed_box.setRange(1, 10000)
+        self.speed_box.setValue(10)
+        self.speed_box.setSuffix(" lépés/mp")
+
+        self.back_button.clicked.connect(self.step_back)
+        self.forward_button.clicked.connect(self.step_forward)
+        self.play_button.clicked.connect(self.toggle_play)
+        self.slider.valueChanged.connect(self.simulator.show_trace_step)
+        self.speed_box.valueChanged.connect(self.update_speed)
+
+        layout = QHBoxLayout()
+        layout.addWidget(QLabel("Visszajátszás:"))
+        layout.addWidget(self.back_button)
+        layout.addWidget(self.play_button)
+        layout.addWidget(self.forward_button)
+        layout.addWidget(self.slider, stretch=1)
+        layout.addWidget(self.speed_box)
+        self.setLayout(layout)
+
+    def set_num_of_steps(self, num_of_steps):
+        """
+        A function used to reset the controls for a newly loaded trace
+
+        Parameters
+        ----------
+        num_of_steps : int
+            the number of steps in the trace
+        """
+
+        self.pause()
+        self.slider.blockSignals(True)
+        self.slider.setMaximum(num_of_steps)
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+
+    def step_back(self):
+        """
+        A function used to move the playback one step backward
+        """
+
+        self.slider.setValue(self.slider.value() - 1)
+
+    def step_forward(self):
+        """
+        A function used to move the playback one step forward
+        """
+
+        self.slider.setValue(self.slider.value() + 1)
+
+    def toggle_play(self):
+        """
+        A function used to start or pause the playback
+        """
+
+        if self.timer.isActive():
+            self.pause()
+        else:
+            if self.slider.value() == self.slider.maximum():
+                self.slider.setValue(0)
+            self.update_speed(self.speed_box.value())
+            self.timer.start()
+            self.play_button.setText("Szünet")
+
+    def pause(self):
+        """
+        A function used to stop the playback
+        """
+
+        self.timer.stop()
+        self.play_button.setText("Lejátszás")
+
+    def update_speed(self, speed):
+        """
+        A function used to set the playback speed
+
+        The view is refreshed at most `max_fps` times per second, higher speeds
+        skip multiple steps at once
+
+        Parameters
+        ----------
+        speed : int
+            the number of steps played per second
+        """
+
+        fps = min(speed, PlaybackWidget.max_fps)
+        self.timer.setInterval(1000 // fps)
+        self.steps_per_tick = max(1, round(speed / fps))
+
+    def advance(self):
+        """
+        The slot connected to the timer, moves the playback forward
+        """
+
+        value = self.slider.value() + self.steps_per_tick
+        if value >= self.slider.maximum():
+            value = self.slider.maximum()
+            self.pause()
+        self.slider.setValue(value)
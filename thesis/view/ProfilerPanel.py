@@ -0,0 +1,141 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QFileDialog,
+    QHeaderView
+)
+from PySide6.QtCore import QTimer
+
+
+class ProfilerPanel(QWidget):
+    """
+    A class for displaying the statistics collected by the profiler of the
+    simulated model
+
+    The panel is refreshed periodically while it is visible, so its cost does
+    not depend on the speed of the simulation
+
+    Attributes
+    ----------
+    simulator : MembraneSimulator
+        the simulator whose model is profiled
+    phase_label : QLabel
+        the label displaying the time of the phases of the steps
+    rule_table : QTableWidget
+        the table displaying the statistics of the rules
+    timer : QTimer
+        the timer driving the refreshing of the panel
+    """
+
+    refresh_interval = 500
+
+    def __init__(self, simulator, parent=None):
+        """
+        A function for initializing the panel
+
+        Parameters
+        ----------
+        simulator : MembraneSimulator
+            the simulator whose model is profiled
+        parent : QWidget
+            the parent widget of the panel
+        """
+
+        super().__init__(parent)
+        self.simulator = simulator
+        self.phase_label = QLabel()
+        self.rule_table = QTableWidget(0, 5)
+        self.rule_table.setHorizontalHeaderLabels(
+            ["Régió", "Szabály", "Alkalmazás", "Ellenőrzés", "Sikertelen"])
+        self.rule_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeToContents)
+        self.rule_table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        reset_button = QPushButton("Törlés")
+        export_button = QPushButton("Exportálás")
+        reset_button.clicked.connect(self.reset)
+        export_button.clicked.connect(self.export_dialog)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        layout = QVBoxLayout()
+        layout.addWidget(self.phase_label)
+        layout.addWidget(self.rule_table, stretch=1)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(ProfilerPanel.refresh_interval)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        """
+        Event handler for showing the panel, starts the refreshing
+        """
+
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        """
+        Event handler for hiding the panel, stops the refreshing
+        """
+
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        """
+        A function used to display the current statistics of the profiler
+        """
+
+        profiler = self.simulator.get_profiler()
+        if profiler is None:
+            self.phase_label.setText("Nincs profilozott modell")
+            self.rule_table.setRowCount(0)
+            return
+
+        lines = [f"Profilozott lépések: {len(profiler.steps)}"]
+        lines.extend(f"{phase}: {total * 1000:.2f} ms" for phase, total in
+                     profiler.phases.items())
+        lines.extend(f"{name}: {count} hívás, {total * 1000:.2f} ms" for
+                     name, (count, total) in profiler.calls.items() if count)
+        self.phase_label.setText("\n".join(lines))
+
+        rules = sorted(profiler.rules.values())
+        self.rule_table.setRowCount(len(rules))
+        for row, entry in enumerate(rules):
+            for column, value in enumerate(entry):
+                self.rule_table.setItem(row, column,
+                                        QTableWidgetItem(str(value)))
+
+    def reset(self):
+        """
+        A function used to clear the collected statistics
+        """
+
+        profiler = self.simulator.get_profiler()
+        if profiler is not None:
+            profiler.reset()
+        self.refresh()
+
+    def export_dialog(self):
+        """
+        A function used to save the report of the profiler into a JSON file
+        chosen by the user
+        """
+
+        profiler = self.simulator.get_profiler()
+        if profiler is None:
+            return
+        name, _ = QFileDialog.getSaveFileName(self, "Profil mentése", "",
+                                              "JSON (*.json)")
+        if name:
+            profiler.save(name)
@@ -3,7 +3,8 @@ from PySide6.QtWidgets import (
     QSpinBox,
     QDialogButtonBox,
     QVBoxLayout,
-    QLabel
+    QLabel,
+    QCheckBox
     )
 
 
@@ -11,6 +12,9 @@ class SimulationStepDialog(QDialog):
     """
     A class for displaying the dialog that is used to select the number of
     simulation steps to occur
+
+    Optionally a seed can be given, then the computations are reproducible
+    and their results are reused from the result cache
     """
 
     def __init__(self, parent=None):
@@ -29,6 +33,12 @@ class SimulationStepDialog(QDialog):
         self.spin_box = QSpinBox()
         self.spin_box.setMinimum(1)
         self.spin_box.setMaximum(1000)
+        self.seed_check = QCheckBox(
+            "Rögzített mag (az eredmények újrahasznosítása)")
+        self.seed_box = QSpinBox()
+        self.seed_box.setMaximum(2 ** 31 - 1)
+        self.seed_box.setEnabled(False)
+        self.seed_check.toggled.connect(self.seed_box.setEnabled)
         QBtn = QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
         self.button_box = QDialogButtonBox(QBtn)
         self.button_box.accepted.connect(self.accept)
@@ -37,6 +47,8 @@ class SimulationStepDialog(QDialog):
         self.layout = QVBoxLayout()
         self.layout.addWidget(self.label)
         self.layout.addWidget(self.spin_box)
+        self.layout.addWidget(self.seed_check)
+        self.layout.addWidget(self.seed_box)
         self.layout.addWidget(self.button_box)
         self.setLayout(self.layout)
 
@@ -51,3 +63,15 @@ class SimulationStepDialog(QDialog):
         """
 
         return self.spin_box.value()
+
+    def get_seed(self):
+        """
+        A getter method for returning the seed of the simulations
+
+        Returns
+        -------
+        int
+            the seed the user selected, None if no seed was selected
+        """
+
+        return self.seed_box.value() if self.seed_check.isChecked() else None